@@ -0,0 +1,51 @@
+""" Throughput of 1000 coroutines reading independent keys with one GET per call against the
+    auto-batching of the async redis backend. Needs a redis server, 127.0.0.1:6379 by default.
+
+    python -m benchmarks.batching [host:port]
+"""
+import asyncio
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from cache.fwk_cache import FwkCache
+from cache.fwk_rediscache import AsyncRedisCache
+
+COROUTINES: int = 1_000
+READS: int = 20
+KEYS: int = 10_000
+MODES: Dict[str, Any] = {"get per call": False, "batching": True,
+                         "batching 200us": {'window_us': 200}}
+
+
+async def reader(fwk_cache: AsyncRedisCache, seed: int) -> None:
+    rng: random.Random = random.Random(seed)
+    for _ in range(READS):
+        _: Any = await fwk_cache.get(rng.randrange(KEYS))
+
+
+async def run(alias: str) -> float:
+    fwk_cache: AsyncRedisCache = AsyncRedisCache(alias)
+    start: float = time.perf_counter()
+    _: List[None] = await asyncio.gather(*(reader(fwk_cache, seed) for seed in range(COROUTINES)))
+    elapsed: float = time.perf_counter() - start
+    return COROUTINES * READS / elapsed
+
+
+async def main() -> None:
+    host, _, port = (sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:6379").rpartition(":")
+    FwkCache.load_cache({f"batching_{name}": {'backend': 'redis', 'namespace': 'batching:', 'ttl': 300,
+                                              'host': host, 'port': int(port), 'max_pool_connections': 50,
+                                              'batching': batching}
+                         for name, batching in MODES.items()})
+    seed: AsyncRedisCache = AsyncRedisCache(f"batching_{next(iter(MODES))}")
+    _: bool = await seed.put_many({key: {"id": key} for key in range(KEYS)})
+    print(f"{COROUTINES:,} coroutines x {READS} reads over {KEYS:,} keys")
+    for name in MODES:
+        print(f"{name:<18}{await run(f'batching_{name}'):>14,.0f} gets/s")
+    _ = await seed.clear()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
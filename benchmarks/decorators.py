@@ -0,0 +1,70 @@
+""" Cost of a cached hit through the decorator against building a client on every call,
+    as the decorators did before keeping a long-lived handle.
+
+    python -m benchmarks.decorators
+"""
+import asyncio
+import time
+import timeit
+from typing import Any
+
+from cache.cache_creator import build_async, build_sync
+from cache.decorators import cached
+from cache.keys import KeyBuilder
+
+ALIAS: str = "memory"
+ROUNDS: int = 100_000
+
+
+def get_user(user_id: int) -> int:
+    return user_id
+
+
+async def async_get_user(user_id: int) -> int:
+    return user_id
+
+
+def per_call_client(key_builder: KeyBuilder) -> Any:
+    fwk_cache: Any = build_sync(ALIAS)
+    value: Any = fwk_cache.get(key_builder.key((1,), {}))
+    _: bool = fwk_cache.close()
+    return value
+
+
+async def async_per_call_client(key_builder: KeyBuilder) -> Any:
+    fwk_cache: Any = build_async(ALIAS)
+    value: Any = await fwk_cache.get(key_builder.key((1,), {}))
+    _: bool = await fwk_cache.close()
+    return value
+
+
+async def async_rounds(call: Any) -> float:
+    start: float = time.perf_counter()
+    for _ in range(ROUNDS):
+        await call()
+    return time.perf_counter() - start
+
+
+def report(name: str, elapsed: float) -> None:
+    print(f"{name:<28}{elapsed / ROUNDS * 1e6:>10.2f} us/call")
+
+
+def main() -> None:
+    decorated: Any = cached(ALIAS)(get_user)
+    async_decorated: Any = cached(ALIAS)(async_get_user)
+    key_builder: KeyBuilder = KeyBuilder(get_user)
+    _ = decorated(1)
+    report("sync client per call", timeit.timeit(lambda: per_call_client(key_builder), number=ROUNDS))
+    report("sync decorator hit", timeit.timeit(lambda: decorated(1), number=ROUNDS))
+    report("key only", timeit.timeit(lambda: key_builder.key((1,), {}), number=ROUNDS))
+
+    async def run() -> None:
+        _ = await async_decorated(1)
+        report("async client per call", await async_rounds(lambda: async_per_call_client(key_builder)))
+        report("async decorator hit", await async_rounds(lambda: async_decorated(1)))
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
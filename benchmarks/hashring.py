@@ -0,0 +1,67 @@
+""" Balance of the consistent hash ring and share of keys moved when a node joins. With node
+    addresses, for example local redis-server processes started on several ports, it also writes
+    and reads the keys through a sharded alias and counts the keys stored on every node.
+
+    python -m benchmarks.hashring [host:port ...]
+"""
+import sys
+import time
+from typing import Dict, List
+
+import redis
+
+from cache.fwk_cache import FwkCache
+from cache.fwk_rediscache import SyncRedisCache
+from cache.hashring import HashRing
+
+KEYS: int = 100_000
+NODES: List[int] = [2, 4, 8]
+LIVE_KEYS: int = 10_000
+
+
+def ring_stats(nodes: int, keys: List[bytes]) -> None:
+    names: List[str] = [f"10.0.0.{node}:6379/0" for node in range(nodes)]
+    ring: HashRing = HashRing(names)
+    grown: HashRing = HashRing(names + [f"10.0.0.{nodes}:6379/0"])
+    owners: Dict[str, int] = dict.fromkeys(names, 0)
+    moved: int = 0
+    for key in keys:
+        owner: str = ring.node(key)
+        owners[owner] += 1
+        moved += grown.node(key) != owner
+    expected: float = len(keys) / nodes
+    spread: float = (max(owners.values()) - min(owners.values())) / expected
+    print(f"{nodes:<8}{spread:>18.1%}{moved / len(keys):>18.1%}{1 / (nodes + 1):>18.1%}")
+
+
+def live(addresses: List[str]) -> None:
+    FwkCache.load_cache({'hashring_live': {'backend': 'redis', 'namespace': 'hashring:', 'ttl': 60,
+                                           'nodes': addresses}})
+    fwk_cache: SyncRedisCache = SyncRedisCache('hashring_live')
+    fwk_cache.clear()
+    items: Dict[int, int] = {key: key for key in range(LIVE_KEYS)}
+    start: float = time.perf_counter()
+    _: bool = fwk_cache.put_many(items)
+    hits: int = sum(result.hit for result in fwk_cache.get_many(items))
+    elapsed: float = time.perf_counter() - start
+    print(f"\n{LIVE_KEYS:,} keys written and read in {elapsed:.3f}s, {hits:,} hits")
+    for address in addresses:
+        host, _, port = address.rpartition(":")
+        node: redis.Redis = redis.Redis(host=host, port=int(port))
+        print(f"{address:<24}{len(node.keys('hashring:*')):>10,} keys")
+    fwk_cache.clear()
+    fwk_cache.close()
+
+
+def main() -> None:
+    keys: List[bytes] = [f"main:user:{key}".encode("utf-8") for key in range(KEYS)]
+    print(f"{KEYS:,} keys")
+    print(f"{'nodes':<8}{'max-min spread':>18}{'moved on join':>18}{'ideal move':>18}")
+    for nodes in NODES:
+        ring_stats(nodes, keys)
+    if len(sys.argv) > 1:
+        live(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+""" Hit ratio of the memory strategies on a skewed synthetic workload. The reads follow a Zipf
+    distribution and every SCAN_EVERY requests a one pass scan of new keys goes through the region,
+    like a batch job sharing the alias with the point lookups.
+
+    python -m benchmarks.hit_ratio
+"""
+import itertools
+import random
+from typing import Any, Dict, List
+
+from cache.fwk_cache import FwkCache, Strategy
+from cache.fwk_memorycache import SyncMemoryCache
+
+REQUESTS: int = 100_000
+KEY_SPACE: int = 50_000
+ZIPF_EXPONENT: float = 0.9
+SCAN_EVERY: int = 10_000
+SCAN_LENGTH: int = 5_000
+SIZES: List[int] = [500, 2_000]
+STRATEGIES: List[str] = [Strategy.FIFO, Strategy.RR, Strategy.LFU, Strategy.TINYLFU, Strategy.ARC,
+                         Strategy.TWO_Q]
+_MISSING: Any = object()
+
+
+def workload(seed: int = 7) -> List[int]:
+    rng: random.Random = random.Random(seed)
+    weights: List[float] = list(itertools.accumulate(1 / (rank + 1) ** ZIPF_EXPONENT
+                                                     for rank in range(KEY_SPACE)))
+    keys: List[int] = rng.choices(range(KEY_SPACE), cum_weights=weights, k=REQUESTS)
+    trace: List[int] = []
+    scan_start: int = KEY_SPACE
+    for position, key in enumerate(keys):
+        trace.append(key)
+        if position % SCAN_EVERY == SCAN_EVERY - 1:
+            trace.extend(range(scan_start, scan_start + SCAN_LENGTH))
+            scan_start += SCAN_LENGTH
+    return trace
+
+
+def hit_ratio(alias: str, trace: List[int]) -> float:
+    fwk_cache: SyncMemoryCache = SyncMemoryCache(alias)
+    hits: int = 0
+    for key in trace:
+        if fwk_cache.get(key, _MISSING) is _MISSING:
+            fwk_cache.put(key, key)
+        else:
+            hits += 1
+    return hits / len(trace)
+
+
+def main() -> None:
+    trace: List[int] = workload()
+    config: Dict[str, Dict[str, Any]] = {
+        f"hit_ratio_{strategy}_{size}": {'backend': 'memory', 'namespace': '', 'max_size': size,
+                                         'strategy': strategy, 'ttl': 3_600}
+        for strategy in STRATEGIES for size in SIZES}
+    FwkCache.load_cache(config)
+    print(f"{len(trace):,} requests over {KEY_SPACE:,} keys, scans of {SCAN_LENGTH:,} new keys")
+    print(f"{'strategy':<12}" + "".join(f"{f'max_size {size}':>16}" for size in SIZES))
+    for strategy in STRATEGIES:
+        ratios: List[float] = [hit_ratio(f"hit_ratio_{strategy}_{size}", trace) for size in SIZES]
+        print(f"{strategy:<12}" + "".join(f"{ratio:>16.2%}" for ratio in ratios))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+""" Cost of the instrumentation hooks on a memory alias: a client built without hooks keeps the
+    methods of its class, one with a no-op hook pays for the event and the two calls.
+
+    python -m benchmarks.hooks
+"""
+from typing import Callable, Dict
+
+from benchmarks.metrics import KEYS, best, sync_runs
+from cache.fwk_cache import FwkCache
+from cache.fwk_memorycache import SyncMemoryCache
+from cache.hooks import CacheHook
+
+
+def main() -> None:
+    FwkCache.load_cache({f"hooks_{name}": {'backend': 'memory', 'strategy': 'FIFO', 'max_size': KEYS,
+                                           'namespace': 'hooks:', 'metrics': False}
+                         for name in ("none", "noop")})
+    plain: SyncMemoryCache = SyncMemoryCache("hooks_none")
+    print(f"without hooks the client keeps its class methods: {'get' not in vars(plain)}")
+    hook: CacheHook = CacheHook()
+    FwkCache.add_hook(hook, alias="hooks_noop")
+    hooked: SyncMemoryCache = SyncMemoryCache("hooks_noop")
+    print(f"{'':<12}{'no hooks ns':>13}{'noop hook ns':>14}")
+    without: Dict[str, Callable[[], None]] = sync_runs(plain)
+    with_hook: Dict[str, Callable[[], None]] = sync_runs(hooked)
+    for name in without:
+        print(f"{name:<12}{best(without[name]):>13,.0f}{best(with_hook[name]):>14,.0f}")
+    FwkCache.remove_hook(hook, alias="hooks_noop")
+
+
+if __name__ == "__main__":
+    main()
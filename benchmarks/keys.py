@@ -0,0 +1,47 @@
+""" Per call cost and key length of the decorator key builders.
+
+    python -m benchmarks.keys
+"""
+import timeit
+from typing import Any, Dict, List, Mapping, Tuple
+
+from cache.keys import KeyBuilder
+from utils import create_user
+
+ROUNDS: int = 50_000
+
+
+def legacy_key(func: Any, args: Tuple[Any, ...], kwargs: Mapping[Any, Any]) -> str:
+    """ builder used by the decorators before KeyBuilder """
+    ordered_kwargs: Any = sorted(kwargs.items())
+    return str(func.__module__ or '') + func.__name__ + str(args) + str(ordered_kwargs)
+
+
+def get_user(user_id: int, fields: Tuple[str, ...] = (), expand: bool = False,
+             request: Any = None) -> Any:
+    return user_id
+
+
+def main() -> None:
+    builder: KeyBuilder = KeyBuilder(get_user, exclude=["request"])
+    large_fields: Tuple[str, ...] = tuple(f"field_{position}" for position in range(500))
+    cases: List[Tuple[str, Tuple[Any, ...], Dict[str, Any]]] = [
+        ("positional", (42,), {}),
+        ("keywords", (), {"user_id": 42, "expand": True}),
+        ("large argument", (42, large_fields), {}),
+        ("object argument", (42,), {"request": create_user("benchmark")}),
+    ]
+    print(f"{'call':<18}{'builder':<10}{'key length':>12}{'ops/s':>14}")
+    for name, args, kwargs in cases:
+        builders: List[Tuple[str, Any]] = [
+            ("legacy", lambda: legacy_key(get_user, args, kwargs)),
+            ("key", lambda: builder.key(args, kwargs)),
+            ("hashed", lambda: builder.hashed_key(args, kwargs)),
+        ]
+        for builder_name, build in builders:
+            elapsed: float = timeit.timeit(build, number=ROUNDS)
+            print(f"{name:<18}{builder_name:<10}{len(build()):>12}{ROUNDS / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
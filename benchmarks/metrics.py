@@ -0,0 +1,74 @@
+""" Cost of recording the metrics: ns per operation of a memory alias with and without them, the
+    difference is what every get and put pays for its counters and latency histogram.
+
+    python -m benchmarks.metrics
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List
+
+from cache.fwk_cache import FwkCache
+from cache.fwk_memorycache import AsyncMemoryCache, SyncMemoryCache
+
+OPERATIONS: int = 200_000
+REPEATS: int = 5
+KEYS: int = 1_024
+
+
+def best(run: Callable[[], None]) -> float:
+    """ ns per operation of the fastest repeat, the others are disturbed by the machine """
+    timings: List[float] = []
+    for _ in range(REPEATS):
+        start: float = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / OPERATIONS * 1e9
+
+
+def sync_runs(fwk_cache: SyncMemoryCache) -> Dict[str, Callable[[], None]]:
+    keys: List[str] = [f"user:{key}" for key in range(KEYS)]
+    get: Callable[..., Any] = fwk_cache.get
+    put: Callable[..., Any] = fwk_cache.put
+
+    def gets() -> None:
+        for position in range(OPERATIONS):
+            get(keys[position & 1_023])
+
+    def puts() -> None:
+        for position in range(OPERATIONS):
+            put(keys[position & 1_023], position)
+
+    return {"sync get": gets, "sync put": puts}
+
+
+def async_runs(fwk_cache: AsyncMemoryCache) -> Dict[str, Callable[[], None]]:
+    keys: List[str] = [f"user:{key}" for key in range(KEYS)]
+    get: Callable[..., Any] = fwk_cache.get
+
+    async def read() -> None:
+        for position in range(OPERATIONS):
+            await get(keys[position & 1_023])
+
+    def gets() -> None:
+        asyncio.run(read())
+
+    return {"async get": gets}
+
+
+def main() -> None:
+    FwkCache.load_cache({f"bench_{name}": {'backend': 'memory', 'strategy': 'FIFO', 'max_size': KEYS // 2,
+                                           'namespace': 'bench:', 'metrics': metrics}
+                         for name, metrics in (("plain", False), ("metrics", True))})
+    print(f"{'':<12}{'plain ns':>10}{'metrics ns':>12}{'overhead ns':>13}")
+    plain: Dict[str, Callable[[], None]] = {**sync_runs(SyncMemoryCache("bench_plain")),
+                                            **async_runs(AsyncMemoryCache("bench_plain"))}
+    measured: Dict[str, Callable[[], None]] = {**sync_runs(SyncMemoryCache("bench_metrics")),
+                                               **async_runs(AsyncMemoryCache("bench_metrics"))}
+    for name in plain:
+        without: float = best(plain[name])
+        with_metrics: float = best(measured[name])
+        print(f"{name:<12}{without:>10,.0f}{with_metrics:>12,.0f}{with_metrics - without:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
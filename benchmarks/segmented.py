@@ -0,0 +1,59 @@
+""" Throughput of a memory region behind one lock against lock-striped segments, by thread count.
+    80% reads and 20% writes over a key space larger than the region.
+
+    python -m benchmarks.segmented
+"""
+import random
+import sys
+import threading
+import time
+from typing import Any, Callable, List
+
+from cachetools import FIFOCache
+
+from cache.segmented import SegmentedCache
+
+MAX_SIZE: int = 10_000
+KEYS: int = 20_000
+OPERATIONS: int = 200_000
+THREADS: List[int] = [1, 2, 4, 8]
+SHARDS: List[int] = [1, 16]
+
+
+def worker(region: SegmentedCache, operations: int, seed: int) -> None:
+    rng: random.Random = random.Random(seed)
+    keys: List[str] = [f"user:{rng.randrange(KEYS)}" for _ in range(1_024)]
+    writes: List[bool] = [rng.random() < 0.2 for _ in range(1_024)]
+    get: Callable[[Any, Any], Any] = region.get
+    for position in range(operations):
+        key: str = keys[position & 1_023]
+        if writes[position & 1_023]:
+            region[key] = position
+        else:
+            get(key, None)
+
+
+def run(shards: int, threads: int) -> float:
+    region: SegmentedCache = SegmentedCache(shards, lambda: FIFOCache(-(-MAX_SIZE // shards)))
+    per_thread: int = OPERATIONS // threads
+    pool: List[threading.Thread] = [threading.Thread(target=worker, args=(region, per_thread, seed))
+                                    for seed in range(threads)]
+    start: float = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main() -> None:
+    gil: Any = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"python {sys.version.split()[0]}, gil enabled: {gil}")
+    print(f"{'threads':<10}" + "".join(f"{f'{shards} shard(s) ops/s':>22}" for shards in SHARDS))
+    for threads in THREADS:
+        results: List[float] = [run(shards, threads) for shards in SHARDS]
+        print(f"{threads:<10}" + "".join(f"{result:>22,.0f}" for result in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+""" Encode/decode throughput and payload size of the Redis serializers for a User payload.
+
+    python -m benchmarks.serializers
+"""
+import timeit
+from typing import Any, Dict, List, Tuple
+
+from cache.exceptions import ConfigurationError
+from cache.serializers import Serializer, decode, get_serializer
+from utils import create_user
+
+ROUNDS: int = 20_000
+CONFIGS: List[Tuple[str, Any]] = [
+    ("pickle protocol 4", {"name": "pickle", "protocol": 4}),
+    ("pickle protocol 5", {"name": "pickle", "protocol": 5}),
+    ("json", "json"),
+    ("ujson", "ujson"),
+    ("msgpack", "msgpack"),
+]
+
+
+def bench(name: str, serializer: Serializer, payload: Any) -> Dict[str, Any]:
+    encoded: bytes = serializer.encode(payload)
+    encode_time: float = timeit.timeit(lambda: serializer.encode(payload), number=ROUNDS)
+    decode_time: float = timeit.timeit(lambda: decode(encoded), number=ROUNDS)
+    return {"name": name, "size": len(encoded), "encode": ROUNDS / encode_time,
+            "decode": ROUNDS / decode_time}
+
+
+def main() -> None:
+    user = create_user("benchmark")
+    # the text and binary formats can not encode arbitrary objects, they store the attributes
+    user_fields: Dict[str, Any] = dict(vars(user))
+    print(f"{'serializer':<20}{'bytes':>8}{'encode ops/s':>16}{'decode ops/s':>16}")
+    for name, config in CONFIGS:
+        try:
+            serializer: Serializer = get_serializer(config)
+        except ConfigurationError as exc:
+            print(f"{name:<20}skipped: {exc}")
+            continue
+        payload: Any = user if serializer.NAME == "pickle" else user_fields
+        result: Dict[str, Any] = bench(name, serializer, payload)
+        print(f"{result['name']:<20}{result['size']:>8}{result['encode']:>16,.0f}"
+              f"{result['decode']:>16,.0f}")
+    raw: Serializer = get_serializer("raw")
+    result = bench("raw (pickled bytes)", raw, get_serializer("pickle").dumps(user))
+    print(f"{result['name']:<20}{result['size']:>8}{result['encode']:>16,.0f}{result['decode']:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
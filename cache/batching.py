@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Final, Generic, List, Optional, TypeVar, Union
+
+from cache.exceptions import ConfigurationError
+
+V = TypeVar("V")
+BatchFetch = Callable[[List[str]], Awaitable[List[Any]]]
+BatchingConfig = Union[None, bool, Dict[str, Any]]
+
+DEFAULT_MAX_BATCH: Final[int] = 512
+# 0 sends the batch on the next iteration of the loop, after every coroutine ready to run
+DEFAULT_WINDOW_US: Final[int] = 0
+
+
+class GetBatcher(Generic[V]):
+    """ Collects the single key reads issued in the same loop iteration, or in window_us
+        microseconds, and sends them with one call to fetch. A key asked twice in the same batch is
+        fetched once and every caller gets the same value. A batch is sent as soon as it holds
+        max_batch keys. The batcher belongs to one event loop, like the client that owns it.
+    """
+
+    def __init__(self, fetch: BatchFetch, max_batch: int = DEFAULT_MAX_BATCH,
+                 window_us: int = DEFAULT_WINDOW_US) -> None:
+        if max_batch < 1:
+            raise ConfigurationError("The batches need room for at least one key")
+        if window_us < 0:
+            raise ConfigurationError("The batching window can not be negative")
+        self._fetch: BatchFetch = fetch
+        self._max_batch: int = max_batch
+        self._window: float = window_us / 1_000_000
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._scheduled: Optional[asyncio.Handle] = None
+        self._tasks: set = set()
+
+    async def load(self, ns_key: str) -> V:
+        future: Optional[asyncio.Future] = self._pending.get(ns_key)
+        if future is None:
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+            future = self._pending[ns_key] = loop.create_future()
+            if len(self._pending) >= self._max_batch:
+                self._dispatch()
+            elif self._scheduled is None:
+                self._scheduled = loop.call_soon(self._dispatch) if not self._window \
+                    else loop.call_later(self._window, self._dispatch)
+        # a cancelled caller must not cancel the read of the others waiting on the same key
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        if self._scheduled is not None:
+            self._scheduled.cancel()
+            self._scheduled = None
+        batch: Dict[str, asyncio.Future] = self._pending
+        self._pending = {}
+        task: asyncio.Task = asyncio.get_running_loop().create_task(self._resolve(batch))
+        # the loop only keeps weak references to its tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _resolve(self, batch: Dict[str, asyncio.Future]) -> None:
+        try:
+            values: List[Any] = await self._fetch(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return None
+        for future, value in zip(batch.values(), values):
+            if not future.done():
+                future.set_result(value)
+
+
+def get_batcher(config: BatchingConfig, fetch: BatchFetch) -> Optional[GetBatcher]:
+    """ config is True for the defaults or a dict with 'max_batch' and 'window_us' """
+    if not config:
+        return None
+    options: Dict[str, Any] = {} if config is True else dict(config)
+    try:
+        return GetBatcher(fetch, **options)
+    except TypeError as exc:
+        raise ConfigurationError(f"Wrong options for the batching: {exc}")
@@ -1,46 +1,109 @@
-import asyncio
-import inspect
-from types import FrameType
-from typing import Any, Union, Callable, cast
+import threading
+from typing import Dict, Optional, Union
 
-from cache.test_memorycache import AsyncMemoryCache, SyncMemoryCache
-from cache.test_rediscache import SyncRedisCache, AsyncRedisCache
-from cache.test_cache import TestCache, Backend
+from cache.fwk_cache import FwkCache, Backend
+from cache.fwk_diskcache import AsyncDiskCache, SyncDiskCache
+from cache.fwk_memorycache import AsyncMemoryCache, SyncMemoryCache
+from cache.fwk_rediscache import SyncRedisCache, AsyncRedisCache
+from cache.fwk_sharedcache import AsyncSharedCache, SyncSharedCache
+from cache.fwk_tieredcache import AsyncTieredCache, SyncTieredCache
+from cache.handles import AsyncHandle, SyncHandle
 
-TestCacheInstance = Union[AsyncMemoryCache, AsyncRedisCache, SyncMemoryCache, SyncRedisCache]
+AsyncFwkCacheInstance = Union[AsyncMemoryCache, AsyncRedisCache, AsyncTieredCache, AsyncSharedCache,
+                              AsyncDiskCache]
+SyncFwkCacheInstance = Union[SyncMemoryCache, SyncRedisCache, SyncTieredCache, SyncSharedCache,
+                             SyncDiskCache]
+FwkCacheInstance = Union[AsyncFwkCacheInstance, SyncFwkCacheInstance]
 
 
-class TestCacheCreate:
+def build_async(alias: str) -> AsyncFwkCacheInstance:
+    """ new async client of the alias, outside the registry """
+    backend_type: str = FwkCache.get_backend_type(alias)
+    if backend_type == Backend.REDIS:
+        return AsyncRedisCache(alias)
+    elif backend_type == Backend.MEMORY:
+        return AsyncMemoryCache(alias)
+    elif backend_type == Backend.TIERED:
+        return AsyncTieredCache(alias)
+    elif backend_type == Backend.SHARED:
+        return AsyncSharedCache(alias)
+    elif backend_type == Backend.DISK:
+        return AsyncDiskCache(alias)
+    raise NotImplementedError(f"The backend type {backend_type} is not implemented")
+
+
+def build_sync(alias: str) -> SyncFwkCacheInstance:
+    """ new sync client of the alias, outside the registry """
+    backend_type: str = FwkCache.get_backend_type(alias)
+    if backend_type == Backend.REDIS:
+        return SyncRedisCache(alias)
+    elif backend_type == Backend.MEMORY:
+        return SyncMemoryCache(alias)
+    elif backend_type == Backend.TIERED:
+        return SyncTieredCache(alias)
+    elif backend_type == Backend.SHARED:
+        return SyncSharedCache(alias)
+    elif backend_type == Backend.DISK:
+        return SyncDiskCache(alias)
+    raise NotImplementedError(f"The backend type {backend_type} is not implemented")
+
+
+class FwkCacheCreate:
+    """ Registry of the clients of every alias, they are built once and never closed by the callers.
+        The async clients are kept per event loop, create_async has to run inside the loop.
+    """
+    _async_handles: Dict[str, AsyncHandle[AsyncFwkCacheInstance]] = {}
+    _sync_handles: Dict[str, SyncHandle[SyncFwkCacheInstance]] = {}
+    _lock: threading.Lock = threading.Lock()
+
     def __init__(self):
         raise TypeError("This class is not instantiable use create method for the object creation")
 
     @staticmethod
-    def create(alias: str) -> TestCacheInstance:
-        backend_type: str = TestCache.get_backend_type(alias)
+    def create_async(alias: str) -> AsyncFwkCacheInstance:
+        try:
+            handle: AsyncHandle[AsyncFwkCacheInstance] = FwkCacheCreate._async_handles[alias]
+        except KeyError:
+            with FwkCacheCreate._lock:
+                handle = FwkCacheCreate._async_handles.setdefault(alias,
+                                                                  AsyncHandle(lambda: build_async(alias)))
+        return handle.get()
+
+    @staticmethod
+    def create_sync(alias: str) -> SyncFwkCacheInstance:
         try:
-            current_frame: FrameType = cast(FrameType, inspect.currentframe())
-            function_name: str = cast(FrameType, current_frame.f_back).f_code.co_name
-            function_: Callable[[..., Any], Any] = current_frame.f_back.f_globals[function_name]
-            if asyncio.iscoroutinefunction(function_):
-                if backend_type == Backend.REDIS:
-                    return AsyncRedisCache(alias)
-                elif backend_type == Backend.MEMORY:
-                    return AsyncMemoryCache(alias)
-                else:
-                    raise NotImplementedError(f"The backend type {backend_type} is not implemented")
-            else:
-                if backend_type == Backend.REDIS:
-                    return SyncRedisCache(alias)
-                elif backend_type == Backend.MEMORY:
-                    return SyncMemoryCache(alias)
-                else:
-                    raise NotImplementedError(f"The backend type {backend_type} is not implemented")
-
-        except (RuntimeError, TypeError, KeyError):
-            if backend_type == Backend.REDIS:
-                return SyncRedisCache(alias)
-            elif backend_type == Backend.MEMORY:
-                return SyncMemoryCache(alias)
-            else:
-                raise NotImplementedError(f"The backend type {backend_type} is not implemented")
+            handle: SyncHandle[SyncFwkCacheInstance] = FwkCacheCreate._sync_handles[alias]
+        except KeyError:
+            with FwkCacheCreate._lock:
+                handle = FwkCacheCreate._sync_handles.setdefault(alias,
+                                                                 SyncHandle(lambda: build_sync(alias)))
+        return handle.get()
+
+    @staticmethod
+    def create(alias: str, asynchronous: bool = False) -> FwkCacheInstance:
+        if asynchronous is True:
+            return FwkCacheCreate.create_async(alias)
+        return FwkCacheCreate.create_sync(alias)
+
+    @staticmethod
+    def reset() -> None:
+        """ forgets the registered clients, the next calls build them with the current config """
+        with FwkCacheCreate._lock:
+            FwkCacheCreate._async_handles.clear()
+            FwkCacheCreate._sync_handles.clear()
+
+    @staticmethod
+    def forget(alias: Optional[str] = None) -> None:
+        """ forgets the clients of the alias, of every alias without it """
+        if alias is None:
+            return FwkCacheCreate.reset()
+        with FwkCacheCreate._lock:
+            FwkCacheCreate._async_handles.pop(alias, None)
+            FwkCacheCreate._sync_handles.pop(alias, None)
+
+
+# former name of the registry, kept for the code that still imports it
+TestCacheCreate = FwkCacheCreate
 
+# the hooks are attached when a client is built, a change needs new clients
+FwkCache.add_hook_listener(FwkCacheCreate.forget)
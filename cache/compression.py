@@ -0,0 +1,124 @@
+import bz2
+import lzma
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union, Final
+
+from cache.exceptions import ConfigurationError
+
+Buffer = Union[bytes, bytearray, memoryview]
+CompressionConfig = Union[None, str, Dict[str, Any]]
+
+# tags of compressed values, they never collide with the serializer tags nor the pickle opcode
+ZLIB_TAG: Final[int] = 0x10
+LZMA_TAG: Final[int] = 0x11
+BZ2_TAG: Final[int] = 0x12
+DEFAULT_MIN_SIZE: Final[int] = 1_024
+
+_CODECS: Final[Dict[str, Tuple[int, Callable[[bytes, int], bytes], int]]] = {
+    "zlib": (ZLIB_TAG, lambda data, level: zlib.compress(data, level), 6),
+    "lzma": (LZMA_TAG, lambda data, level: lzma.compress(data, preset=level), 6),
+    "bz2": (BZ2_TAG, lambda data, level: bz2.compress(data, level), 9),
+}
+_DECOMPRESSORS: Final[Dict[int, Callable[[Buffer], bytes]]] = {
+    ZLIB_TAG: zlib.decompress,
+    LZMA_TAG: lzma.decompress,
+    BZ2_TAG: bz2.decompress,
+}
+
+
+class CompressionStats:
+    """ Per alias counters, the cpu time is measured with the thread clock """
+
+    __slots__ = ("raw_bytes", "stored_bytes", "compressed", "skipped", "compress_seconds",
+                 "decompressed", "decompress_seconds")
+
+    def __init__(self) -> None:
+        self.raw_bytes: int = 0
+        self.stored_bytes: int = 0
+        self.compressed: int = 0
+        self.skipped: int = 0
+        self.compress_seconds: float = 0.0
+        self.decompressed: int = 0
+        self.decompress_seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        """ raw size / stored size of every value that went through the compressor """
+        if not self.stored_bytes:
+            return 1.0
+        return self.raw_bytes / self.stored_bytes
+
+    def as_dict(self) -> Dict[str, Any]:
+        values: Dict[str, Any] = {name: getattr(self, name) for name in self.__slots__}
+        values["ratio"] = self.ratio
+        return values
+
+
+_stats: Dict[str, CompressionStats] = {}
+
+
+def get_compression_stats(alias: str) -> CompressionStats:
+    try:
+        return _stats[alias]
+    except KeyError:
+        return _stats.setdefault(alias, CompressionStats())
+
+
+class Compressor:
+
+    def __init__(self, codec: str = "zlib", level: Optional[int] = None,
+                 min_size: int = DEFAULT_MIN_SIZE,
+                 stats: Optional[CompressionStats] = None) -> None:
+        try:
+            self._tag, self._compress, default_level = _CODECS[codec]
+        except KeyError:
+            raise ConfigurationError(f"The compression codec {codec} is not implemented, "
+                                     f"use one of {list(_CODECS)}")
+        self.codec: str = codec
+        self.level: int = default_level if level is None else level
+        self.min_size: int = min_size
+        self.stats: CompressionStats = stats or CompressionStats()
+
+    def compress(self, data: bytes) -> bytes:
+        stats: CompressionStats = self.stats
+        stats.raw_bytes += len(data)
+        if len(data) < self.min_size:
+            stats.skipped += 1
+            stats.stored_bytes += len(data)
+            return data
+        start: float = time.thread_time()
+        compressed: bytes = bytes((self._tag,)) + self._compress(data, self.level)
+        stats.compress_seconds += time.thread_time() - start
+        # incompressible payloads are kept raw, they would only cost cpu on every read
+        if len(compressed) >= len(data):
+            stats.skipped += 1
+            stats.stored_bytes += len(data)
+            return data
+        stats.compressed += 1
+        stats.stored_bytes += len(compressed)
+        return compressed
+
+
+def get_compressor(config: CompressionConfig, alias: str) -> Optional[Compressor]:
+    """ config is a codec name or a dict with 'codec', 'level' and 'min_size' """
+    if not config:
+        return None
+    options: Dict[str, Any] = {"codec": config} if isinstance(config, str) else dict(config)
+    try:
+        return Compressor(stats=get_compression_stats(alias), **options)
+    except TypeError as exc:
+        raise ConfigurationError(f"Wrong compression options for the alias {alias}: {exc}")
+
+
+def decompress(data: Buffer, stats: Optional[CompressionStats] = None) -> Buffer:
+    """ Values without a compression tag are returned untouched """
+    decompressor: Optional[Callable[[Buffer], bytes]] = _DECOMPRESSORS.get(data[0])
+    if decompressor is None:
+        return data
+    start: float = time.thread_time()
+    raw: bytes = decompressor(memoryview(data)[1:])
+    if stats is not None:
+        stats.decompressed += 1
+        stats.decompress_seconds += time.thread_time() - start
+    return raw
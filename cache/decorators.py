@@ -1,63 +1,145 @@
 import asyncio
-import inspect
+import logging
+import time
 from functools import wraps
-from types import FrameType
-from typing import Any, Mapping, Tuple, Union, Callable, cast
+from typing import Any, Callable, Iterable, Mapping, Optional, Tuple
 
-from cache.test_memorycache import AsyncMemoryCache, SyncMemoryCache
-from cache.test_rediscache import SyncRedisCache, AsyncRedisCache
-from cache.test_cache import SerializableData, TestCache, Backend
+from cache.cache_creator import AsyncFwkCacheInstance, FwkCacheCreate, SyncFwkCacheInstance
+from cache.fwk_cache import SerializableData, FwkCache, Backend, Strategy
+from cache.handles import SyncHandle
+from cache.keys import KeyBuilder
+from cache.refresh import (CachedEntry, DEFAULT_BETA, COMPUTE, REVALIDATE, async_compute_entry,
+                           check_stale_ttl, entry_ttl, entry_state, negative_entry, revalidate_async,
+                           revalidate_sync, storage_ttl, sync_compute_entry)
+from cache.singleflight import AsyncSingleFlight, SyncSingleFlight
 
-AsyncTestCacheInstance = Union[AsyncMemoryCache, AsyncRedisCache]
-SyncTestCacheInstance = Union[SyncMemoryCache, SyncRedisCache]
+KeyFunction = Callable[[Tuple[Any, ...], Mapping[str, Any]], str]
 
+_logger: logging.Logger = logging.getLogger(__name__)
 
-def _key_from_args(func, args: Tuple[Any, ...], kwargs: Mapping[Any, Any]) -> str:
-    ordered_kwargs: Any = sorted(kwargs.items())
-    return str(func.__module__ or '') + func.__name__ + str(args) + str(ordered_kwargs)
+# default of the backend reads, stored None, 0, False or [] results are hits
+_MISS: Any = object()
 
 
-def cached(alias: str) -> Any:
+def _plain_value(stored: Any) -> Any:
+    # without entries only the negative results are stored as CachedEntry, the memory
+    # backends ignore the per key ttl so their expiry is checked here
+    if isinstance(stored, CachedEntry):
+        if stored.expiry is not None and time.time() >= stored.expiry:
+            return _MISS
+        return stored.value
+    return stored
+
+
+def _key_function(alias: str, key_builder: KeyBuilder, stale_ttl: Optional[int]) -> KeyFunction:
+    # remote keys are digests, their length does not depend on the arguments
+    if FwkCache.get_backend_type(alias) == Backend.MEMORY:
+        check_stale_ttl(alias, FwkCache.get_alias_config(alias).get("strategy", Strategy.TTL), stale_ttl)
+        return key_builder.key
+    return key_builder.hashed_key
+
+
+def cached(alias: str, early_refresh: bool = False, beta: float = DEFAULT_BETA,
+           stale_ttl: Optional[int] = None, negative_ttl: Optional[int] = None,
+           key_include: Optional[Iterable[str]] = None,
+           key_exclude: Optional[Iterable[str]] = None) -> Any:
+    """ early_refresh stores the compute duration and expiry next to the value and recomputes
+        it before the deadline following XFetch, beta > 1 favours earlier refreshes.
+        stale_ttl keeps serving an expired value for that many seconds while one background
+        task or thread recomputes it. The TTL and TLRU memory regions drop the entries at the ttl
+        of the alias, their aliases raise ConfigurationError on the first call.
+        negative_ttl caches the None results for that many seconds instead of the ttl of the alias.
+        key_include and key_exclude select the parameters that take part in the key, for example
+        key_exclude=['request'].
+    """
+    with_entries: bool = early_refresh or bool(stale_ttl)
 
     def manage_params(func: Any) -> Any:
+        # concurrent misses of the same key share a single call to the decorated function
+        async_flight: AsyncSingleFlight = AsyncSingleFlight()
+        sync_flight: SyncSingleFlight = SyncSingleFlight()
+        key_builder: KeyBuilder = KeyBuilder(func, key_include, key_exclude)
+
+        # the backend is resolved on the first call, the alias may be loaded after the decoration
+        key_function: SyncHandle[KeyFunction] = SyncHandle(
+            lambda: _key_function(alias, key_builder, stale_ttl))
+
+        def entry_storage(entry: CachedEntry, ttl: Optional[int]) -> Tuple[CachedEntry, Optional[int]]:
+            if negative_ttl and entry.value is None:
+                return (negative_entry(negative_ttl, entry.delta),
+                        storage_ttl(negative_ttl, stale_ttl) or negative_ttl)
+            return entry, storage_ttl(ttl, stale_ttl)
+
+        async def async_refresh(fwk_cache: AsyncFwkCacheInstance, key: str, args: Tuple[Any, ...],
+                                kwargs: Mapping[str, Any]) -> CachedEntry:
+            ttl: Optional[int] = entry_ttl(fwk_cache)
+            entry: CachedEntry = await async_compute_entry(func, args, kwargs, ttl)
+            entry, ttl = entry_storage(entry, ttl)
+            _: bool = await fwk_cache.put(key, entry, ttl)
+            return entry
+
+        def sync_refresh(fwk_cache: SyncFwkCacheInstance, key: str, args: Tuple[Any, ...],
+                         kwargs: Mapping[str, Any]) -> CachedEntry:
+            ttl: Optional[int] = entry_ttl(fwk_cache)
+            entry: CachedEntry = sync_compute_entry(func, args, kwargs, ttl)
+            entry, ttl = entry_storage(entry, ttl)
+            _: bool = fwk_cache.put(key, entry, ttl)
+            return entry
+
         @wraps(func)
         async def handled_async_func(*args, **kwargs) -> Any:
-            backend_type: str = TestCache.get_backend_type(alias)
-            if backend_type == Backend.REDIS:
-                fwk_cache: AsyncRedisCache = AsyncRedisCache(alias)
-            elif backend_type == Backend.MEMORY:
-                fwk_cache: AsyncMemoryCache = AsyncMemoryCache(alias)
-            else:
-                raise NotImplementedError(f"The backend type {backend_type} is not implemented")
-            key = _key_from_args(func, args, kwargs)
-            value: SerializableData = await fwk_cache.get(key)
-            if not value:
-                value: SerializableData = await func(*args, **kwargs)
-                _: bool = await fwk_cache.put(key, value)
-                print(f"Async decorator {backend_type} valor NO cacheado", value)
-            else:
-                print(f"Async decorator {backend_type} valor cacheado", value)
-            _: await fwk_cache.close()
+            fwk_cache: AsyncFwkCacheInstance = FwkCacheCreate.create_async(alias)
+            key: str = key_function.get()(args, kwargs)
+            value: SerializableData = await fwk_cache.get(key, _MISS)
+            if with_entries:
+                state: int = entry_state(value, beta, early_refresh, stale_ttl, key in async_flight)
+                if state == COMPUTE:
+                    value = await async_flight.run(key, lambda: async_refresh(fwk_cache, key, args,
+                                                                              kwargs))
+                    _logger.debug("Async decorator %s computed %s", alias, key)
+                elif state == REVALIDATE:
+                    revalidate_async(async_flight.run(key, lambda: async_refresh(fwk_cache, key, args,
+                                                                                 kwargs)))
+                return value.value
+            value = _plain_value(value)
+            if value is _MISS:
+                async def compute() -> SerializableData:
+                    result: SerializableData = await func(*args, **kwargs)
+                    if negative_ttl and result is None:
+                        _: bool = await fwk_cache.put(key, negative_entry(negative_ttl), negative_ttl)
+                    else:
+                        _: bool = await fwk_cache.put(key, result)
+                    return result
+
+                value: SerializableData = await async_flight.run(key, compute)
+                _logger.debug("Async decorator %s computed %s", alias, key)
             return value
 
         @wraps(func)
         def handled_sync_func(*args, **kwargs) -> Any:
-            backend_type: str = TestCache.get_backend_type(alias)
-            if backend_type == Backend.REDIS:
-                fwk_cache: SyncRedisCache = SyncRedisCache(alias)
-            elif backend_type == Backend.MEMORY:
-                fwk_cache: SyncMemoryCache = SyncMemoryCache(alias)
-            else:
-                raise NotImplementedError(f"The backend type {backend_type} is not implemented")
-            key = _key_from_args(func, args, kwargs)
-            value: SerializableData = fwk_cache.get(key)
-            if not value:
-                value: SerializableData = func(*args, **kwargs)
-                _: bool = fwk_cache.put(key, value)
-                print(f"Sync decorator {backend_type} valor NO cacheado", value)
-            else:
-                print(f"Sync decorator {backend_type} valor cacheado", value)
-            _: fwk_cache.close()
+            fwk_cache: SyncFwkCacheInstance = FwkCacheCreate.create_sync(alias)
+            key: str = key_function.get()(args, kwargs)
+            value: SerializableData = fwk_cache.get(key, _MISS)
+            if with_entries:
+                state: int = entry_state(value, beta, early_refresh, stale_ttl, key in sync_flight)
+                if state == COMPUTE:
+                    value = sync_flight.run(key, lambda: sync_refresh(fwk_cache, key, args, kwargs))
+                    _logger.debug("Sync decorator %s computed %s", alias, key)
+                elif state == REVALIDATE:
+                    revalidate_sync(sync_flight, key, lambda: sync_refresh(fwk_cache, key, args, kwargs))
+                return value.value
+            value = _plain_value(value)
+            if value is _MISS:
+                def compute() -> SerializableData:
+                    result: SerializableData = func(*args, **kwargs)
+                    if negative_ttl and result is None:
+                        _: bool = fwk_cache.put(key, negative_entry(negative_ttl), negative_ttl)
+                    else:
+                        _: bool = fwk_cache.put(key, result)
+                    return result
+
+                value: SerializableData = sync_flight.run(key, compute)
+                _logger.debug("Sync decorator %s computed %s", alias, key)
             return value
 
         if asyncio.iscoroutinefunction(func):
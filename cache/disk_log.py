@@ -0,0 +1,299 @@
+import fcntl
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Final, Iterator, List, NamedTuple, Optional
+
+from cache.exceptions import ConfigurationError
+
+DEFAULT_SEGMENT_SIZE: Final[int] = 64 * 1024 * 1024
+DEFAULT_COMPACTION_RATIO: Final[float] = 0.5
+_SEGMENT_NAME: Final[re.Pattern] = re.compile(r"^segment-(\d{8})\.log$")
+# crc32 of the rest of the record, kind, key length, value length, expiry (0 without ttl)
+_RECORD: Final[struct.Struct] = struct.Struct("<IBHId")
+_PUT: Final[int] = 1
+_DELETE: Final[int] = 2
+MAX_KEY_LENGTH: Final[int] = 0xFFFF
+
+
+class Location(NamedTuple):
+    """ Where the value of a key is, offset is the first byte of the value in the segment """
+    segment: int
+    offset: int
+    length: int
+    expiry: float
+
+
+class Record(NamedTuple):
+    kind: int
+    key: bytes
+    offset: int
+    length: int
+    expiry: float
+    end: int
+
+
+def _records(data: memoryview) -> Iterator[Record]:
+    """ Records of a segment, it stops at the first torn or corrupt one """
+    position: int = 0
+    while position + _RECORD.size <= len(data):
+        crc, kind, key_length, value_length, expiry = _RECORD.unpack_from(data, position)
+        end: int = position + _RECORD.size + key_length + value_length
+        if kind not in (_PUT, _DELETE) or end > len(data):
+            return
+        if zlib.crc32(data[position + 4:end]) != crc:
+            return
+        key_start: int = position + _RECORD.size
+        yield Record(kind, bytes(data[key_start:key_start + key_length]), key_start + key_length,
+                     value_length, expiry, end)
+        position = end
+
+
+def _record_size(key: bytes, length: int) -> int:
+    return _RECORD.size + len(key) + length
+
+
+class DiskLog:
+    """ Append only log of segment files with the index of the live keys in memory. Puts and deletes
+        are appended to the active segment, which is sealed once it reaches segment_size. Reads map
+        the segment and return a view of the value without copying it. The index is rebuilt on open
+        by replaying the segments in order, a torn record at the tail of a segment is cut away.
+        Compaction rewrites the live records of the sealed segments that are mostly garbage into the
+        active segment and then removes them. A directory belongs to one process at a time.
+    """
+
+    def __init__(self, path: str, segment_size: int = DEFAULT_SEGMENT_SIZE, sync: bool = False) -> None:
+        if segment_size <= _RECORD.size:
+            raise ConfigurationError(f"The segment size must be over {_RECORD.size} bytes")
+        os.makedirs(path, exist_ok=True)
+        self._path: str = path
+        self._segment_size: int = segment_size
+        self._sync: bool = sync
+        self._lock_fd: int = os.open(os.path.join(path, "LOCK"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._lock_fd)
+            raise ConfigurationError(f"The disk cache {path} is open in another process, "
+                                     f"every worker needs its own path")
+        self._lock: threading.RLock = threading.RLock()
+        self._index: Dict[bytes, Location] = {}
+        # bytes of every segment and bytes of the records still in the index
+        self._sizes: Dict[int, int] = {}
+        self._live: Dict[int, int] = {}
+        # replaced maps are dropped, not closed, a reader may still hold a view of them
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._stop: threading.Event = threading.Event()
+        self._compactor: Optional[threading.Thread] = None
+        self._rebuild()
+        self._active: int = max(self._sizes, default=0)
+        self._active_fd: int = self._open_segment(self._active)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self._path, f"segment-{segment:08d}.log")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(match.group(1)) for match in map(_SEGMENT_NAME.match, os.listdir(self._path))
+                      if match)
+
+    def _open_segment(self, segment: int) -> int:
+        fd: int = os.open(self._segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._sizes.setdefault(segment, 0)
+        self._live.setdefault(segment, 0)
+        return fd
+
+    def _rebuild(self) -> None:
+        for segment in self._segments():
+            self._sizes[segment] = 0
+            self._live[segment] = 0
+            size: int = os.path.getsize(self._segment_path(segment))
+            if not size:
+                continue
+            valid: int = 0
+            segment_map: Optional[mmap.mmap] = self._map(segment, size)
+            with memoryview(segment_map) as data:
+                for record in _records(data):
+                    self._apply(record, segment)
+                    valid = record.end
+            if valid < size:
+                # the process died in the middle of an append
+                self._maps.pop(segment, None)
+                os.truncate(self._segment_path(segment), valid)
+            self._sizes[segment] = valid
+
+    def _apply(self, record: Record, segment: int) -> None:
+        if record.kind == _PUT and not (record.expiry and record.expiry <= time.time()):
+            self._set(record.key, Location(segment, record.offset, record.length, record.expiry))
+        else:
+            self._unset(record.key)
+
+    def _set(self, key: bytes, location: Location) -> None:
+        self._unset(key)
+        self._index[key] = location
+        self._live[location.segment] += _record_size(key, location.length)
+
+    def _unset(self, key: bytes) -> Optional[Location]:
+        location: Optional[Location] = self._index.pop(key, None)
+        if location is not None:
+            self._live[location.segment] -= _record_size(key, location.length)
+        return location
+
+    def _map(self, segment: int, end: int) -> Optional[mmap.mmap]:
+        """ map of the segment covering end, None when compaction removed the segment """
+        segment_map: Optional[mmap.mmap] = self._maps.get(segment)
+        if segment_map is not None and len(segment_map) >= end:
+            return segment_map
+        # compaction removes the segment and its map under the lock, a late reader must not put it back
+        with self._lock:
+            segment_map = self._maps.get(segment)
+            if segment_map is not None and len(segment_map) >= end:
+                return segment_map
+            if segment not in self._sizes:
+                return None
+            try:
+                with open(self._segment_path(segment), "rb") as segment_file:
+                    segment_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None
+            self._maps[segment] = segment_map
+        return segment_map
+
+    def _append(self, kind: int, key: bytes, value: bytes, expiry: float) -> Location:
+        body: bytes = _RECORD.pack(0, kind, len(key), len(value), expiry)[4:] + key + value
+        record: bytes = struct.pack("<I", zlib.crc32(body)) + body
+        if self._sizes[self._active] and self._sizes[self._active] + len(record) > self._segment_size:
+            self._roll()
+        written: int = 0
+        while written < len(record):
+            written += os.write(self._active_fd, record[written:])
+        if self._sync:
+            os.fsync(self._active_fd)
+        offset: int = self._sizes[self._active] + _RECORD.size + len(key)
+        self._sizes[self._active] += len(record)
+        return Location(self._active, offset, len(value), expiry)
+
+    def _roll(self) -> None:
+        os.fsync(self._active_fd)
+        os.close(self._active_fd)
+        self._active += 1
+        self._active_fd = self._open_segment(self._active)
+
+    def get(self, key: bytes) -> Optional[memoryview]:
+        """ view of the stored value, None when the key is missing or expired """
+        while True:
+            location: Optional[Location] = self._index.get(key)
+            if location is None:
+                return None
+            if location.expiry and location.expiry <= time.time():
+                with self._lock:
+                    if self._index.get(key) is location:
+                        self._unset(key)
+                return None
+            end: int = location.offset + location.length
+            segment_map: Optional[mmap.mmap] = self._map(location.segment, end)
+            if segment_map is not None:
+                return memoryview(segment_map)[location.offset:end]
+            if self._index.get(key) is location:
+                return None
+            # the segment was compacted after the lookup, the index points to the new copy
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        if len(key) > MAX_KEY_LENGTH:
+            return False
+        with self._lock:
+            self._set(key, self._append(_PUT, key, value, time.time() + ttl if ttl else 0.0))
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        with self._lock:
+            location: Optional[Location] = self._unset(key)
+            if location is None:
+                return False
+            _: Location = self._append(_DELETE, key, b"", 0.0)
+        return not (location.expiry and location.expiry <= time.time())
+
+    def clear(self, prefix: bytes = b"") -> int:
+        removed: int = 0
+        with self._lock:
+            for key in [key for key in self._index if key.startswith(prefix)]:
+                removed += self.delete(key)
+        return removed
+
+    def count(self, prefix: bytes = b"") -> int:
+        now: float = time.time()
+        return sum(1 for key, location in list(self._index.items())
+                   if key.startswith(prefix) and not (location.expiry and location.expiry <= now))
+
+    def garbage_ratio(self) -> float:
+        """ share of the bytes on disk that compaction would reclaim """
+        total: int = sum(self._sizes.values())
+        return 1 - sum(self._live.values()) / total if total else 0.0
+
+    def compact(self, ratio: float = DEFAULT_COMPACTION_RATIO) -> int:
+        """ rewrites the sealed segments whose live bytes are under ratio, returns how many """
+        compacted: int = 0
+        for segment in sorted(self._sizes):
+            with self._lock:
+                if segment == self._active or segment not in self._sizes:
+                    continue
+                if self._sizes[segment] and self._live[segment] / self._sizes[segment] >= ratio:
+                    continue
+                self._compact_segment(segment)
+            compacted += 1
+        return compacted
+
+    def _compact_segment(self, segment: int) -> None:
+        oldest: bool = segment == min(self._sizes)
+        segment_map: Optional[mmap.mmap] = self._map(segment, self._sizes[segment])
+        if segment_map is not None:
+            now: float = time.time()
+            with memoryview(segment_map) as data:
+                for record in _records(data[:self._sizes[segment]]):
+                    if record.kind == _PUT:
+                        location: Optional[Location] = self._index.get(record.key)
+                        if location is None or (location.expiry and location.expiry <= now) or \
+                                (location.segment, location.offset) != (segment, record.offset):
+                            continue
+                        value: bytes = bytes(data[record.offset:record.offset + record.length])
+                        self._set(record.key, self._append(_PUT, record.key, value, record.expiry))
+                    elif not oldest and record.key not in self._index:
+                        # an older segment may still hold a put of the key, the delete has to stay
+                        _: Location = self._append(_DELETE, record.key, b"", 0.0)
+            # the copies are durable before the segment disappears
+            os.fsync(self._active_fd)
+        del self._sizes[segment]
+        del self._live[segment]
+        self._maps.pop(segment, None)
+        os.unlink(self._segment_path(segment))
+
+    def start_compaction(self, interval: float, ratio: float = DEFAULT_COMPACTION_RATIO) -> None:
+        """ compacts every interval seconds in a daemon thread """
+        if self._compactor is not None:
+            return None
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                self.compact(ratio)
+
+        self._compactor = threading.Thread(target=run, name=f"fwkcache-compaction-{self._path}",
+                                           daemon=True)
+        self._compactor.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            os.fsync(self._active_fd)
+            os.close(self._active_fd)
+            self._maps.clear()
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
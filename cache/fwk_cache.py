@@ -1,16 +1,32 @@
 from abc import ABC, abstractmethod
 from collections.abc import Mapping
-from typing import Union, Dict, Any, Optional, Final, List
+from typing import Union, Dict, Any, Optional, Final, List, Iterable, Mapping as MappingType, NamedTuple, \
+    Callable
 from cache.exceptions import ConfigurationError
+from cache.hooks import CacheHook, attach_hooks
+from cache.keys import NAMESPACE_SEPARATOR, namespace_prefix, namespaced_key
+from cache.metrics import get_metrics, measure
 
-MEMORY_PARAMS: Final[List[str]] = ["backend", "strategy", "max_size", "ttl", "namespace", "getsizeof"]
+MEMORY_PARAMS: Final[List[str]] = ["backend", "strategy", "max_size", "ttl", "namespace", "getsizeof",
+                                   "shards", "max_bytes", "sizer", "metrics"]
 REDIS_PARAMS: Final[List[str]] = ["backend", "ttl", "namespace", "host", "username", "password", "port", "timeout",
-                                  "db", "max_connections"]
+                                  "db", "max_connections", "serializer", "compression", "nodes", "vnodes",
+                                  "replicas", "read_strategy", "read_your_writes", "batching",
+                                  "client_tracking", "metrics"]
+TIERED_PARAMS: Final[List[str]] = ["backend", "local", "remote", "channel"]
+SHARED_PARAMS: Final[List[str]] = ["backend", "ttl", "namespace", "slots", "slot_size", "name", "serializer",
+                                   "compression", "metrics"]
+DISK_PARAMS: Final[List[str]] = ["backend", "ttl", "namespace", "path", "segment_size", "sync",
+                                 "compaction_interval", "compaction_ratio", "workers", "serializer",
+                                 "compression", "metrics"]
 
 
 class Backend:
     REDIS: str = "redis"
     MEMORY: str = "memory"
+    TIERED: str = "tiered"
+    SHARED: str = "shared"
+    DISK: str = "disk"
 
     @classmethod
     def __contains__(cls, key):
@@ -24,6 +40,9 @@ class Strategy:
     RR: str = "RR"
     TTL: str = "TTL"
     TLRU: str = "TLRU"
+    TINYLFU: str = "TINYLFU"
+    ARC: str = "ARC"
+    TWO_Q: str = "2Q"
 
 
 SerializableData = Union[None, int, float, complex, bool, str, bytes, bytearray, tuple,
@@ -32,9 +51,19 @@ InmutableKey = Union[str, int, float, bool, tuple]
 CacheConfig = Dict[str, Dict[str, Any]]
 
 
+class CacheResult(NamedTuple):
+    """ Result of a multi-key lookup, the hit flag is independent of the value """
+    hit: bool
+    value: SerializableData
+
+
 class FwkCache(ABC):
 
     _config: CacheConfig = {}
+    # alias -> hooks, None holds the hooks of every alias
+    _hooks: Dict[Optional[str], List[CacheHook]] = {}
+    # called with the alias, or None for every alias, whose hooks changed
+    _hook_listeners: List[Callable[[Optional[str]], None]] = []
 
     def __str__(self) -> str:
         text: str = ""
@@ -84,6 +113,45 @@ class FwkCache(ABC):
             raise ConfigurationError(f"The alias {alias} not exists in the configuration "
                                      f"{FwkCache._config}")
 
+    @staticmethod
+    def add_hook(hook: CacheHook, alias: Optional[str] = None) -> None:
+        """ hook of one alias or, without alias, of all of them. The dispatch of a client is built
+            with its hooks, so the registry of FwkCacheCreate drops the clients of the alias and
+            builds them again on the next create. A client kept by the caller does not call the hook
+        """
+        FwkCache._hooks.setdefault(alias, []).append(hook)
+        FwkCache._hooks_changed(alias)
+
+    @staticmethod
+    def remove_hook(hook: CacheHook, alias: Optional[str] = None) -> None:
+        try:
+            FwkCache._hooks.get(alias, []).remove(hook)
+        except ValueError:
+            raise ConfigurationError(f"The hook {hook!r} is not registered for the alias {alias}")
+        FwkCache._hooks_changed(alias)
+
+    @staticmethod
+    def add_hook_listener(listener: Callable[[Optional[str]], None]) -> None:
+        """ listener of the hook changes, the registry of clients lives in a module that imports this one """
+        FwkCache._hook_listeners.append(listener)
+
+    @staticmethod
+    def _hooks_changed(alias: Optional[str]) -> None:
+        for listener in FwkCache._hook_listeners:
+            listener(alias)
+
+    @staticmethod
+    def get_hooks(alias: str) -> List[CacheHook]:
+        return FwkCache._hooks.get(None, []) + FwkCache._hooks.get(alias, [])
+
+    def _instrument(self, asynchronous: bool) -> None:
+        """ records the metrics of the alias and namespace unless the alias sets 'metrics': False,
+            then wraps the measured operations with the hooks registered so far
+        """
+        if FwkCache._config.get(self._alias, {}).get("metrics", True):
+            measure(self, get_metrics(self._alias, self._namespace, self._backend), asynchronous)
+        attach_hooks(self, FwkCache.get_hooks(self._alias), asynchronous)
+
     @staticmethod
     @abstractmethod
     def _check_validate_backend(alias: str, config: Dict[str, Any]) -> bool:
@@ -99,13 +167,14 @@ class AbstractAsyncFwkCache(ABC):
         pass
 
     @abstractmethod
-    async def put(self, key: InmutableKey, data: SerializableData) -> bool:
-        """ put """
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
+        """ put, ttl overrides the alias ttl where the backend supports per key expiry """
         pass
 
     @abstractmethod
-    async def clear(self) -> bool:
-        """ clear """
+    async def clear(self, namespace: Optional[str] = None) -> bool:
+        """ clear, by default the namespace of the alias """
         pass
 
     @abstractmethod
@@ -118,6 +187,22 @@ class AbstractAsyncFwkCache(ABC):
         """ exists """
         pass
 
+    @abstractmethod
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        """ get_many """
+        pass
+
+    @abstractmethod
+    async def put_many(self, items: MappingType[InmutableKey, SerializableData]) -> bool:
+        """ put_many """
+        pass
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        """ delete_many """
+        pass
+
     @abstractmethod
     async def close(self) -> bool:
         """ close """
@@ -132,13 +217,13 @@ class AbstractSyncFwkCache(ABC):
         pass
 
     @abstractmethod
-    def put(self, key: InmutableKey, data: SerializableData) -> bool:
-        """ put """
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        """ put, ttl overrides the alias ttl where the backend supports per key expiry """
         pass
 
     @abstractmethod
-    def clear(self) -> bool:
-        """ clear """
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        """ clear, by default the namespace of the alias """
         pass
 
     @abstractmethod
@@ -151,6 +236,22 @@ class AbstractSyncFwkCache(ABC):
         """ exists """
         pass
 
+    @abstractmethod
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        """ get_many """
+        pass
+
+    @abstractmethod
+    def put_many(self, items: MappingType[InmutableKey, SerializableData]) -> bool:
+        """ put_many """
+        pass
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        """ delete_many """
+        pass
+
     @abstractmethod
     def close(self) -> bool:
         """ close """
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Final, Iterable, List, Mapping, Optional, TypeVar
+
+from cache.compression import CompressionStats, Compressor, decompress, get_compression_stats, get_compressor
+from cache.disk_log import DEFAULT_COMPACTION_RATIO, DEFAULT_SEGMENT_SIZE, DiskLog
+from cache.exceptions import ConfigurationError, WrongBackendImplementation
+from cache.fwk_cache import (
+    AbstractAsyncFwkCache,
+    AbstractSyncFwkCache,
+    Backend,
+    CacheConfig,
+    CacheResult,
+    FwkCache,
+    InmutableKey,
+    SerializableData,
+    namespaced_key,
+)
+from cache.serializers import Serializer, decode, get_serializer
+
+T = TypeVar("T")
+
+# directories a worker tries when the alias has no path, one per process of the same host
+MAX_WORKER_PATHS: Final[int] = 64
+
+disk_config = {
+    'disk': {
+        'backend': 'disk',
+        'namespace': 'main',
+        'ttl': 3_600,
+        'segment_size': DEFAULT_SEGMENT_SIZE,
+        'compaction_interval': 60
+    }
+}
+
+
+class DiskCommonCache(FwkCache):
+    """ Cache on local disk for large values that are expensive to rebuild, the entries survive
+        restarts. Values are stored serialized in a DiskLog and decoded straight from its map.
+        A directory belongs to one process, without a path every worker claims the first free one
+        of fwkcache-{alias}, fwkcache-{alias}-1, ... in the temp dir, so the workers of a server
+        get their own log and find it again after a restart. A configured path is not shared.
+    """
+    _logs: Dict[str, DiskLog] = {}
+    _executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def __init__(self, alias: str) -> None:
+        self._alias: str = alias
+        self._selected_config: Dict[str, Any] = FwkCache.get_alias_config(alias)
+        self._backend = self._selected_config.get("backend", Backend.DISK)
+        self._ttl: Optional[int] = self._selected_config.get("ttl", None)
+        self._namespace: str = self._selected_config.get("namespace", "")
+        self._path: Optional[str] = self._selected_config.get("path")
+        self._segment_size: int = self._selected_config.get("segment_size", DEFAULT_SEGMENT_SIZE)
+        self._sync: bool = self._selected_config.get("sync", False)
+        self._compaction_interval: Optional[float] = self._selected_config.get("compaction_interval", 60)
+        self._compaction_ratio: float = self._selected_config.get("compaction_ratio",
+                                                                  DEFAULT_COMPACTION_RATIO)
+        self._workers: int = self._selected_config.get("workers", 4)
+        self._serializer: Serializer = get_serializer(self._selected_config.get("serializer"))
+        self._compressor: Optional[Compressor] = get_compressor(self._selected_config.get("compression"),
+                                                                alias)
+        self._compression_stats: CompressionStats = get_compression_stats(alias)
+        self._check_validate_backend(alias, FwkCache._config)
+        self._log: DiskLog = self._set_cache(alias)
+        self._path = self._log.path
+
+    @property
+    def selected_config(self) -> Dict[str, Any]:
+        return self._selected_config
+
+    def _check_validate_backend(self, alias: str, _config: CacheConfig) -> bool:
+        if self._backend != Backend.DISK:
+            raise WrongBackendImplementation(f"Selectd backend '{self._backend}' not work properly "
+                                             f"with the selected implementation "
+                                             f"'{self.__class__.__name__}'")
+        return True
+
+    def _set_cache(self, alias: str) -> DiskLog:
+        try:
+            return DiskCommonCache._logs[alias]
+        except KeyError:
+            log: DiskLog = self._open_log(alias)
+            if self._compaction_interval:
+                log.start_compaction(self._compaction_interval, self._compaction_ratio)
+            DiskCommonCache._logs[alias] = log
+            return log
+
+    def _open_log(self, alias: str) -> DiskLog:
+        if self._path is not None:
+            return DiskLog(self._path, self._segment_size, self._sync)
+        base: str = os.path.join(tempfile.gettempdir(), f"fwkcache-{alias}")
+        error: Optional[ConfigurationError] = None
+        for worker in range(MAX_WORKER_PATHS):
+            try:
+                return DiskLog(f"{base}-{worker}" if worker else base, self._segment_size, self._sync)
+            except ConfigurationError as exc:
+                # the directory is open in another worker
+                error = exc
+        raise ConfigurationError(f"The {MAX_WORKER_PATHS} disk cache paths of '{alias}' are open in "
+                                 f"other processes, configure a path for every worker") from error
+
+    def get_options(self) -> Dict[str, Any]:
+        return {'alias': self._alias,
+                'backend': self._backend,
+                'ttl': self._ttl,
+                'namespace': self._namespace,
+                'path': self._path,
+                'segment_size': self._segment_size,
+                'sync': self._sync,
+                'compaction_interval': self._compaction_interval,
+                'compaction_ratio': self._compaction_ratio,
+                'serializer': self._serializer.NAME,
+                'compression': self._compressor.codec if self._compressor else None
+                }
+
+    def _nskey(self, key: InmutableKey, namespace: Optional[str] = None) -> bytes:
+        return namespaced_key(self._namespace if namespace is None else namespace, key).encode("utf-8")
+
+    def _serialize(self, value: SerializableData) -> bytes:
+        data: bytes = self._serializer.encode(value)
+        if self._compressor is None:
+            return data
+        return self._compressor.compress(data)
+
+    def _search(self, key: InmutableKey, default: Optional[object] = None) -> CacheResult:
+        value: Optional[memoryview] = self._log.get(self._nskey(key))
+        if value is None:
+            return CacheResult(False, default)
+        with value:
+            return CacheResult(True, decode(decompress(value, self._compression_stats)))
+
+    def _search_many(self, keys: Iterable[InmutableKey],
+                     default: Optional[object] = None) -> List[CacheResult]:
+        return [self._search(key, default) for key in keys]
+
+    def _store(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        return self._log.put(self._nskey(key), self._serialize(data), ttl or self._ttl)
+
+    def _store_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        stored: bool = True
+        for key, data in items.items():
+            stored = self._store(key, data) and stored
+        return stored
+
+    def _remove_many(self, keys: Iterable[InmutableKey]) -> int:
+        return sum(self._log.delete(self._nskey(key)) for key in keys)
+
+    def _clear_namespace(self, namespace: Optional[str] = None) -> bool:
+        _: int = self._log.clear(self._nskey("", namespace))
+        return True
+
+    def size(self, namespace: Optional[str] = None) -> int:
+        """ entries of the namespace, by default the one of the alias """
+        return self._log.count(self._nskey("", namespace))
+
+    def compact(self) -> int:
+        """ compacts the log now, returns the segments rewritten """
+        return self._log.compact(self._compaction_ratio)
+
+
+class AsyncDiskCache(DiskCommonCache, AbstractAsyncFwkCache):
+    """ Every operation runs in the thread pool of the alias, the event loop never waits on disk """
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias)
+        self._executor: ThreadPoolExecutor = self._set_executor(alias)
+        self._instrument(True)
+
+    def _set_executor(self, alias: str) -> ThreadPoolExecutor:
+        try:
+            return DiskCommonCache._executors[alias]
+        except KeyError:
+            executor: ThreadPoolExecutor = ThreadPoolExecutor(self._workers,
+                                                              thread_name_prefix=f"fwkcache-{alias}")
+            return DiskCommonCache._executors.setdefault(alias, executor)
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+    async def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return (await self._run(self._search, key, default)).value
+
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
+        return await self._run(self._store, key, data, ttl)
+
+    async def clear(self, namespace: Optional[str] = None) -> bool:
+        return await self._run(self._clear_namespace, namespace)
+
+    async def delete(self, key: InmutableKey) -> int:
+        return await self._run(self._remove_many, [key])
+
+    async def exists(self, key: InmutableKey) -> bool:
+        return (await self._run(self._search, key)).hit
+
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        return await self._run(self._search_many, list(keys), default)
+
+    async def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return await self._run(self._store_many, dict(items))
+
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return await self._run(self._remove_many, list(keys))
+
+    async def close(self) -> bool:
+        # the log and the pool are shared by every client of the alias in the process
+        return True
+
+
+class SyncDiskCache(DiskCommonCache, AbstractSyncFwkCache):
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias)
+        self._instrument(False)
+
+    def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return self._search(key, default).value
+
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        return self._store(key, data, ttl)
+
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        return self._clear_namespace(namespace)
+
+    def delete(self, key: InmutableKey) -> int:
+        return self._remove_many([key])
+
+    def exists(self, key: InmutableKey) -> bool:
+        return self._search(key).hit
+
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        return self._search_many(keys, default)
+
+    def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return self._store_many(items)
+
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return self._remove_many(keys)
+
+    def close(self) -> bool:
+        return True
+
+
+FwkCache.load_cache(disk_config)
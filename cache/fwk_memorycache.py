@@ -1,14 +1,28 @@
+import threading
 from datetime import timedelta, datetime
-from typing import Dict, Any, Optional, List, Union, Iterator, Callable
+from typing import Dict, Any, Optional, List, Union, Iterator, Callable, Iterable, Mapping, Set
 
 from cache.cache_configuration import InmutableKey, SerializableData
 from cachetools import TTLCache, FIFOCache, LFUCache, MRUCache, RRCache, TLRUCache, Cache
 from cache.exceptions import WrongBackendImplementation
-from cache.fwk_cache import AbstractSyncFwkCache, FwkCache, Strategy, Backend, AbstractAsyncFwkCache
+from cache.policies import ARCCache, TinyLFUCache, TwoQCache
+from cache.metrics import count_evictions, get_metrics
+from cache.segmented import SegmentedCache
+from cache.sizing import DEFAULT_SIZER, get_sizer
+from cache.fwk_cache import (AbstractSyncFwkCache, FwkCache, Strategy, Backend, AbstractAsyncFwkCache,
+                             CacheResult, namespace_prefix, namespaced_key)
 
 CacheConfig = Dict[str, Dict[str, Any]]
-MemoryCache = Union[TTLCache, FIFOCache, LFUCache, MRUCache, RRCache, TLRUCache]
+MemoryCache = Union[TTLCache, FIFOCache, LFUCache, MRUCache, RRCache, TLRUCache, TinyLFUCache,
+                    ARCCache, TwoQCache, SegmentedCache]
 MemoryRegions = Dict[str, MemoryCache]
+NamespaceIndex = Dict[str, Set[str]]
+
+_MISSING: Any = object()
+# the index of an alias is pruned of evicted and expired keys once it holds more than
+# INDEX_PRUNE_FACTOR times the entries of the region plus INDEX_PRUNE_SLACK
+INDEX_PRUNE_FACTOR: int = 2
+INDEX_PRUNE_SLACK: int = 64
 
 memory_config = {
     'memory': {
@@ -53,6 +67,11 @@ FwkCache.load_cache(redis_config)
 
 class MemoryCommonCache(FwkCache):
     _caches: MemoryRegions = {}
+    # namespace -> namespaced keys of every alias, cachetools evicts and expires without any
+    # callback so the index may hold dead keys, they are dropped when it is read or pruned
+    _indexes: Dict[str, NamespaceIndex] = {}
+    _indexed: Dict[str, int] = {}
+    _index_locks: Dict[str, threading.Lock] = {}
 
     def __init__(self, alias: str) -> None:
         self._cache: MemoryCache
@@ -65,8 +84,18 @@ class MemoryCommonCache(FwkCache):
         self._ttl = self._selected_config.get("ttl", None)
         self._namespace = self._selected_config.get("namespace", "")
         self._getsizeof = self._selected_config.get("getsizeof")
+        self._shards: int = self._selected_config.get("shards", 1)
+        # with a byte budget the capacity of the region is max_bytes and every value weighs its size
+        self._max_bytes: Optional[int] = self._selected_config.get("max_bytes")
+        self._sizer: str = self._selected_config.get("sizer", DEFAULT_SIZER)
+        if self._max_bytes and self._getsizeof is None:
+            self._getsizeof = get_sizer(self._sizer)
         self._check_validate_backend(alias, FwkCache._config)
         self._cache: MemoryCache = self._set_cache(alias)
+        self._index: NamespaceIndex = MemoryCommonCache._indexes.setdefault(alias, {})
+        MemoryCommonCache._indexed.setdefault(alias, 0)
+        self._index_lock: threading.Lock = MemoryCommonCache._index_locks.setdefault(alias,
+                                                                                     threading.Lock())
 
     @property
     def selected_config(self) -> Dict[str, Any]:
@@ -88,14 +117,14 @@ class MemoryCommonCache(FwkCache):
                 'max_size': self._max_size,
                 'ttl': self._ttl,
                 'namespace': self._namespace,
-                'getsizeof': self._getsizeof
+                'getsizeof': self._getsizeof,
+                'shards': self._shards,
+                'max_bytes': self._max_bytes,
+                'sizer': self._sizer
                 }
 
     def _nskey(self, key: InmutableKey, namespace: Optional[str] = None) -> str:
-        if namespace is not None:
-            return namespace + str(key)
-        else:
-            return self._namespace + str(key)
+        return namespaced_key(self._namespace if namespace is None else namespace, key)
 
     def _check_validate_backend(self, alias: str, _config: CacheConfig) -> bool:
         if self._backend != Backend.MEMORY:
@@ -123,59 +152,190 @@ class MemoryCommonCache(FwkCache):
         self._cache_options = f"{self._strategy}_{self._max_size}_{self._ttl}_{self._getsizeof}"
         try:
             cache = MemoryCommonCache._caches[alias]
-            if not isinstance(cache, Cache):
+            if not isinstance(cache, (Cache, SegmentedCache)):
                 raise KeyError("Is not cachetools instance")
 
         except KeyError:
-            if self._strategy == Strategy.FIFO:
-                cache = FIFOCache(self._max_size, self._getsizeof)
-            elif self._strategy == Strategy.LFU:
-                cache = LFUCache(self._max_size, self._getsizeof)
-            elif self._strategy == Strategy.MRU:
-                cache = MRUCache(self._max_size, self._getsizeof)
-            elif self._strategy == Strategy.RR:
-                cache = RRCache(self._max_size, self._getsizeof)
-            elif self._strategy == Strategy.TTL:
-                cache = TTLCache(self._max_size, self._ttl, getsizeof=self._getsizeof)
-            elif self._strategy == Strategy.TLRU:
-                def my_ttu(key, value, now):
-                    return now + timedelta(seconds=self._ttl)
-                cache = TLRUCache(self._max_size, my_ttu, timer=datetime.now,
-                                  getsizeof=self._getsizeof)
+            capacity: int = self._max_bytes or self._max_size
+            if self._shards > 1:
+                # each segment keeps the strategy, the entries of the alias are split between them
+                segment_size: int = -(-capacity // self._shards)
+                cache = SegmentedCache(self._shards, lambda: self._new_region(segment_size))
             else:
-                raise NotImplementedError(f"Strategy {self._strategy} is not implemented")
+                cache = self._new_region(capacity)
 
         MemoryCommonCache._caches[alias] = cache
         return cache
 
+    def _new_region(self, max_size: int) -> Cache:
+        region: Cache
+        if self._strategy == Strategy.FIFO:
+            region = FIFOCache(max_size, self._getsizeof)
+        elif self._strategy == Strategy.LFU:
+            region = LFUCache(max_size, self._getsizeof)
+        elif self._strategy == Strategy.MRU:
+            region = MRUCache(max_size, self._getsizeof)
+        elif self._strategy == Strategy.RR:
+            region = RRCache(max_size, getsizeof=self._getsizeof)
+        elif self._strategy == Strategy.TTL:
+            region = TTLCache(max_size, self._ttl, getsizeof=self._getsizeof)
+        elif self._strategy == Strategy.TLRU:
+            def my_ttu(key, value, now):
+                return now + timedelta(seconds=self._ttl)
+            region = TLRUCache(max_size, my_ttu, timer=datetime.now, getsizeof=self._getsizeof)
+        elif self._strategy == Strategy.TINYLFU:
+            region = TinyLFUCache(max_size, self._getsizeof)
+        elif self._strategy == Strategy.ARC:
+            # the ttl is only applied when the alias sets one
+            region = ARCCache(max_size, self._getsizeof, self._selected_config.get("ttl"))
+        elif self._strategy == Strategy.TWO_Q:
+            region = TwoQCache(max_size, self._getsizeof, self._selected_config.get("ttl"))
+        else:
+            raise NotImplementedError(f"Strategy {self._strategy} is not implemented")
+        if self._selected_config.get("metrics", True):
+            count_evictions(region, get_metrics(self._alias, self._namespace, self._backend))
+        return region
+
+    def _search_many(self, keys: Iterable[InmutableKey],
+                     default: Optional[object] = None) -> List[CacheResult]:
+        results: List[CacheResult] = []
+        get: Callable[[str, Any], Any] = self._cache.get
+        for key in keys:
+            value: Any = get(self._nskey(key), _MISSING)
+            if value is _MISSING:
+                results.append(CacheResult(False, default))
+            else:
+                results.append(CacheResult(True, value))
+        return results
+
+    def _store(self, ns_key: str, data: SerializableData) -> bool:
+        try:
+            self._cache[ns_key] = data
+        except ValueError:
+            # the value alone is over the capacity of the region, the previous one would be stale
+            self._cache.pop(ns_key, None)
+            self._untrack(ns_key)
+            return False
+        self._track(ns_key)
+        return True
+
+    def _store_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        stored: bool = True
+        for key, data in items.items():
+            stored = self._store(self._nskey(key), data) and stored
+        return stored
+
+    def bytes_used(self) -> Optional[float]:
+        """ bytes held by the region of the alias, None when it has no byte budget """
+        if not self._max_bytes:
+            return None
+        return self._cache.currsize
+
+    @staticmethod
+    def bytes_usage() -> Dict[str, float]:
+        """ bytes held by every region with a byte budget """
+        return {alias: cache.currsize for alias, cache in MemoryCommonCache._caches.items()
+                if FwkCache.get_alias_config(alias).get("max_bytes")}
+
+    def _remove_many(self, keys: Iterable[InmutableKey]) -> int:
+        deleted: int = 0
+        pop: Callable[[str, Any], Any] = self._cache.pop
+        for key in keys:
+            ns_key: str = self._nskey(key)
+            if pop(ns_key, _MISSING) is not _MISSING:
+                deleted += 1
+            self._untrack(ns_key)
+        return deleted
+
+    def _track(self, ns_key: str, namespace: Optional[str] = None) -> None:
+        with self._index_lock:
+            keys: Set[str] = self._namespace_keys(namespace)
+            if ns_key in keys:
+                return
+            keys.add(ns_key)
+            indexed: int = MemoryCommonCache._indexed[self._alias] + 1
+            MemoryCommonCache._indexed[self._alias] = indexed
+        if indexed > INDEX_PRUNE_FACTOR * len(self._cache) + INDEX_PRUNE_SLACK:
+            self._prune_index()
+
+    def _untrack(self, ns_key: str, namespace: Optional[str] = None) -> None:
+        with self._index_lock:
+            keys: Set[str] = self._namespace_keys(namespace)
+            # another thread may have stored the key again after it was removed from the region
+            if ns_key in keys and ns_key not in self._cache:
+                keys.discard(ns_key)
+                MemoryCommonCache._indexed[self._alias] -= 1
+
+    def _namespace_keys(self, namespace: Optional[str] = None) -> Set[str]:
+        namespace = self._namespace if namespace is None else namespace
+        try:
+            return self._index[namespace]
+        except KeyError:
+            return self._index.setdefault(namespace, set())
+
+    def _live_keys(self, namespace: Optional[str] = None) -> List[str]:
+        """ Drops from the namespace the keys evicted or expired by cachetools """
+        cache: MemoryCache = self._cache
+        with self._index_lock:
+            keys: Set[str] = self._namespace_keys(namespace)
+            # 'in' also expires the entries of the ttl regions
+            dead: List[str] = [ns_key for ns_key in keys if ns_key not in cache]
+            if dead:
+                keys.difference_update(dead)
+                MemoryCommonCache._indexed[self._alias] -= len(dead)
+            return list(keys)
+
+    def _prune_index(self) -> None:
+        for namespace in list(self._index):
+            if not self._live_keys(namespace):
+                with self._index_lock:
+                    if namespace in self._index and not self._index[namespace]:
+                        del self._index[namespace]
+
+    def _clear_namespace(self, namespace: Optional[str] = None) -> bool:
+        namespace = self._namespace if namespace is None else namespace
+        with self._index_lock:
+            keys: Set[str] = self._index.pop(namespace, set())
+            MemoryCommonCache._indexed[self._alias] -= len(keys)
+        pop: Callable[[str, Any], Any] = self._cache.pop
+        for ns_key in keys:
+            pop(ns_key, None)
+        return True
+
+    def size(self, namespace: Optional[str] = None) -> int:
+        """ entries of the namespace, by default the one of the alias """
+        return len(self._live_keys(namespace))
+
+    def iter_keys(self, prefix: str = "", namespace: Optional[str] = None) -> Iterator[str]:
+        """ keys of the namespace starting with prefix, without the namespace """
+        namespace = self._namespace if namespace is None else namespace
+        start: int = len(namespace_prefix(namespace))
+        full_prefix: str = namespace_prefix(namespace) + prefix
+        for ns_key in self._live_keys(namespace):
+            if ns_key.startswith(full_prefix):
+                yield ns_key[start:]
+
 
 class AsyncMemoryCache(MemoryCommonCache, AbstractAsyncFwkCache):
 
     def __init__(self, alias: str) -> None:
         super().__init__(alias)
+        self._instrument(True)
 
     async def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
-        value: SerializableData = self._search_key(key)
-        if value is not None:
-            return value
-        return default
+        # stored None, 0 or [] values are hits, only a missing key returns the default
+        value: SerializableData = self._cache.get(self._nskey(key), _MISSING)
+        if value is _MISSING:
+            return default
+        return value
 
-    async def put(self, key: InmutableKey, data: SerializableData) -> bool:
-        ns_key: str = self._nskey(key, self._namespace)
-        self._cache[ns_key] = data
-        return True
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
+        # memory regions expire entries with the policy of the alias, ttl is not per key
+        return self._store(self._nskey(key, self._namespace), data)
 
-    async def clear(self) -> bool:
-        iter_cache: Iterator = iter(self._cache)
-        delete_keys: List[Any] = []
-        while True:
-            try:
-                value: Any = next(iter_cache)
-                delete_keys.append(self._cache[value])
-            except StopIteration:
-                break
-        _ = [self._cache.pop(nskey, None) for nskey in delete_keys]
-        return True
+    async def clear(self, namespace: Optional[str] = None) -> bool:
+        return self._clear_namespace(namespace)
 
     async def delete(self, key: InmutableKey) -> int:
         try:
@@ -185,10 +345,17 @@ class AsyncMemoryCache(MemoryCommonCache, AbstractAsyncFwkCache):
             return 0
 
     async def exists(self, key: InmutableKey) -> bool:
-        value: SerializableData = self._search_key(key)
-        if value is not None:
-            return True
-        return False
+        return self._nskey(key) in self._cache
+
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        return self._search_many(keys, default)
+
+    async def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return self._store_many(items)
+
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return self._remove_many(keys)
 
     async def close(self) -> bool:
         return True
@@ -199,6 +366,8 @@ class AsyncMemoryCache(MemoryCommonCache, AbstractAsyncFwkCache):
         ns_key: str = self._nskey(key, self._namespace)
         method_cache = self._method_cache(self._cache, pop)
         value = method_cache(ns_key)
+        if pop is True:
+            self._untrack(ns_key)
         return value
 
     @staticmethod
@@ -213,29 +382,21 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncFwkCache):
 
     def __init__(self, alias: str) -> None:
         super().__init__(alias)
+        self._instrument(False)
 
     def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
-        value: SerializableData = self._search_key(key)
-        if value is not None:
-            return value
-        return default
-
-    def put(self, key: InmutableKey, data: SerializableData) -> bool:
-        ns_key: str = self._nskey(key)
-        self._cache[ns_key] = data
-        return True
+        # stored None, 0 or [] values are hits, only a missing key returns the default
+        value: SerializableData = self._cache.get(self._nskey(key), _MISSING)
+        if value is _MISSING:
+            return default
+        return value
 
-    def clear(self) -> bool:
-        iter_cache: Iterator = iter(self._cache)
-        delete_keys: List[Any] = []
-        while True:
-            try:
-                value: Any = next(iter_cache)
-                delete_keys.append(self._cache[value])
-            except StopIteration:
-                break
-        _ = [self._cache.pop(nskey, None) for nskey in delete_keys]
-        return True
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        # memory regions expire entries with the policy of the alias, ttl is not per key
+        return self._store(self._nskey(key), data)
+
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        return self._clear_namespace(namespace)
 
     def delete(self, key: InmutableKey) -> int:
         try:
@@ -245,10 +406,17 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncFwkCache):
             return 0
 
     def exists(self, key: InmutableKey) -> bool:
-        value: SerializableData = self._search_key(key)
-        if value is not None:
-            return True
-        return False
+        return self._nskey(key) in self._cache
+
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        return self._search_many(keys, default)
+
+    def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return self._store_many(items)
+
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return self._remove_many(keys)
 
     def close(self) -> bool:
         return True
@@ -260,6 +428,8 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncFwkCache):
         ns_key: str = self._nskey(key, self._namespace)
         method_cache = self._method_cache(self._cache, pop)
         value = method_cache(ns_key)
+        if pop is True:
+            self._untrack(ns_key)
         return value
 
     @staticmethod
@@ -1,22 +1,45 @@
-import pickle
-from typing import Any, Dict, Optional, Union, List
+import asyncio
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (Any, Dict, Optional, Union, List, Iterable, Mapping, Callable, Final, NamedTuple, Tuple,
+                    TypeVar)
+from weakref import WeakKeyDictionary
 
 import redis
 import redis.asyncio
 
-from cache.exceptions import WrongBackendImplementation
+from cache.exceptions import ConfigurationError, WrongBackendImplementation
+from cache.compression import CompressionStats, Compressor, decompress, get_compression_stats, get_compressor
+from cache.serializers import Serializer, decode, get_serializer
 from cache.fwk_cache import (
     AbstractAsyncFwkCache,
     AbstractSyncFwkCache,
     Backend,
     CacheConfig,
+    CacheResult,
     FwkCache,
     InmutableKey,
     SerializableData,
+    namespace_prefix,
+    namespaced_key,
 )
+from cache.batching import GetBatcher, get_batcher
+from cache.hashring import DEFAULT_VNODES, HashRing
+from cache.replicas import ROUND_ROBIN, ReadRouter
+from cache.tracking import MISSING, InvalidationTracker, get_tracker
 
 RedisCache = Union[redis.asyncio.Redis, redis.Redis]
 RedisConnectionPool = Union[redis.asyncio.BlockingConnectionPool, redis.BlockingConnectionPool]
+ClearProgress = Callable[[int], None]
+T = TypeVar("T")
+
+CLEAR_BATCH_SIZE: Final[int] = 1_000
+# threads of the sync clients to reach the nodes of a sharded alias at the same time
+FANOUT_WORKERS: Final[int] = 16
+_GLOB_SPECIAL: Final[re.Pattern] = re.compile(r"([*?\[\]\\])")
 
 
 redis_config = {
@@ -42,8 +65,27 @@ redis_config = {
 }
 
 
+class RedisNode(NamedTuple):
+    host: str
+    port: int
+    db: int
+    username: Optional[str]
+    password: Optional[str]
+    weight: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.host}:{self.port}/{self.db}"
+
+
 class RedisCommonCache(FwkCache):
-    _connections_pool: Dict[str, Dict[bool, RedisConnectionPool]] = {}
+    # alias -> node name -> pool of the sync clients
+    _connections_pool: Dict[str, Dict[str, RedisConnectionPool]] = {}
+    # event loop -> alias -> node name -> pool, the asyncio connections are bound to the loop
+    # that opened them
+    _async_pools: WeakKeyDictionary = WeakKeyDictionary()
+    _fanout: Optional[ThreadPoolExecutor] = None
+    _fanout_lock: threading.Lock = threading.Lock()
 
     def __init__(self, alias: str, asynchronous: bool) -> None:
         self._alias: str = alias
@@ -63,58 +105,152 @@ class RedisCommonCache(FwkCache):
         self._username: Optional[str] = self.selected_config.get("username")
         self._password: Optional[str] = self.selected_config.get("password")
         self._timeout = self.selected_config.get("timeout", 10)
+        self._serializer: Serializer = get_serializer(self.selected_config.get("serializer"))
+        self._compressor: Optional[Compressor] = get_compressor(self.selected_config.get("compression"),
+                                                                alias)
+        self._compression_stats: CompressionStats = get_compression_stats(alias)
         self._check_validate_backend(alias, FwkCache._config)
-        self._cache: RedisCache = self._set_cache(alias, asynchronous)
+        self._nodes: List[RedisNode] = self._set_nodes(alias)
+        self._clients: Dict[str, RedisCache] = {node.name: self._set_cache(alias, asynchronous, node)
+                                                for node in self._nodes}
+        # the first node also carries the commands that are not about one key, like pub/sub
+        self._cache: RedisCache = self._clients[self._nodes[0].name]
+        # an alias with one node sends every key to _cache without hashing it
+        self._ring: Optional[HashRing] = None
+        if len(self._nodes) > 1:
+            self._ring = HashRing([node.name for node in self._nodes],
+                                  self.selected_config.get("vnodes", DEFAULT_VNODES),
+                                  {node.name: node.weight for node in self._nodes})
+        self._replicas: List[RedisNode] = self._set_replicas(alias)
+        # reads go to the primary when the alias has no replicas
+        self._router: Optional[ReadRouter[RedisCache]] = None
+        if self._replicas:
+            self._router = ReadRouter([self._set_cache(alias, asynchronous, node) for node in self._replicas],
+                                      self.selected_config.get("read_strategy", ROUND_ROBIN),
+                                      self.selected_config.get("read_your_writes", 0.0))
 
     @property
     def selected_config(self) -> Dict[str, Any]:
         return self._selected_config
 
-    def _set_cache(self, alias: str, asynchronous: bool = False) -> RedisCache:
+    def _set_nodes(self, alias: str) -> List[RedisNode]:
+        """ 'nodes' is a list of "host:port" strings or dicts with host, port, db, username,
+            password and weight, the missing fields come from the alias. Without 'nodes' the alias
+            has the single node of its host and port.
+        """
+        nodes_config: Optional[List[Any]] = self.selected_config.get("nodes")
+        if not nodes_config:
+            return [RedisNode(self._host, int(self._port), self._db, self._username, self._password, 1)]
+        nodes: List[RedisNode] = [self._parse_node(node_config) for node_config in nodes_config]
+        if len({node.name for node in nodes}) != len(nodes):
+            raise ConfigurationError(f"The alias {alias} has repeated nodes")
+        return nodes
+
+    def _set_replicas(self, alias: str) -> List[RedisNode]:
+        """ 'replicas' has the same format as 'nodes', reads are spread between them and the
+            writes go to the primary
+        """
+        replicas: List[RedisNode] = [self._parse_node(node_config)
+                                     for node_config in self.selected_config.get("replicas") or []]
+        if replicas and self._ring is not None:
+            raise ConfigurationError(f"The alias {alias} has several nodes, replicas are only "
+                                     f"supported with a single primary")
+        if {node.name for node in replicas} & {self._nodes[0].name}:
+            raise ConfigurationError(f"The primary of the alias {alias} is also one of its replicas")
+        return replicas
+
+    def _parse_node(self, node_config: Union[str, Dict[str, Any]]) -> RedisNode:
+        options: Dict[str, Any]
+        if isinstance(node_config, str):
+            host, _, port = node_config.rpartition(":")
+            options = {"host": host, "port": port} if host else {"host": port}
+        else:
+            options = dict(node_config)
+        return RedisNode(options.get("host", self._host), int(options.get("port", self._port)),
+                         options.get("db", self._db), options.get("username", self._username),
+                         options.get("password", self._password), options.get("weight", 1))
+
+    def _written(self, ns_keys: Iterable[str]) -> None:
+        if self._router is not None:
+            self._router.written(ns_keys)
+
+    def _set_cache(self, alias: str, asynchronous: bool = False,
+                   node: Optional[RedisNode] = None) -> RedisCache:
         cache: RedisCache
-        pool: RedisConnectionPool
-        pool: Optional[RedisConnectionPool] = RedisCommonCache._connections_pool.get(
-            alias, {}
-        ).get(asynchronous)
+        node = self._nodes[0] if node is None else node
+        node_pools: Dict[str, RedisConnectionPool] = RedisCommonCache._pools(alias, asynchronous)
+        pool: Optional[RedisConnectionPool] = node_pools.get(node.name)
         if asynchronous is True:
             if pool is None:
-                pool = redis.asyncio.BlockingConnectionPool(
-                    host=self._host,
-                    port=self._port,
-                    db=self._db,
-                    username=self._username,
-                    password=self._password,
+                pool = node_pools.setdefault(node.name, redis.asyncio.BlockingConnectionPool(
+                    host=node.host,
+                    port=node.port,
+                    db=node.db,
+                    username=node.username,
+                    password=node.password,
                     socket_timeout=self._timeout,
                     max_connections=self._max_connections,
-                )
-                RedisCommonCache._add_to_pools(pool, alias, asynchronous)
+                ))
             cache = redis.asyncio.Redis(connection_pool=pool)
         else:
 
             if pool is None:
-                pool = redis.BlockingConnectionPool(
-                    host=self._host,
-                    port=self._port,
-                    db=self._db,
-                    username=self._username,
-                    password=self._password,
+                pool = node_pools.setdefault(node.name, redis.BlockingConnectionPool(
+                    host=node.host,
+                    port=node.port,
+                    db=node.db,
+                    username=node.username,
+                    password=node.password,
                     socket_timeout=self._timeout,
                     max_connections=self._max_connections,
-                )
-                RedisCommonCache._add_to_pools(pool, alias, asynchronous)
+                ))
             cache = redis.Redis(connection_pool=pool)
         return cache
 
     @staticmethod
-    def _add_to_pools(pool, alias: str, asynchronous: bool) -> None:
-        alias_dict: dict = RedisCommonCache._connections_pool.get(alias, {})
-        if not alias_dict:
-            RedisCommonCache._connections_pool[alias] = {}
-        asynchronous_dict: dict = RedisCommonCache._connections_pool[alias].get(
-            asynchronous, {}
-        )
-        if not asynchronous_dict:
-            RedisCommonCache._connections_pool[alias][asynchronous] = pool
+    def _pools(alias: str, asynchronous: bool) -> Dict[str, RedisConnectionPool]:
+        """ pools of the alias by node name, the async ones belong to the running event loop """
+        if not asynchronous:
+            return RedisCommonCache._connections_pool.setdefault(alias, {})
+        try:
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        except RuntimeError:
+            # a client built outside any loop keeps pools of its own
+            return {}
+        return RedisCommonCache._async_pools.setdefault(loop, {}).setdefault(alias, {})
+
+    def _client(self, ns_key: str) -> RedisCache:
+        if self._ring is None:
+            return self._cache
+        return self._clients[self._ring.node(ns_key.encode("utf-8"))]
+
+    def _by_node(self, ns_keys: List[str]) -> Dict[str, List[int]]:
+        """ positions of the keys grouped by the node that owns them """
+        groups: Dict[str, List[int]] = {}
+        for position, ns_key in enumerate(ns_keys):
+            groups.setdefault(self._ring.node(ns_key.encode("utf-8")), []).append(position)
+        return groups
+
+    @staticmethod
+    def _gather(groups: Dict[str, List[int]], replies: Iterable[List[Any]], size: int) -> List[Any]:
+        """ puts the replies of every node back in the order of the keys """
+        values: List[Any] = [None] * size
+        for positions, reply in zip(groups.values(), replies):
+            for position, value in zip(positions, reply):
+                values[position] = value
+        return values
+
+    @staticmethod
+    def _fan_out(calls: List[Callable[[], T]]) -> List[T]:
+        """ runs the calls of a sync client at the same time, one per node """
+        if len(calls) == 1:
+            return [calls[0]()]
+        if RedisCommonCache._fanout is None:
+            with RedisCommonCache._fanout_lock:
+                if RedisCommonCache._fanout is None:
+                    RedisCommonCache._fanout = ThreadPoolExecutor(FANOUT_WORKERS,
+                                                                  thread_name_prefix="fwkcache-fanout")
+        return list(RedisCommonCache._fanout.map(lambda call: call(), calls))
 
     def _check_validate_backend(self, alias: str, _config: CacheConfig) -> bool:
         if self._backend != Backend.REDIS:
@@ -132,96 +268,380 @@ class RedisCommonCache(FwkCache):
             "ttl": self._ttl,
             "namespace": self._namespace,
             "timeout": self._timeout,
+            "nodes": [node.name for node in self._nodes],
+            "replicas": [node.name for node in self._replicas],
+            "serializer": self._serializer.NAME,
+            "compression": self._compressor.codec if self._compressor else None,
         }
 
+    def compression_stats(self) -> Dict[str, Any]:
+        return self._compression_stats.as_dict()
+
     def _nskey(self, key: InmutableKey, namespace: Optional[str] = None) -> str:
-        if namespace is not None:
-            return namespace + str(key)
-        else:
-            return self._namespace + str(key)
+        return namespaced_key(self._namespace if namespace is None else namespace, key)
 
-    @staticmethod
-    def _serialize(value: SerializableData) -> bytes:
-        return pickle.dumps(value)
+    def _match_pattern(self, namespace: Optional[str] = None) -> str:
+        if namespace is None:
+            namespace = self._namespace
+        return _GLOB_SPECIAL.sub(r"\\\1", namespace_prefix(namespace)) + "*"
 
-    @staticmethod
-    def _deserialize(value: bytes) -> SerializableData:
+    def _serialize(self, value: SerializableData) -> bytes:
+        data: bytes = self._serializer.encode(value)
+        if self._compressor is None:
+            return data
+        return self._compressor.compress(data)
+
+    def _deserialize(self, value: bytes) -> SerializableData:
         if value is None:
             return None
-        return pickle.loads(value, encoding="utf-8")
+        # compressed values are detected by their tag, even when the alias stopped compressing
+        return decode(decompress(value, self._compression_stats))
+
+    def _deserialize_many(self, values: List[Optional[bytes]],
+                          default: Optional[object] = None) -> List[CacheResult]:
+        # a stored value is never a nil reply, so the hit flag does not depend on the payload
+        return [CacheResult(False, default) if value is None
+                else CacheResult(True, self._deserialize(value))
+                for value in values]
 
 
 class AsyncRedisCache(RedisCommonCache, AbstractAsyncFwkCache):
     def __init__(self, alias: str) -> None:
         super().__init__(alias, True)
+        # with 'batching' the gets of the same loop iteration share one MGET
+        self._batcher: Optional[GetBatcher[Optional[bytes]]] = get_batcher(
+            self.selected_config.get("batching"), self._mget)
+        # with 'client_tracking' the replies are kept locally until Redis invalidates them
+        self._tracker: Optional[InvalidationTracker] = get_tracker(
+            self.selected_config.get("client_tracking"), self._cache, self._namespace)
+        if self._tracker is not None and (self._ring is not None or self._router is not None):
+            raise ConfigurationError(f"The client tracking of the alias {alias} needs a single node "
+                                     f"without replicas")
+        self._instrument(True)
 
     async def get(
         self, key: InmutableKey, default: Optional[object] = None
     ) -> SerializableData:
         ns_key: str = self._nskey(key)
-        value: bytes = await self._cache.get(ns_key)
-        return RedisCommonCache._deserialize(value)
-
-    async def put(self, key: InmutableKey, data: SerializableData) -> bool:
+        value: Optional[bytes]
+        if self._tracker is None:
+            value = await self._fetch(ns_key)
+        else:
+            value = self._tracker.lookup(ns_key)
+            if value is MISSING:
+                token: Optional[object] = self._tracker.begin(ns_key)
+                value = await self._fetch(ns_key)
+                self._tracker.store(ns_key, token, value)
+        if value is None:
+            return default
+        return self._deserialize(value)
+
+    async def _fetch(self, ns_key: str) -> Optional[bytes]:
+        if self._batcher is not None:
+            return await self._batcher.load(ns_key)
+        if self._router is None:
+            return await self._client(ns_key).get(ns_key)
+        return await self._replica_read([ns_key], "get", ns_key)
+
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key)
-        value: bytes = RedisCommonCache._serialize(data)
-        result: Optional[bool] = await self._cache.set(ns_key, value, ex=self._ttl)
-        return result or False
-
-    async def clear(self) -> bool:
-        _: Any = await self._cache.flushdb()
+        value: bytes = self._serialize(data)
+        self._written([ns_key])
+        result: Optional[bool] = await self._client(ns_key).set(ns_key, value,
+                                                                ex=self._ttl if ttl is None else ttl)
+        self._forget([ns_key])
+        return bool(result)
+
+    def _forget(self, ns_keys: Optional[List[str]]) -> None:
+        """ drops the local copies once the write is done, a read that raced with it may have
+            stored the previous value before Redis sends the invalidation
+        """
+        if self._tracker is not None:
+            self._tracker.invalidate(ns_keys)
+
+    async def clear(self, namespace: Optional[str] = None, batch_size: int = CLEAR_BATCH_SIZE,
+                    pause: float = 0.0, progress: Optional[ClearProgress] = None) -> bool:
+        """ Removes the keys of the namespace (the alias one by default) without blocking the
+            server: SCAN walks the keyspace in batches of about batch_size keys, each batch is
+            dropped with UNLINK pipelined with the next SCAN, pause throttles between batches and
+            progress receives the number of keys removed so far. The nodes of a sharded alias are
+            walked at the same time.
+        """
+        pattern: str = self._match_pattern(namespace)
+        removed: int = 0
+
+        def report(count: int) -> None:
+            nonlocal removed
+            removed += count
+            if progress is not None:
+                progress(removed)
+
+        _: List[None] = await asyncio.gather(*(self._clear_node(client, pattern, batch_size, pause, report)
+                                               for client in self._clients.values()))
+        self._forget(None)
         return True
 
+    @staticmethod
+    async def _clear_node(client: redis.asyncio.Redis, pattern: str, batch_size: int, pause: float,
+                          report: ClearProgress) -> None:
+        cursor: int
+        keys: List[bytes]
+        cursor, keys = await client.scan(0, match=pattern, count=batch_size)
+        while keys or cursor:
+            if not keys:
+                cursor, keys = await client.scan(cursor, match=pattern, count=batch_size)
+                continue
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.unlink(*keys)
+                if cursor:
+                    pipe.scan(cursor, match=pattern, count=batch_size)
+                results: List[Any] = await pipe.execute()
+            report(results[0])
+            cursor, keys = results[1] if cursor else (0, [])
+            if pause and cursor:
+                await asyncio.sleep(pause)
+
     async def delete(self, key: InmutableKey) -> int:
         ns_key: str = self._nskey(key)
-        result: int = await self._cache.delete(ns_key)
+        self._written([ns_key])
+        result: int = await self._client(ns_key).delete(ns_key)
+        self._forget([ns_key])
         return result
 
     async def exists(self, key: InmutableKey) -> bool:
-        value: SerializableData = await self.get(key)
-        if value is None:
-            return False
-        return True
+        ns_key: str = self._nskey(key)
+        if self._tracker is not None:
+            value: Optional[bytes] = self._tracker.lookup(ns_key)
+            if value is not MISSING:
+                return value is not None
+        result: int
+        if self._router is None:
+            result = await self._client(ns_key).exists(ns_key)
+        else:
+            result = await self._replica_read([ns_key], "exists", ns_key)
+        return result > 0
+
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        ns_keys: List[str] = [self._nskey(key) for key in keys]
+        if not ns_keys:
+            return []
+        if self._tracker is None:
+            return self._deserialize_many(await self._mget(ns_keys), default)
+        values: List[Any] = [self._tracker.lookup(ns_key) for ns_key in ns_keys]
+        misses: List[int] = [position for position, value in enumerate(values) if value is MISSING]
+        if misses:
+            tokens: List[Optional[object]] = [self._tracker.begin(ns_keys[position]) for position in misses]
+            fetched: List[Optional[bytes]] = await self._mget([ns_keys[position] for position in misses])
+            for position, token, value in zip(misses, tokens, fetched):
+                self._tracker.store(ns_keys[position], token, value)
+                values[position] = value
+        return self._deserialize_many(values, default)
+
+    async def _mget(self, ns_keys: List[str]) -> List[Optional[bytes]]:
+        if self._router is not None:
+            return await self._replica_read(ns_keys, "mget", ns_keys)
+        if self._ring is None:
+            return await self._cache.mget(ns_keys)
+        groups: Dict[str, List[int]] = self._by_node(ns_keys)
+        replies: List[List[Optional[bytes]]] = await asyncio.gather(
+            *(self._clients[node].mget([ns_keys[position] for position in positions])
+              for node, positions in groups.items()))
+        return RedisCommonCache._gather(groups, replies, len(ns_keys))
+
+    async def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        if not items:
+            return True
+        entries: List[Tuple[str, bytes]] = [(self._nskey(key), self._serialize(data))
+                                            for key, data in items.items()]
+        self._written([ns_key for ns_key, _ in entries])
+        if self._ring is None:
+            stored: bool = all(await self._set_node(self._cache, entries))
+            self._forget([ns_key for ns_key, _ in entries])
+            return stored
+        groups: Dict[str, List[int]] = self._by_node([ns_key for ns_key, _ in entries])
+        replies: List[List[Any]] = await asyncio.gather(
+            *(self._set_node(self._clients[node], [entries[position] for position in positions])
+              for node, positions in groups.items()))
+        return all(all(reply) for reply in replies)
+
+    async def _set_node(self, client: redis.asyncio.Redis, entries: List[Tuple[str, bytes]]) -> List[Any]:
+        async with client.pipeline(transaction=False) as pipe:
+            for ns_key, value in entries:
+                pipe.set(ns_key, value, ex=self._ttl)
+            return await pipe.execute()
+
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        ns_keys: List[str] = [self._nskey(key) for key in keys]
+        if not ns_keys:
+            return 0
+        self._written(ns_keys)
+        if self._ring is None:
+            result: int = await self._cache.delete(*ns_keys)
+            self._forget(ns_keys)
+            return result
+        groups: Dict[str, List[int]] = self._by_node(ns_keys)
+        results: List[int] = await asyncio.gather(
+            *(self._clients[node].delete(*(ns_keys[position] for position in positions))
+              for node, positions in groups.items()))
+        return sum(results)
+
+    async def _replica_read(self, ns_keys: List[str], command: str, *args: Any) -> Any:
+        """ runs the read command on a replica, on the primary when it is unreachable """
+        replica: Optional[int] = self._router.pick(ns_keys)
+        if replica is None:
+            return await getattr(self._cache, command)(*args)
+        self._router.begin(replica)
+        try:
+            return await getattr(self._router.client(replica), command)(*args)
+        except (redis.ConnectionError, redis.TimeoutError):
+            return await getattr(self._cache, command)(*args)
+        finally:
+            self._router.end(replica)
 
     async def close(self) -> bool:
-        await self._cache.close()
+        if self._tracker is not None:
+            await self._tracker.close()
+        for client in [*self._clients.values(), *(self._router.replicas if self._router else [])]:
+            await client.close()
         return True
 
 
 class SyncRedisCache(RedisCommonCache, AbstractSyncFwkCache):
     def __init__(self, alias: str) -> None:
         super().__init__(alias, False)
+        self._instrument(False)
 
     def get(
         self, key: InmutableKey, default: Optional[object] = None
     ) -> SerializableData:
         ns_key: str = self._nskey(key)
-        value: bytes = self._cache.get(ns_key)
-        return RedisCommonCache._deserialize(value)
+        value: Optional[bytes]
+        if self._router is None:
+            value = self._client(ns_key).get(ns_key)
+        else:
+            value = self._replica_read([ns_key], "get", ns_key)
+        if value is None:
+            return default
+        return self._deserialize(value)
 
-    def put(self, key: InmutableKey, data: SerializableData) -> bool:
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key)
-        value: bytes = RedisCommonCache._serialize(data)
-        self._cache.set(ns_key, value, ex=self._ttl)
-        return True
-
-    def clear(self) -> bool:
-        _: Any = self._cache.flushdb()
+        value: bytes = self._serialize(data)
+        self._written([ns_key])
+        result: Optional[bool] = self._client(ns_key).set(ns_key, value, ex=self._ttl if ttl is None else ttl)
+        return bool(result)
+
+    def clear(self, namespace: Optional[str] = None, batch_size: int = CLEAR_BATCH_SIZE,
+              pause: float = 0.0, progress: Optional[ClearProgress] = None) -> bool:
+        """ Same SCAN + UNLINK walk as AsyncRedisCache.clear, node by node """
+        pattern: str = self._match_pattern(namespace)
+        removed: int = 0
+        cursor: int
+        keys: List[bytes]
+        for client in self._clients.values():
+            cursor, keys = client.scan(0, match=pattern, count=batch_size)
+            while keys or cursor:
+                if not keys:
+                    cursor, keys = client.scan(cursor, match=pattern, count=batch_size)
+                    continue
+                with client.pipeline(transaction=False) as pipe:
+                    pipe.unlink(*keys)
+                    if cursor:
+                        pipe.scan(cursor, match=pattern, count=batch_size)
+                    results: List[Any] = pipe.execute()
+                removed += results[0]
+                if progress is not None:
+                    progress(removed)
+                cursor, keys = results[1] if cursor else (0, [])
+                if pause and cursor:
+                    time.sleep(pause)
         return True
 
     def delete(self, key: InmutableKey) -> int:
         ns_key: str = self._nskey(key)
-        result: int = self._cache.delete(ns_key)
+        self._written([ns_key])
+        result: int = self._client(ns_key).delete(ns_key)
         return result
 
     def exists(self, key: InmutableKey) -> bool:
-        value: SerializableData = self.get(key)
-        if value is None:
-            return False
-        return True
+        ns_key: str = self._nskey(key)
+        result: int
+        if self._router is None:
+            result = self._client(ns_key).exists(ns_key)
+        else:
+            result = self._replica_read([ns_key], "exists", ns_key)
+        return result > 0
+
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        ns_keys: List[str] = [self._nskey(key) for key in keys]
+        if not ns_keys:
+            return []
+        values: List[Optional[bytes]]
+        if self._router is not None:
+            values = self._replica_read(ns_keys, "mget", ns_keys)
+        elif self._ring is None:
+            values = self._cache.mget(ns_keys)
+        else:
+            groups: Dict[str, List[int]] = self._by_node(ns_keys)
+            replies: List[List[Optional[bytes]]] = RedisCommonCache._fan_out(
+                [partial(self._clients[node].mget, [ns_keys[position] for position in positions])
+                 for node, positions in groups.items()])
+            values = RedisCommonCache._gather(groups, replies, len(ns_keys))
+        return self._deserialize_many(values, default)
+
+    def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        if not items:
+            return True
+        entries: List[Tuple[str, bytes]] = [(self._nskey(key), self._serialize(data))
+                                            for key, data in items.items()]
+        self._written([ns_key for ns_key, _ in entries])
+        if self._ring is None:
+            return all(self._set_node(self._cache, entries))
+        groups: Dict[str, List[int]] = self._by_node([ns_key for ns_key, _ in entries])
+        replies: List[List[Any]] = RedisCommonCache._fan_out(
+            [partial(self._set_node, self._clients[node], [entries[position] for position in positions])
+             for node, positions in groups.items()])
+        return all(all(reply) for reply in replies)
+
+    def _set_node(self, client: redis.Redis, entries: List[Tuple[str, bytes]]) -> List[Any]:
+        with client.pipeline(transaction=False) as pipe:
+            for ns_key, value in entries:
+                pipe.set(ns_key, value, ex=self._ttl)
+            return pipe.execute()
+
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        ns_keys: List[str] = [self._nskey(key) for key in keys]
+        if not ns_keys:
+            return 0
+        self._written(ns_keys)
+        if self._ring is None:
+            result: int = self._cache.delete(*ns_keys)
+            return result
+        groups: Dict[str, List[int]] = self._by_node(ns_keys)
+        results: List[int] = RedisCommonCache._fan_out(
+            [partial(self._clients[node].delete, *(ns_keys[position] for position in positions))
+             for node, positions in groups.items()])
+        return sum(results)
+
+    def _replica_read(self, ns_keys: List[str], command: str, *args: Any) -> Any:
+        """ runs the read command on a replica, on the primary when it is unreachable """
+        replica: Optional[int] = self._router.pick(ns_keys)
+        if replica is None:
+            return getattr(self._cache, command)(*args)
+        self._router.begin(replica)
+        try:
+            return getattr(self._router.client(replica), command)(*args)
+        except (redis.ConnectionError, redis.TimeoutError):
+            return getattr(self._cache, command)(*args)
+        finally:
+            self._router.end(replica)
 
     def close(self) -> bool:
-        self._cache.close()
+        for client in [*self._clients.values(), *(self._router.replicas if self._router else [])]:
+            client.close()
         return True
 
 
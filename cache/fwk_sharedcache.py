@@ -0,0 +1,197 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from cache.compression import CompressionStats, Compressor, decompress, get_compression_stats, get_compressor
+from cache.exceptions import WrongBackendImplementation
+from cache.fwk_cache import (
+    AbstractAsyncFwkCache,
+    AbstractSyncFwkCache,
+    Backend,
+    CacheConfig,
+    CacheResult,
+    FwkCache,
+    InmutableKey,
+    SerializableData,
+    namespaced_key,
+)
+from cache.serializers import Serializer, decode, get_serializer
+from cache.shared_table import SharedTable, shared_path
+
+shared_config = {
+    'shared': {
+        'backend': 'shared',
+        'namespace': 'main',
+        'slots': 4_096,
+        'slot_size': 1_024,
+        'ttl': 20
+    }
+}
+
+
+class SharedCommonCache(FwkCache):
+    """ Cache shared by the worker processes of a host, the entries live in a SharedTable mapped
+        from a file of /dev/shm. Values are stored serialized and a value larger than a slot is
+        not cached.
+    """
+    # one mapping of every segment per process
+    _tables: Dict[str, SharedTable] = {}
+
+    def __init__(self, alias: str) -> None:
+        self._alias: str = alias
+        self._selected_config: Dict[str, Any] = FwkCache.get_alias_config(alias)
+        self._backend = self._selected_config.get("backend", Backend.SHARED)
+        self._ttl: Optional[int] = self._selected_config.get("ttl", None)
+        self._namespace: str = self._selected_config.get("namespace", "")
+        self._slots: int = self._selected_config.get("slots", 4_096)
+        self._slot_size: int = self._selected_config.get("slot_size", 1_024)
+        self._name: str = self._selected_config.get("name", f"fwkcache-{alias}")
+        self._serializer: Serializer = get_serializer(self._selected_config.get("serializer"))
+        self._compressor: Optional[Compressor] = get_compressor(self._selected_config.get("compression"),
+                                                                alias)
+        self._compression_stats: CompressionStats = get_compression_stats(alias)
+        self._check_validate_backend(alias, FwkCache._config)
+        self._table: SharedTable = self._set_cache(alias)
+
+    @property
+    def selected_config(self) -> Dict[str, Any]:
+        return self._selected_config
+
+    def _check_validate_backend(self, alias: str, _config: CacheConfig) -> bool:
+        if self._backend != Backend.SHARED:
+            raise WrongBackendImplementation(f"Selectd backend '{self._backend}' not work properly "
+                                             f"with the selected implementation "
+                                             f"'{self.__class__.__name__}'")
+        return True
+
+    def _set_cache(self, alias: str) -> SharedTable:
+        try:
+            return SharedCommonCache._tables[alias]
+        except KeyError:
+            table: SharedTable = SharedTable(shared_path(self._name), self._slots, self._slot_size)
+            return SharedCommonCache._tables.setdefault(alias, table)
+
+    def get_options(self) -> Dict[str, Any]:
+        return {'alias': self._alias,
+                'backend': self._backend,
+                'ttl': self._ttl,
+                'namespace': self._namespace,
+                'slots': self._table.slots,
+                'slot_size': self._table.slot_size,
+                'path': self._table.path,
+                'serializer': self._serializer.NAME,
+                'compression': self._compressor.codec if self._compressor else None
+                }
+
+    def _nskey(self, key: InmutableKey, namespace: Optional[str] = None) -> bytes:
+        return namespaced_key(self._namespace if namespace is None else namespace, key).encode("utf-8")
+
+    def _serialize(self, value: SerializableData) -> bytes:
+        data: bytes = self._serializer.encode(value)
+        if self._compressor is None:
+            return data
+        return self._compressor.compress(data)
+
+    def _deserialize(self, value: bytes) -> SerializableData:
+        return decode(decompress(value, self._compression_stats))
+
+    def _search(self, key: InmutableKey, default: Optional[object] = None) -> CacheResult:
+        # a stored value is never empty, it starts with the serializer tag
+        value: Optional[bytes] = self._table.get(self._nskey(key))
+        if value is None:
+            return CacheResult(False, default)
+        return CacheResult(True, self._deserialize(value))
+
+    def _store(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        return self._table.put(self._nskey(key), self._serialize(data), ttl or self._ttl)
+
+    def _store_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        stored: bool = True
+        for key, data in items.items():
+            stored = self._store(key, data) and stored
+        return stored
+
+    def _remove_many(self, keys: Iterable[InmutableKey]) -> int:
+        return sum(self._table.delete(self._nskey(key)) for key in keys)
+
+    def _clear_namespace(self, namespace: Optional[str] = None) -> bool:
+        _: int = self._table.clear(self._nskey("", namespace))
+        return True
+
+    def size(self, namespace: Optional[str] = None) -> int:
+        """ entries of the namespace, by default the one of the alias """
+        return self._table.count(self._nskey("", namespace))
+
+
+class AsyncSharedCache(SharedCommonCache, AbstractAsyncFwkCache):
+    """ The table is read and written inline, no operation waits on the network """
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias)
+        self._instrument(True)
+
+    async def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return self._search(key, default).value
+
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
+        return self._store(key, data, ttl)
+
+    async def clear(self, namespace: Optional[str] = None) -> bool:
+        return self._clear_namespace(namespace)
+
+    async def delete(self, key: InmutableKey) -> int:
+        return self._remove_many([key])
+
+    async def exists(self, key: InmutableKey) -> bool:
+        return self._search(key).hit
+
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        return [self._search(key, default) for key in keys]
+
+    async def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return self._store_many(items)
+
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return self._remove_many(keys)
+
+    async def close(self) -> bool:
+        # the mapping is shared by every client of the alias in the process, it is never unmapped
+        return True
+
+
+class SyncSharedCache(SharedCommonCache, AbstractSyncFwkCache):
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias)
+        self._instrument(False)
+
+    def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return self._search(key, default).value
+
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        return self._store(key, data, ttl)
+
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        return self._clear_namespace(namespace)
+
+    def delete(self, key: InmutableKey) -> int:
+        return self._remove_many([key])
+
+    def exists(self, key: InmutableKey) -> bool:
+        return self._search(key).hit
+
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        return [self._search(key, default) for key in keys]
+
+    def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        return self._store_many(items)
+
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        return self._remove_many(keys)
+
+    def close(self) -> bool:
+        return True
+
+
+FwkCache.load_cache(shared_config)
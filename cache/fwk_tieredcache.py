@@ -0,0 +1,437 @@
+import asyncio
+import json
+import logging
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Final, Tuple
+
+import redis
+
+from cache.exceptions import ConfigurationError, WrongBackendImplementation
+from cache.fwk_cache import (
+    AbstractAsyncFwkCache,
+    AbstractSyncFwkCache,
+    Backend,
+    CacheConfig,
+    CacheResult,
+    FwkCache,
+    InmutableKey,
+    SerializableData,
+    Strategy,
+)
+from cache.fwk_memorycache import AsyncMemoryCache, SyncMemoryCache
+from cache.fwk_rediscache import AsyncRedisCache, SyncRedisCache
+from cache.hooks import attach_hooks
+
+# identifies the invalidations published by this worker so it does not drop its own fresh copies
+ORIGIN: Final[str] = uuid.uuid4().hex
+# seconds between two polls of the invalidations and between two attempts to subscribe
+POLL_TIMEOUT: Final[float] = 1.0
+RECONNECT_DELAY: Final[float] = 1.0
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+tiered_config = {
+    'memory_near': {
+        'backend': 'memory',
+        'namespace': 'near',
+        'max_size': 1_000,
+        'ttl': 5,
+        'strategy': Strategy.TTL
+    },
+
+    'tiered': {
+        'backend': 'tiered',
+        'local': 'memory_near',
+        'remote': 'redis'
+    }
+}
+
+
+class FillGuard:
+    """ Tells which values read from the remote tier may stay in the local one. Every invalidation
+        takes a sequence number, a read remembers the number it started at and, once its values are
+        in the local tier, drops again the keys invalidated after that. Either the check sees the
+        invalidation or the invalidation runs after the fill and deletes it, so a stale value never
+        stays. The invalidations are only remembered while a read is in flight.
+    """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._sequence: int = 0
+        self._flushed: int = 0
+        self._invalidated: Dict[str, int] = {}
+        self._reads: int = 0
+
+    def begin(self) -> int:
+        with self._lock:
+            self._reads += 1
+            return self._sequence
+
+    def invalidate(self, keys: Optional[Iterable[InmutableKey]]) -> None:
+        """ keys None invalidates the whole local tier """
+        with self._lock:
+            self._sequence += 1
+            if keys is None:
+                self._flushed = self._sequence
+            elif self._reads:
+                for key in keys:
+                    self._invalidated[str(key)] = self._sequence
+
+    def stale(self, start: int, keys: Iterable[InmutableKey]) -> List[InmutableKey]:
+        """ ends the read started at start, returns its keys invalidated meanwhile """
+        with self._lock:
+            self._reads -= 1
+            if self._flushed > start:
+                stale: List[InmutableKey] = list(keys)
+            else:
+                stale = [key for key in keys if self._invalidated.get(str(key), 0) > start]
+            if not self._reads:
+                self._invalidated.clear()
+            return stale
+
+
+class TieredCommonCache(FwkCache):
+    _listeners: Dict[Tuple[str, bool], Any] = {}
+    # local alias -> guard, the clients of every tiered alias on the same local region share it
+    _guards: Dict[str, FillGuard] = {}
+    _lock: threading.Lock = threading.Lock()
+
+    def __init__(self, alias: str, asynchronous: bool) -> None:
+        self._alias: str = alias
+        self._asynchronous: bool = asynchronous
+        self._selected_config: Dict[str, Any] = FwkCache.get_alias_config(alias)
+        self._backend = self._selected_config.get("backend", Backend.TIERED)
+        self._check_validate_backend(alias, FwkCache._config)
+        self._local_alias: str = self._selected_config["local"]
+        self._remote_alias: str = self._selected_config["remote"]
+        self._channel: str = self._selected_config.get("channel", f"fwkcache:invalidation:{alias}")
+        with TieredCommonCache._lock:
+            self._guard: FillGuard = TieredCommonCache._guards.setdefault(self._local_alias, FillGuard())
+
+    @property
+    def selected_config(self) -> Dict[str, Any]:
+        return self._selected_config
+
+    def _check_validate_backend(self, alias: str, _config: CacheConfig) -> bool:
+        if self._backend != Backend.TIERED:
+            raise WrongBackendImplementation(f"Selectd backend '{self._backend}' not work properly "
+                                             f"with the selected implementation "
+                                             f"'{self.__class__.__name__}'")
+        for tier in ("local", "remote"):
+            if tier not in self._selected_config:
+                raise ConfigurationError(f"The tiered alias {alias} needs the '{tier}' alias")
+        local_backend: str = FwkCache.get_backend_type(self._selected_config["local"])
+        remote_backend: str = FwkCache.get_backend_type(self._selected_config["remote"])
+        if local_backend != Backend.MEMORY or remote_backend != Backend.REDIS:
+            raise ConfigurationError(f"The tiered alias {alias} needs a {Backend.MEMORY} local alias "
+                                     f"and a {Backend.REDIS} remote alias")
+        return True
+
+    def _attach_hooks(self) -> None:
+        """ the tiers keep the metrics and hooks of their own aliases, get_many and put_many of the
+            tiers are not hooked so the hooks of the tiered alias wrap this client
+        """
+        self._namespace: str = self._remote._namespace
+        attach_hooks(self, FwkCache.get_hooks(self._alias), self._asynchronous)
+
+    def get_options(self) -> Dict[str, Any]:
+        return {'alias': self._alias,
+                'backend': self._backend,
+                'local': self._local_alias,
+                'remote': self._remote_alias,
+                'channel': self._channel
+                }
+
+    @staticmethod
+    def _message(keys: Optional[List[InmutableKey]]) -> str:
+        # keys None means that the whole local tier has to be dropped
+        return json.dumps([ORIGIN, None if keys is None else [str(key) for key in keys]])
+
+    @staticmethod
+    def _parse(message: Any) -> Tuple[bool, Optional[List[str]]]:
+        """ whether the message has to be applied and its keys, None for the whole local tier """
+        origin: str
+        keys: Optional[List[str]]
+        try:
+            origin, keys = json.loads(message)
+        except (TypeError, ValueError):
+            return False, None
+        return origin != ORIGIN, keys
+
+    @staticmethod
+    def _fill(results: List[CacheResult], misses: List[int],
+              remote_results: List[CacheResult]) -> Dict[int, SerializableData]:
+        fill: Dict[int, SerializableData] = {}
+        for position, remote_result in zip(misses, remote_results):
+            results[position] = remote_result
+            if remote_result.hit:
+                fill[position] = remote_result.value
+        return fill
+
+
+class AsyncTieredCache(TieredCommonCache, AbstractAsyncFwkCache):
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias, True)
+        self._local: AsyncMemoryCache = AsyncMemoryCache(self._local_alias)
+        self._remote: AsyncRedisCache = AsyncRedisCache(self._remote_alias)
+        self._ttl: Optional[int] = self._remote._ttl
+        self._attach_hooks()
+
+    def _ensure_listener(self) -> None:
+        listener: Optional[asyncio.Task] = TieredCommonCache._listeners.get((self._alias, True))
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if listener is None or listener.done() or listener.get_loop() is not loop:
+            TieredCommonCache._listeners[(self._alias, True)] = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub: redis.asyncio.client.PubSub = self._remote._cache.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                while True:
+                    message: Optional[Dict[str, Any]] = await pubsub.get_message(timeout=POLL_TIMEOUT)
+                    if message is not None:
+                        await self._invalidate(message)
+            except (redis.ConnectionError, redis.TimeoutError, OSError) as exc:
+                _logger.debug("tiered invalidation listener of %s disconnected: %s", self._alias, exc)
+            finally:
+                await pubsub.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _invalidate(self, message: Dict[str, Any]) -> None:
+        keys: Optional[List[str]]
+        if message.get("type") == "subscribe":
+            # the invalidations sent while this worker was not subscribed are lost
+            keys = None
+        elif message.get("type") == "message":
+            apply, keys = TieredCommonCache._parse(message["data"])
+            if not apply:
+                return None
+        else:
+            return None
+        self._guard.invalidate(keys)
+        if keys is None:
+            _: bool = await self._local.clear()
+        else:
+            _: int = await self._local.delete_many(keys)
+
+    async def _publish(self, keys: Optional[List[InmutableKey]]) -> None:
+        self._ensure_listener()
+        await self._remote._cache.publish(self._channel, TieredCommonCache._message(keys))
+
+    async def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return (await self.get_many([key], default))[0].value
+
+    async def put(self, key: InmutableKey, data: SerializableData,
+                  ttl: Optional[int] = None) -> bool:
+        self._guard.invalidate([key])
+        result: bool = await self._remote.put(key, data, ttl)
+        _: bool = await self._local.put(key, data)
+        await self._publish([key])
+        return result
+
+    async def clear(self, namespace: Optional[str] = None) -> bool:
+        # the local tier only mirrors keys of the remote alias, it is dropped whatever the namespace
+        self._guard.invalidate(None)
+        _: bool = await self._remote.clear(namespace)
+        _ = await self._local.clear()
+        await self._publish(None)
+        return True
+
+    async def delete(self, key: InmutableKey) -> int:
+        self._guard.invalidate([key])
+        result: int = await self._remote.delete(key)
+        _: int = await self._local.delete(key)
+        await self._publish([key])
+        return result
+
+    async def exists(self, key: InmutableKey) -> bool:
+        if (await self._local.get_many([key]))[0].hit:
+            return True
+        return await self._remote.exists(key)
+
+    async def get_many(self, keys: Iterable[InmutableKey],
+                       default: Optional[object] = None) -> List[CacheResult]:
+        self._ensure_listener()
+        keys = list(keys)
+        results: List[CacheResult] = await self._local.get_many(keys, default)
+        misses: List[int] = [position for position, result in enumerate(results) if not result.hit]
+        if misses:
+            start: int = self._guard.begin()
+            fill: Dict[int, SerializableData] = {}
+            try:
+                remote_results: List[CacheResult] = await self._remote.get_many(
+                    [keys[position] for position in misses], default)
+                fill = TieredCommonCache._fill(results, misses, remote_results)
+                _: bool = await self._local.put_many({keys[position]: value
+                                                      for position, value in fill.items()})
+            finally:
+                stale: List[InmutableKey] = self._guard.stale(start, [keys[position] for position in fill])
+            if stale:
+                _: int = await self._local.delete_many(stale)
+        return results
+
+    async def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        self._guard.invalidate(items.keys())
+        result: bool = await self._remote.put_many(items)
+        _: bool = await self._local.put_many(items)
+        await self._publish(list(items.keys()))
+        return result
+
+    async def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        keys = list(keys)
+        self._guard.invalidate(keys)
+        result: int = await self._remote.delete_many(keys)
+        _: int = await self._local.delete_many(keys)
+        await self._publish(keys)
+        return result
+
+    async def close(self) -> bool:
+        listener: Optional[asyncio.Task] = TieredCommonCache._listeners.pop((self._alias, True), None)
+        if listener is not None and not listener.done():
+            listener.cancel()
+            if listener.get_loop() is asyncio.get_running_loop():
+                try:
+                    await listener
+                except asyncio.CancelledError:
+                    pass
+        return await self._remote.close()
+
+
+class SyncTieredCache(TieredCommonCache, AbstractSyncFwkCache):
+
+    def __init__(self, alias: str) -> None:
+        super().__init__(alias, False)
+        self._local: SyncMemoryCache = SyncMemoryCache(self._local_alias)
+        self._remote: SyncRedisCache = SyncRedisCache(self._remote_alias)
+        self._ttl: Optional[int] = self._remote._ttl
+        self._attach_hooks()
+        self._ensure_listener()
+
+    def _ensure_listener(self) -> None:
+        listener: Optional[Tuple[threading.Thread, threading.Event]] = TieredCommonCache._listeners.get(
+            (self._alias, False))
+        if listener is None or not listener[0].is_alive():
+            with TieredCommonCache._lock:
+                listener = TieredCommonCache._listeners.get((self._alias, False))
+                if listener is None or not listener[0].is_alive():
+                    stop: threading.Event = threading.Event()
+                    thread: threading.Thread = threading.Thread(target=self._listen, args=(stop,),
+                                                                name=f"fwkcache-tiered-{self._alias}",
+                                                                daemon=True)
+                    TieredCommonCache._listeners[(self._alias, False)] = (thread, stop)
+                    thread.start()
+
+    def _listen(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            pubsub: redis.client.PubSub = self._remote._cache.pubsub()
+            try:
+                pubsub.subscribe(self._channel)
+                while not stop.is_set():
+                    message: Optional[Dict[str, Any]] = pubsub.get_message(timeout=POLL_TIMEOUT)
+                    if message is not None:
+                        self._invalidate(message)
+            except (redis.ConnectionError, redis.TimeoutError, OSError) as exc:
+                _logger.debug("tiered invalidation listener of %s disconnected: %s", self._alias, exc)
+            finally:
+                pubsub.close()
+            stop.wait(RECONNECT_DELAY)
+
+    def _invalidate(self, message: Dict[str, Any]) -> None:
+        keys: Optional[List[str]]
+        if message.get("type") == "subscribe":
+            # the invalidations sent while this worker was not subscribed are lost
+            keys = None
+        elif message.get("type") == "message":
+            apply, keys = TieredCommonCache._parse(message["data"])
+            if not apply:
+                return None
+        else:
+            return None
+        self._guard.invalidate(keys)
+        if keys is None:
+            _: bool = self._local.clear()
+        else:
+            _: int = self._local.delete_many(keys)
+
+    def _publish(self, keys: Optional[List[InmutableKey]]) -> None:
+        self._remote._cache.publish(self._channel, TieredCommonCache._message(keys))
+
+    def get(self, key: InmutableKey, default: Optional[object] = None) -> SerializableData:
+        return self.get_many([key], default)[0].value
+
+    def put(self, key: InmutableKey, data: SerializableData, ttl: Optional[int] = None) -> bool:
+        self._guard.invalidate([key])
+        result: bool = self._remote.put(key, data, ttl)
+        _: bool = self._local.put(key, data)
+        self._publish([key])
+        return result
+
+    def clear(self, namespace: Optional[str] = None) -> bool:
+        # the local tier only mirrors keys of the remote alias, it is dropped whatever the namespace
+        self._guard.invalidate(None)
+        _: bool = self._remote.clear(namespace)
+        _ = self._local.clear()
+        self._publish(None)
+        return True
+
+    def delete(self, key: InmutableKey) -> int:
+        self._guard.invalidate([key])
+        result: int = self._remote.delete(key)
+        _: int = self._local.delete(key)
+        self._publish([key])
+        return result
+
+    def exists(self, key: InmutableKey) -> bool:
+        if self._local.get_many([key])[0].hit:
+            return True
+        return self._remote.exists(key)
+
+    def get_many(self, keys: Iterable[InmutableKey],
+                 default: Optional[object] = None) -> List[CacheResult]:
+        self._ensure_listener()
+        keys = list(keys)
+        results: List[CacheResult] = self._local.get_many(keys, default)
+        misses: List[int] = [position for position, result in enumerate(results) if not result.hit]
+        if misses:
+            start: int = self._guard.begin()
+            fill: Dict[int, SerializableData] = {}
+            try:
+                remote_results: List[CacheResult] = self._remote.get_many(
+                    [keys[position] for position in misses], default)
+                fill = TieredCommonCache._fill(results, misses, remote_results)
+                _: bool = self._local.put_many({keys[position]: value for position, value in fill.items()})
+            finally:
+                stale: List[InmutableKey] = self._guard.stale(start, [keys[position] for position in fill])
+            if stale:
+                _: int = self._local.delete_many(stale)
+        return results
+
+    def put_many(self, items: Mapping[InmutableKey, SerializableData]) -> bool:
+        self._guard.invalidate(items.keys())
+        result: bool = self._remote.put_many(items)
+        _: bool = self._local.put_many(items)
+        self._publish(list(items.keys()))
+        return result
+
+    def delete_many(self, keys: Iterable[InmutableKey]) -> int:
+        keys = list(keys)
+        self._guard.invalidate(keys)
+        result: int = self._remote.delete_many(keys)
+        _: int = self._local.delete_many(keys)
+        self._publish(keys)
+        return result
+
+    def close(self) -> bool:
+        listener: Optional[Tuple[threading.Thread, threading.Event]] = TieredCommonCache._listeners.pop(
+            (self._alias, False), None)
+        if listener is not None:
+            thread, stop = listener
+            stop.set()
+            thread.join(POLL_TIMEOUT + RECONNECT_DELAY)
+        return self._remote.close()
+
+
+FwkCache.load_cache(tiered_config)
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+from weakref import WeakKeyDictionary
+
+Client = TypeVar("Client")
+
+
+class SyncHandle(Generic[Client]):
+    """ Client built on first use and shared by every thread afterwards """
+
+    def __init__(self, factory: Callable[[], Client]) -> None:
+        self._factory: Callable[[], Client] = factory
+        self._client: Optional[Client] = None
+        self._lock: threading.Lock = threading.Lock()
+
+    def get(self) -> Client:
+        client: Optional[Client] = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+
+class AsyncHandle(Generic[Client]):
+    """ One client per event loop, the asyncio connections are bound to the loop that opened them.
+        The clients go away with their loop.
+    """
+
+    def __init__(self, factory: Callable[[], Client]) -> None:
+        self._factory: Callable[[], Client] = factory
+        self._clients: WeakKeyDictionary = WeakKeyDictionary()
+
+    def get(self) -> Client:
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        try:
+            return self._clients[loop]
+        except KeyError:
+            client: Any = self._factory()
+            self._clients[loop] = client
+            return client
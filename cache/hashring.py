@@ -0,0 +1,58 @@
+from bisect import bisect
+from hashlib import blake2b
+from typing import Dict, Final, Iterable, List, Mapping, Optional
+
+from cache.exceptions import ConfigurationError
+
+DEFAULT_VNODES: Final[int] = 160
+
+
+def _point(label: bytes) -> int:
+    return int.from_bytes(blake2b(label, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """ Consistent hash ring, every node owns vnodes points times its weight and a key belongs to
+        the first point after its hash. Adding or removing a node only moves the keys of its points,
+        about 1/N of them.
+    """
+
+    def __init__(self, nodes: Iterable[str], vnodes: int = DEFAULT_VNODES,
+                 weights: Optional[Mapping[str, int]] = None) -> None:
+        if vnodes < 1:
+            raise ConfigurationError("A hash ring needs at least one virtual node per node")
+        self._vnodes: int = vnodes
+        self._weights: Dict[str, int] = dict(weights or {})
+        self._owners: Dict[int, str] = {}
+        self._points: List[int] = []
+        self._nodes: List[str] = []
+        for node in nodes:
+            self.add(node)
+        if not self._nodes:
+            raise ConfigurationError("A hash ring needs at least one node")
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._nodes)
+
+    def add(self, node: str, weight: Optional[int] = None) -> None:
+        if node in self._nodes:
+            return None
+        if weight is not None:
+            self._weights[node] = weight
+        for replica in range(self._vnodes * self._weights.get(node, 1)):
+            # a point taken by another node keeps its first owner, the ring does not depend on order
+            self._owners.setdefault(_point(f"{node}#{replica}".encode("utf-8")), node)
+        self._nodes.append(node)
+        self._points = sorted(self._owners)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return None
+        self._nodes.remove(node)
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+        self._points = sorted(self._owners)
+
+    def node(self, key: bytes) -> str:
+        position: int = bisect(self._points, _point(key))
+        return self._owners[self._points[position % len(self._points)]]
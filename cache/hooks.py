@@ -0,0 +1,227 @@
+import logging
+import time
+import zlib
+from typing import Any, Callable, Final, List, Optional, Sequence, Tuple
+
+from cache.keys import namespaced_key
+from cache.sizing import deep_getsizeof
+
+HOOKED_OPERATIONS: Final[Tuple[str, ...]] = ("get", "put", "delete", "clear", "exists")
+# get, exists and delete tell whether the key was there, put and clear whether they succeeded
+HIT: Final[str] = "hit"
+MISS: Final[str] = "miss"
+OK: Final[str] = "ok"
+FAILED: Final[str] = "failed"
+ERROR: Final[str] = "error"
+
+_MISS: Any = object()
+_NO_PAYLOAD: Any = object()
+_logger: logging.Logger = logging.getLogger(__name__)
+
+
+class HookEvent:
+    """ One cache operation as the hooks see it. before gets it without duration and outcome, after
+        gets the same event completed. The key is only given as a crc32 of the namespaced key, the
+        payload is the value read or written and its size is measured the first time it is asked.
+    """
+
+    __slots__ = ("alias", "namespace", "backend", "operation", "key_hash", "duration", "outcome", "error",
+                 "_payload", "_size")
+
+    def __init__(self, alias: str, namespace: str, backend: str, operation: str,
+                 key_hash: Optional[int]) -> None:
+        self.alias: str = alias
+        self.namespace: str = namespace
+        self.backend: str = backend
+        self.operation: str = operation
+        self.key_hash: Optional[int] = key_hash
+        self.duration: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._payload: Any = _NO_PAYLOAD
+        self._size: Optional[int] = None
+
+    @property
+    def size(self) -> Optional[int]:
+        """ bytes of the payload, None when the operation has none """
+        if self._size is None and self._payload is not _NO_PAYLOAD:
+            self._size = deep_getsizeof(self._payload)
+        return self._size
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(alias={self.alias!r}, operation={self.operation!r}, " \
+               f"key_hash={self.key_hash}, duration={self.duration}, outcome={self.outcome!r})"
+
+
+class CacheHook:
+    """ Base of the instrumentation hooks, override before, after or both. Whatever before returns
+        is handed to after, a tracer keeps its span there. A hook that raises is logged and the
+        operation goes on.
+    """
+
+    def before(self, event: HookEvent) -> Any:
+        return None
+
+    def after(self, event: HookEvent, state: Any) -> None:
+        return None
+
+
+def key_hash(namespace: str, key: Any) -> int:
+    """ stable across processes, unlike hash(), and taken on the key as the backends store it """
+    return zlib.crc32(namespaced_key(namespace, key).encode("utf-8"))
+
+
+def _start(hooks: Sequence[CacheHook], event: HookEvent) -> List[Any]:
+    states: List[Any] = []
+    for hook in hooks:
+        try:
+            states.append(hook.before(event))
+        except Exception:
+            _logger.exception("The hook %r failed before %s", hook, event.operation)
+            states.append(None)
+    return states
+
+
+def _finish(hooks: Sequence[CacheHook], event: HookEvent, states: List[Any]) -> None:
+    for hook, state in zip(hooks, states):
+        try:
+            hook.after(event, state)
+        except Exception:
+            _logger.exception("The hook %r failed after %s", hook, event.operation)
+
+
+def _outcome(operation: str, result: Any) -> str:
+    if operation in ("put", "clear"):
+        return OK if result else FAILED
+    return HIT if result else MISS
+
+
+class _Dispatch:
+    """ What the wrappers of one client need, fixed when the client is built """
+
+    __slots__ = ("alias", "namespace", "backend", "hooks")
+
+    def __init__(self, alias: str, namespace: str, backend: str, hooks: Tuple[CacheHook, ...]) -> None:
+        self.alias: str = alias
+        self.namespace: str = namespace
+        self.backend: str = backend
+        self.hooks: Tuple[CacheHook, ...] = hooks
+
+    def event(self, operation: str, args: Tuple[Any, ...], kwargs: Any) -> HookEvent:
+        if operation == "clear":
+            namespace: Optional[str] = args[0] if args else kwargs.get("namespace")
+            return HookEvent(self.alias, self.namespace if namespace is None else namespace, self.backend,
+                             operation, None)
+        key: Any = args[0] if args else kwargs["key"]
+        return HookEvent(self.alias, self.namespace, self.backend, operation, key_hash(self.namespace, key))
+
+
+def _sync_get(get: Callable[..., Any], dispatch: _Dispatch) -> Callable[..., Any]:
+    hooks: Tuple[CacheHook, ...] = dispatch.hooks
+    timer: Callable[[], float] = time.perf_counter
+
+    def hooked_get(key: Any, default: Any = None) -> Any:
+        event: HookEvent = dispatch.event("get", (key,), None)
+        states: List[Any] = _start(hooks, event)
+        start: float = timer()
+        try:
+            value: Any = get(key, _MISS)
+        except Exception as exc:
+            event.duration, event.outcome, event.error = timer() - start, ERROR, exc
+            _finish(hooks, event, states)
+            raise
+        event.duration = timer() - start
+        if value is _MISS:
+            event.outcome = MISS
+            _finish(hooks, event, states)
+            return default
+        event.outcome, event._payload = HIT, value
+        _finish(hooks, event, states)
+        return value
+
+    return hooked_get
+
+
+def _async_get(get: Callable[..., Any], dispatch: _Dispatch) -> Callable[..., Any]:
+    hooks: Tuple[CacheHook, ...] = dispatch.hooks
+    timer: Callable[[], float] = time.perf_counter
+
+    async def hooked_get(key: Any, default: Any = None) -> Any:
+        event: HookEvent = dispatch.event("get", (key,), None)
+        states: List[Any] = _start(hooks, event)
+        start: float = timer()
+        try:
+            value: Any = await get(key, _MISS)
+        except Exception as exc:
+            event.duration, event.outcome, event.error = timer() - start, ERROR, exc
+            _finish(hooks, event, states)
+            raise
+        event.duration = timer() - start
+        if value is _MISS:
+            event.outcome = MISS
+            _finish(hooks, event, states)
+            return default
+        event.outcome, event._payload = HIT, value
+        _finish(hooks, event, states)
+        return value
+
+    return hooked_get
+
+
+def _sync_operation(method: Callable[..., Any], dispatch: _Dispatch, operation: str) -> Callable[..., Any]:
+    hooks: Tuple[CacheHook, ...] = dispatch.hooks
+    timer: Callable[[], float] = time.perf_counter
+
+    def hooked(*args: Any, **kwargs: Any) -> Any:
+        event: HookEvent = dispatch.event(operation, args, kwargs)
+        if operation == "put":
+            event._payload = args[1] if len(args) > 1 else kwargs.get("data")
+        states: List[Any] = _start(hooks, event)
+        start: float = timer()
+        try:
+            result: Any = method(*args, **kwargs)
+        except Exception as exc:
+            event.duration, event.outcome, event.error = timer() - start, ERROR, exc
+            _finish(hooks, event, states)
+            raise
+        event.duration, event.outcome = timer() - start, _outcome(operation, result)
+        _finish(hooks, event, states)
+        return result
+
+    return hooked
+
+
+def _async_operation(method: Callable[..., Any], dispatch: _Dispatch, operation: str) -> Callable[..., Any]:
+    hooks: Tuple[CacheHook, ...] = dispatch.hooks
+    timer: Callable[[], float] = time.perf_counter
+
+    async def hooked(*args: Any, **kwargs: Any) -> Any:
+        event: HookEvent = dispatch.event(operation, args, kwargs)
+        if operation == "put":
+            event._payload = args[1] if len(args) > 1 else kwargs.get("data")
+        states: List[Any] = _start(hooks, event)
+        start: float = timer()
+        try:
+            result: Any = await method(*args, **kwargs)
+        except Exception as exc:
+            event.duration, event.outcome, event.error = timer() - start, ERROR, exc
+            _finish(hooks, event, states)
+            raise
+        event.duration, event.outcome = timer() - start, _outcome(operation, result)
+        _finish(hooks, event, states)
+        return result
+
+    return hooked
+
+
+def attach_hooks(client: Any, hooks: Sequence[CacheHook], asynchronous: bool) -> None:
+    """ Wraps get, put, delete, clear and exists of the client with the hooks given, once when the
+        client is built. Without hooks the client is left untouched and pays nothing.
+    """
+    if not hooks:
+        return None
+    dispatch: _Dispatch = _Dispatch(client._alias, client._namespace, client._backend, tuple(hooks))
+    client.get = (_async_get if asynchronous else _sync_get)(client.get, dispatch)
+    wrap: Callable[..., Any] = _async_operation if asynchronous else _sync_operation
+    for operation in HOOKED_OPERATIONS[1:]:
+        setattr(client, operation, wrap(getattr(client, operation), dispatch, operation))
@@ -0,0 +1,132 @@
+import hashlib
+import inspect
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Final
+
+from cache.exceptions import ConfigurationError
+
+# 16 bytes, 32 hex characters whatever the size of the arguments
+DIGEST_SIZE: Final[int] = 16
+_VARIADIC: Final[Tuple[Any, ...]] = (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+_NO_DEFAULT: Any = inspect.Parameter.empty
+NAMESPACE_SEPARATOR: Final[str] = ":"
+
+
+def namespace_prefix(namespace: str) -> str:
+    """ start of every key of the namespace, the separator keeps "main" apart from "mainline" """
+    return namespace + NAMESPACE_SEPARATOR if namespace else ""
+
+
+def namespaced_key(namespace: str, key: Any) -> str:
+    return namespace_prefix(namespace) + str(key)
+
+
+def canonical_repr(value: Any) -> str:
+    """ repr where mappings and sets list their items sorted, so equal arguments give one key
+        whatever their insertion or hash order. Other values keep their repr.
+    """
+    kind: type = type(value)
+    if kind is tuple:
+        if len(value) == 1:
+            return f"({canonical_repr(value[0])},)"
+        return "(" + ", ".join(canonical_repr(item) for item in value) + ")"
+    if kind is list:
+        return "[" + ", ".join(canonical_repr(item) for item in value) + "]"
+    if isinstance(value, Mapping):
+        text: str = "{" + ", ".join(sorted(f"{canonical_repr(key)}: {canonical_repr(item)}"
+                                          for key, item in value.items())) + "}"
+        return text if kind is dict else f"{kind.__name__}({text})"
+    if isinstance(value, (set, frozenset)) and value:
+        text = "{" + ", ".join(sorted(canonical_repr(item) for item in value)) + "}"
+        return text if kind is set else f"{kind.__name__}({text})"
+    return repr(value)
+
+
+class KeyBuilder:
+    """ Cache keys of a decorated function, the signature is bound once at decoration time.
+        Positional and keyword arguments are matched to their parameter and the defaults are
+        applied, so f(1), f(1, y=2) and f(x=1, y=2) share the key when y defaults to 2.
+    """
+
+    def __init__(self, func: Callable[..., Any], include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None, digest_size: int = DIGEST_SIZE) -> None:
+        self._signature: inspect.Signature = inspect.signature(func)
+        parameters: Mapping[str, inspect.Parameter] = self._signature.parameters
+        self._names: Tuple[str, ...] = tuple(parameters)
+        self._selected: Tuple[str, ...] = self._select(func, include, exclude)
+        self._defaults: Tuple[Tuple[str, Any], ...] = tuple(
+            (name, parameter.default) for name, parameter in parameters.items()
+            if parameter.default is not _NO_DEFAULT)
+        # functions with *args or **kwargs go through Signature.bind
+        self._variadic: bool = any(parameter.kind in _VARIADIC for parameter in parameters.values())
+        self._var_keyword: Optional[str] = next((name for name, parameter in parameters.items()
+                                                 if parameter.kind == inspect.Parameter.VAR_KEYWORD),
+                                                None)
+        # positional calls skip the dict: args + the defaults of the parameters after them
+        self._tails: Dict[int, Tuple[Any, ...]] = self._default_tails(parameters)
+        self._positions: Optional[Tuple[int, ...]] = None
+        if self._selected != self._names:
+            self._positions = tuple(self._names.index(name) for name in self._selected)
+        self._prefix: str = f"{func.__module__ or ''}.{func.__qualname__}"
+        self._digest_size: int = digest_size
+
+    def _select(self, func: Callable[..., Any], include: Optional[Iterable[str]],
+                exclude: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        include = None if include is None else tuple(include)
+        excluded: Tuple[str, ...] = () if exclude is None else tuple(exclude)
+        unknown: List[str] = [name for name in (include or ()) + excluded if name not in self._names]
+        if unknown:
+            raise ConfigurationError(f"The parameters {unknown} are not in the signature of "
+                                     f"{func.__qualname__}")
+        selected: Iterable[str] = self._names if include is None else include
+        return tuple(name for name in self._names if name in selected and name not in excluded)
+
+    def _default_tails(self, parameters: Mapping[str, inspect.Parameter]) -> Dict[int, Tuple[Any, ...]]:
+        tails: Dict[int, Tuple[Any, ...]] = {}
+        if self._variadic:
+            return tails
+        defaults: List[Any] = [parameter.default for parameter in parameters.values()]
+        for count in range(len(defaults), -1, -1):
+            if _NO_DEFAULT in defaults[count:]:
+                break
+            tails[count] = tuple(defaults[count:])
+        return tails
+
+    @property
+    def selected(self) -> Tuple[str, ...]:
+        return self._selected
+
+    def arguments(self, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> Dict[str, Any]:
+        """ arguments of the call by parameter name, defaults included """
+        if self._variadic:
+            bound: inspect.BoundArguments = self._signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments: Dict[str, Any] = dict(bound.arguments)
+            if self._var_keyword is not None:
+                # the order of the extra keywords does not change the call
+                arguments[self._var_keyword] = tuple(sorted(arguments[self._var_keyword].items()))
+            return arguments
+        arguments = dict(zip(self._names, args))
+        arguments.update(kwargs)
+        for name, default in self._defaults:
+            if name not in arguments:
+                arguments[name] = default
+        return arguments
+
+    def values(self, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> Tuple[Any, ...]:
+        """ values of the selected parameters, in the order of the signature """
+        if not kwargs and len(args) in self._tails:
+            values: Tuple[Any, ...] = args + self._tails[len(args)]
+            if self._positions is None:
+                return values
+            return tuple(values[position] for position in self._positions)
+        arguments: Dict[str, Any] = self.arguments(args, kwargs)
+        return tuple(arguments.get(name) for name in self._selected)
+
+    def key(self, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> str:
+        """ readable key, used by the memory backends """
+        return self._prefix + canonical_repr(self.values(args, kwargs))
+
+    def hashed_key(self, args: Tuple[Any, ...], kwargs: Mapping[str, Any]) -> str:
+        """ fixed length blake2b digest of the readable key, used by the remote backends """
+        return hashlib.blake2b(self.key(args, kwargs).encode("utf-8"),
+                               digest_size=self._digest_size).hexdigest()
@@ -0,0 +1,310 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple
+
+# upper bounds in seconds, a last bucket counts the slower operations
+LATENCY_BUCKETS: Final[Tuple[float, ...]] = (0.000_005, 0.000_01, 0.000_025, 0.000_05, 0.000_1, 0.000_25,
+                                             0.000_5, 0.001, 0.002_5, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                                             0.5, 1.0, 2.5)
+OPERATIONS: Final[Tuple[str, ...]] = ("get", "put", "delete", "exists", "clear", "get_many", "put_many",
+                                      "delete_many")
+COUNTERS: Final[Dict[str, str]] = {
+    "hits": "Lookups that found the key",
+    "misses": "Lookups that did not find the key",
+    "sets": "Values stored",
+    "deletes": "Keys removed",
+    "evictions": "Entries evicted by the policy of a memory region",
+    "errors": "Operations that raised",
+}
+PROMETHEUS_CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+_MISS: Any = object()
+
+
+class Histogram:
+    """ The measured wrappers update counts and total inline, a method call costs as much as the rest """
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total: float = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+
+class CacheMetrics:
+    """ Counters and latency histograms of one alias and namespace in this process. They are
+        updated without locks, the event loop never interleaves two updates and with threads an
+        increment may rarely be lost, which is fine for monitoring.
+    """
+
+    __slots__ = ("alias", "namespace", "backend", "latency", *COUNTERS)
+
+    def __init__(self, alias: str, namespace: str, backend: str) -> None:
+        self.alias: str = alias
+        self.namespace: str = namespace
+        self.backend: str = backend
+        self.latency: Dict[str, Histogram] = {operation: Histogram() for operation in OPERATIONS}
+        self.hits: int = 0
+        self.misses: int = 0
+        self.sets: int = 0
+        self.deletes: int = 0
+        self.evictions: int = 0
+        self.errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        values: Dict[str, Any] = {name: getattr(self, name) for name in COUNTERS}
+        values["latency"] = {operation: {"count": histogram.count, "seconds": histogram.total}
+                             for operation, histogram in self.latency.items()}
+        return values
+
+
+_metrics: Dict[Tuple[str, str], CacheMetrics] = {}
+
+
+def get_metrics(alias: str, namespace: str, backend: str) -> CacheMetrics:
+    try:
+        return _metrics[(alias, namespace)]
+    except KeyError:
+        return _metrics.setdefault((alias, namespace), CacheMetrics(alias, namespace, backend))
+
+
+def all_metrics() -> List[CacheMetrics]:
+    return list(_metrics.values())
+
+
+def reset_metrics() -> None:
+    """ forgets every counter, the clients built before keep updating the old ones """
+    _metrics.clear()
+
+
+def count_evictions(region: Any, metrics: CacheMetrics) -> None:
+    """ cachetools regions evict through popitem, the instance attribute hides the method """
+    popitem: Callable[[], Tuple[Any, Any]] = region.popitem
+
+    def counted_popitem() -> Tuple[Any, Any]:
+        item: Tuple[Any, Any] = popitem()
+        metrics.evictions += 1
+        return item
+
+    region.popitem = counted_popitem
+
+
+def _count_get_many(metrics: CacheMetrics, results: Any, *_: Any) -> None:
+    hits: int = sum(result.hit for result in results)
+    metrics.hits += hits
+    metrics.misses += len(results) - hits
+
+
+def _count_put_many(metrics: CacheMetrics, _: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> None:
+    items: Any = args[0] if args else kwargs["items"]
+    metrics.sets += len(items)
+
+
+def _count_deletes(metrics: CacheMetrics, deleted: Any, *_: Any) -> None:
+    metrics.deletes += deleted
+
+
+# metrics, result, positional and keyword arguments of the operation
+Count = Callable[[CacheMetrics, Any, Tuple[Any, ...], Dict[str, Any]], None]
+_COUNTS: Final[Dict[str, Count]] = {
+    "get_many": _count_get_many,
+    "put_many": _count_put_many,
+    "delete": _count_deletes,
+    "delete_many": _count_deletes,
+}
+
+
+def _sync_get(get: Callable[..., Any], metrics: CacheMetrics) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency["get"]
+    counts: List[int] = histogram.counts
+    timer: Callable[[], float] = time.perf_counter
+
+    def measured_get(key: Any, default: Any = None) -> Any:
+        start: float = timer()
+        try:
+            value: Any = get(key, _MISS)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        if value is _MISS:
+            metrics.misses += 1
+            return default
+        metrics.hits += 1
+        return value
+
+    return measured_get
+
+
+def _async_get(get: Callable[..., Any], metrics: CacheMetrics) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency["get"]
+    counts: List[int] = histogram.counts
+    timer: Callable[[], float] = time.perf_counter
+
+    async def measured_get(key: Any, default: Any = None) -> Any:
+        start: float = timer()
+        try:
+            value: Any = await get(key, _MISS)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        if value is _MISS:
+            metrics.misses += 1
+            return default
+        metrics.hits += 1
+        return value
+
+    return measured_get
+
+
+def _sync_put(put: Callable[..., Any], metrics: CacheMetrics) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency["put"]
+    counts: List[int] = histogram.counts
+    timer: Callable[[], float] = time.perf_counter
+
+    def measured_put(key: Any, data: Any, ttl: Optional[int] = None) -> Any:
+        start: float = timer()
+        try:
+            stored: Any = put(key, data, ttl)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        metrics.sets += 1
+        return stored
+
+    return measured_put
+
+
+def _async_put(put: Callable[..., Any], metrics: CacheMetrics) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency["put"]
+    counts: List[int] = histogram.counts
+    timer: Callable[[], float] = time.perf_counter
+
+    async def measured_put(key: Any, data: Any, ttl: Optional[int] = None) -> Any:
+        start: float = timer()
+        try:
+            stored: Any = await put(key, data, ttl)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        metrics.sets += 1
+        return stored
+
+    return measured_put
+
+
+def _sync_operation(method: Callable[..., Any], metrics: CacheMetrics, operation: str) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency[operation]
+    counts: List[int] = histogram.counts
+    count: Optional[Count] = _COUNTS.get(operation)
+    timer: Callable[[], float] = time.perf_counter
+
+    def measured(*args: Any, **kwargs: Any) -> Any:
+        start: float = timer()
+        try:
+            result: Any = method(*args, **kwargs)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        if count is not None:
+            count(metrics, result, args, kwargs)
+        return result
+
+    return measured
+
+
+def _async_operation(method: Callable[..., Any], metrics: CacheMetrics, operation: str) -> Callable[..., Any]:
+    histogram: Histogram = metrics.latency[operation]
+    counts: List[int] = histogram.counts
+    count: Optional[Count] = _COUNTS.get(operation)
+    timer: Callable[[], float] = time.perf_counter
+
+    async def measured(*args: Any, **kwargs: Any) -> Any:
+        start: float = timer()
+        try:
+            result: Any = await method(*args, **kwargs)
+        except Exception:
+            metrics.errors += 1
+            raise
+        elapsed: float = timer() - start
+        counts[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        histogram.total += elapsed
+        if count is not None:
+            count(metrics, result, args, kwargs)
+        return result
+
+    return measured
+
+
+def measure(client: Any, metrics: CacheMetrics, asynchronous: bool) -> None:
+    """ Replaces the operations of the client with measured ones, once when the client is built.
+        get asks the backend with its own default to tell a miss from a stored default.
+    """
+    client.get = (_async_get if asynchronous else _sync_get)(client.get, metrics)
+    client.put = (_async_put if asynchronous else _sync_put)(client.put, metrics)
+    wrap: Callable[..., Any] = _async_operation if asynchronous else _sync_operation
+    for operation in OPERATIONS[2:]:
+        setattr(client, operation, wrap(getattr(client, operation), metrics, operation))
+
+
+def _labels(**labels: str) -> str:
+    escaped: List[str] = []
+    for name, value in labels.items():
+        value = value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """ Metrics of this process in the Prometheus text format, every uvicorn worker has its own
+        and the pid label tells them apart
+    """
+    pid: str = str(os.getpid())
+    snapshot: List[CacheMetrics] = all_metrics()
+    lines: List[str] = []
+    for name, description in COUNTERS.items():
+        lines.append(f"# HELP fwkcache_{name}_total {description}")
+        lines.append(f"# TYPE fwkcache_{name}_total counter")
+        for metrics in snapshot:
+            labels: str = _labels(alias=metrics.alias, namespace=metrics.namespace, backend=metrics.backend,
+                                  pid=pid)
+            lines.append(f"fwkcache_{name}_total{labels} {getattr(metrics, name)}")
+    lines.append("# HELP fwkcache_operation_seconds Latency of the cache operations")
+    lines.append("# TYPE fwkcache_operation_seconds histogram")
+    bounds: List[str] = [repr(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+    for metrics in snapshot:
+        for operation, histogram in metrics.latency.items():
+            if not histogram.count:
+                continue
+            common: Dict[str, str] = {"alias": metrics.alias, "namespace": metrics.namespace,
+                                      "backend": metrics.backend, "operation": operation, "pid": pid}
+            cumulative: int = 0
+            counts: List[int] = list(histogram.counts)
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f"fwkcache_operation_seconds_bucket{_labels(**common, le=bound)} {cumulative}")
+            lines.append(f"fwkcache_operation_seconds_sum{_labels(**common)} {histogram.total}")
+            lines.append(f"fwkcache_operation_seconds_count{_labels(**common)} {cumulative}")
+    return "\n".join(lines) + "\n"
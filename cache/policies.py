@@ -0,0 +1,458 @@
+import collections
+import time
+from typing import Any, Callable, List, Optional, Tuple, Final
+
+from cachetools import Cache
+
+# W-TinyLFU: share of the capacity kept by the admission window and by the protected segment
+WINDOW_RATIO: Final[float] = 0.01
+PROTECTED_RATIO: Final[float] = 0.8
+SKETCH_DEPTH: Final[int] = 4
+SKETCH_MAX_WIDTH: Final[int] = 1 << 20
+COUNTER_MAX: Final[int] = 15
+# the counters are halved after SAMPLE_FACTOR * width increments
+SAMPLE_FACTOR: Final[int] = 10
+# 2Q: share of the capacity of the FIFO probation queue and of the ghost queue of its victims
+TWO_Q_IN_RATIO: Final[float] = 0.25
+TWO_Q_OUT_RATIO: Final[float] = 0.5
+
+_SEEDS: Final[Tuple[int, ...]] = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+                                  0x27D4EB2F165667C5)
+_HASH_MASK: Final[int] = (1 << 64) - 1
+# default of pop, None is a valid default
+_NOT_GIVEN: Final[Any] = object()
+
+
+class FrequencySketch:
+    """ Count-min sketch of 4 bit counters with periodic aging, it estimates how often a key was
+        seen recently in a fixed amount of memory
+    """
+
+    def __init__(self, width: int) -> None:
+        size: int = 16
+        while size < min(max(width, 16), SKETCH_MAX_WIDTH):
+            size <<= 1
+        self._mask: int = size - 1
+        self._rows: List[bytearray] = [bytearray(size) for _ in range(SKETCH_DEPTH)]
+        self._sample_size: int = SAMPLE_FACTOR * size
+        self._additions: int = 0
+
+    def _indexes(self, key: Any) -> List[int]:
+        hashed: int = hash(key) & _HASH_MASK
+        return [(((hashed ^ seed) * seed) & _HASH_MASK) >> 40 & self._mask for seed in _SEEDS]
+
+    def frequency(self, key: Any) -> int:
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+
+    def increment(self, key: Any) -> None:
+        indexes: List[int] = self._indexes(key)
+        # conservative update, only the smallest counters grow
+        smallest: int = min(row[index] for row, index in zip(self._rows, indexes))
+        if smallest >= COUNTER_MAX:
+            return
+        for row, index in zip(self._rows, indexes):
+            if row[index] == smallest:
+                row[index] = smallest + 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._age()
+
+    def _age(self) -> None:
+        halve: bytes = bytes(counter >> 1 for counter in range(256))
+        for row in self._rows:
+            row[:] = row.translate(halve)
+        self._additions //= 2
+
+
+class TinyLFUCache(Cache):
+    """ W-TinyLFU: new keys enter a small LRU window, the window victims only enter the segmented
+        LRU main area when the sketch saw them more often than the main victim they would replace.
+        Sizes are counted with getsizeof like every cachetools region.
+    """
+
+    def __init__(self, maxsize: float, getsizeof: Optional[Callable[[Any], float]] = None,
+                 sketch_width: Optional[int] = None) -> None:
+        Cache.__init__(self, maxsize, getsizeof)
+        self._window: collections.OrderedDict = collections.OrderedDict()
+        self._probation: collections.OrderedDict = collections.OrderedDict()
+        self._protected: collections.OrderedDict = collections.OrderedDict()
+        self._window_size: float = 0
+        self._protected_size: float = 0
+        self._main_size: float = 0
+        self._window_max: float = max(1, int(maxsize * WINDOW_RATIO))
+        self._main_max: float = max(0, maxsize - self._window_max)
+        self._protected_max: float = int(self._main_max * PROTECTED_RATIO)
+        self._sketch: FrequencySketch = FrequencySketch(sketch_width or int(min(maxsize, SKETCH_MAX_WIDTH)))
+
+    def __getitem__(self, key: Any, cache_getitem: Callable[[Cache, Any], Any] = Cache.__getitem__) -> Any:
+        value: Any = cache_getitem(self, key)
+        if key in self:
+            self._sketch.increment(key)
+            self._touch(key)
+        return value
+
+    def get(self, key: Any, default: Optional[Any] = None) -> Any:
+        if key in self:
+            return self[key]
+        # the misses count too, a key asked often enough is admitted on its next store
+        self._sketch.increment(key)
+        return default
+
+    def __setitem__(self, key: Any, value: Any,
+                    cache_setitem: Callable[[Cache, Any, Any], None] = Cache.__setitem__) -> None:
+        cache_setitem(self, key, value)
+        size: float = self.getsizeof(value)
+        if key in self._window:
+            self._window_size += size - self._window[key]
+            self._window[key] = size
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            self._main_size += size - self._probation[key]
+            self._probation[key] = size
+            self._touch(key)
+        elif key in self._protected:
+            self._main_size += size - self._protected[key]
+            self._protected_size += size - self._protected[key]
+            self._protected[key] = size
+            self._protected.move_to_end(key)
+        else:
+            self._sketch.increment(key)
+            self._window[key] = size
+            self._window_size += size
+        self._balance()
+
+    def __delitem__(self, key: Any, cache_delitem: Callable[[Cache, Any], None] = Cache.__delitem__) -> None:
+        cache_delitem(self, key)
+        if key in self._window:
+            self._window_size -= self._window.pop(key)
+        elif key in self._probation:
+            self._main_size -= self._probation.pop(key)
+        else:
+            size: float = self._protected.pop(key)
+            self._main_size -= size
+            self._protected_size -= size
+
+    def popitem(self) -> Tuple[Any, Any]:
+        """ Remove and return the loser of the window candidate against the main victim """
+        candidate: Any = next(iter(self._window), None)
+        victim: Any = self._main_victim()
+        if candidate is None and victim is None:
+            raise KeyError(f"{type(self).__name__} is empty")
+        key: Any = victim
+        if victim is None or (candidate is not None and not self._admit(candidate, victim)):
+            key = candidate
+        # read without __getitem__, the eviction is not an access of the key
+        value: Any = Cache.__getitem__(self, key)
+        del self[key]
+        return key, value
+
+    def pop(self, key: Any, default: Any = _NOT_GIVEN) -> Any:
+        """ Remove the key without counting it in the sketch or moving it between the segments """
+        if key not in self:
+            if default is _NOT_GIVEN:
+                raise KeyError(key)
+            return default
+        value: Any = Cache.__getitem__(self, key)
+        del self[key]
+        return value
+
+    def _main_victim(self) -> Any:
+        victim: Any = next(iter(self._probation), None)
+        if victim is None:
+            victim = next(iter(self._protected), None)
+        return victim
+
+    def _admit(self, candidate: Any, victim: Any) -> bool:
+        return self._sketch.frequency(candidate) > self._sketch.frequency(victim)
+
+    def _touch(self, key: Any) -> None:
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        else:
+            # a second hit promotes the key from probation to protected
+            size: float = self._probation.pop(key)
+            self._protected[key] = size
+            self._protected_size += size
+            while self._protected_size > self._protected_max and len(self._protected) > 1:
+                demoted: Any
+                demoted_size: float
+                demoted, demoted_size = self._protected.popitem(last=False)
+                self._protected_size -= demoted_size
+                self._probation[demoted] = demoted_size
+
+    def _balance(self) -> None:
+        # the window overflow moves to probation while the main area has room, afterwards every
+        # candidate has to beat the main victim to stay. The loser goes through popitem, which is
+        # where the evictions of a region are counted
+        while self._window_size > self._window_max and len(self._window) > 1:
+            candidate: Any = next(iter(self._window))
+            size: float = self._window[candidate]
+            if self._main_size + size <= self._main_max:
+                del self._window[candidate]
+                self._window_size -= size
+                self._probation[candidate] = size
+                self._main_size += size
+                continue
+            _: Tuple[Any, Any] = self.popitem()
+
+
+class _TimedCache(Cache):
+    """ Shared ttl of the ARC and 2Q regions. As in TTLCache the expired entries are hidden at once
+        and removed on the next write.
+    """
+
+    def __init__(self, maxsize: float, getsizeof: Optional[Callable[[Any], float]] = None,
+                 ttl: Optional[float] = None, timer: Callable[[], float] = time.monotonic) -> None:
+        Cache.__init__(self, maxsize, getsizeof)
+        self._ttl: Optional[float] = ttl
+        self._timer: Callable[[], float] = timer
+        # one ttl for every key, so the write order is also the expiry order
+        self._expires: collections.OrderedDict = collections.OrderedDict()
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl
+
+    def _stamp(self, key: Any) -> None:
+        if self._ttl:
+            self._expires[key] = self._timer() + self._ttl
+            self._expires.move_to_end(key)
+
+    def _expired(self, key: Any) -> bool:
+        if not self._ttl:
+            return False
+        expiry: Optional[float] = self._expires.get(key)
+        return expiry is not None and self._timer() >= expiry
+
+    def __contains__(self, key: Any) -> bool:
+        return Cache.__contains__(self, key) and not self._expired(key)
+
+    def __getitem__(self, key: Any, cache_getitem: Callable[[Cache, Any], Any] = Cache.__getitem__) -> Any:
+        if self._expired(key):
+            return self.__missing__(key)
+        return cache_getitem(self, key)
+
+    def __delitem__(self, key: Any, cache_delitem: Callable[[Cache, Any], None] = Cache.__delitem__) -> None:
+        cache_delitem(self, key)
+        self._expires.pop(key, None)
+
+    def expire(self) -> List[Tuple[Any, Any]]:
+        """ Remove and return the expired (key, value) pairs """
+        expired: List[Tuple[Any, Any]] = []
+        now: float = self._timer()
+        while self._expires:
+            key: Any
+            expiry: float
+            key, expiry = next(iter(self._expires.items()))
+            if expiry > now:
+                break
+            value: Any = Cache.__getitem__(self, key)
+            del self[key]
+            expired.append((key, value))
+        return expired
+
+
+class ARCCache(_TimedCache):
+    """ Adaptive Replacement Cache: T1 keeps the keys seen once and T2 the keys seen again, the
+        ghost lists B1 and B2 remember their recent victims. A ghost hit moves the target size p of
+        T1 towards the list that would have kept the key, so the split follows the workload.
+    """
+
+    def __init__(self, maxsize: float, getsizeof: Optional[Callable[[Any], float]] = None,
+                 ttl: Optional[float] = None, timer: Callable[[], float] = time.monotonic) -> None:
+        _TimedCache.__init__(self, maxsize, getsizeof, ttl, timer)
+        self._t1: collections.OrderedDict = collections.OrderedDict()
+        self._t2: collections.OrderedDict = collections.OrderedDict()
+        self._b1: collections.OrderedDict = collections.OrderedDict()
+        self._b2: collections.OrderedDict = collections.OrderedDict()
+        self._t1_size: float = 0
+        self._t2_size: float = 0
+        self._b1_size: float = 0
+        self._b2_size: float = 0
+        self._p: float = 0
+        self._from_b2: bool = False
+
+    @property
+    def target(self) -> float:
+        """ adaptive target size of T1 """
+        return self._p
+
+    def __getitem__(self, key: Any,
+                    cache_getitem: Callable[[Cache, Any], Any] = _TimedCache.__getitem__) -> Any:
+        value: Any = cache_getitem(self, key)
+        self._promote(key)
+        return value
+
+    def __setitem__(self, key: Any, value: Any,
+                    cache_setitem: Callable[[Cache, Any, Any], None] = Cache.__setitem__) -> None:
+        self.expire()
+        size: float = self.getsizeof(value)
+        if key in self._t1 or key in self._t2:
+            cache_setitem(self, key, value)
+            if key in self._t1 or key in self._t2:
+                self._promote(key, size)
+            else:
+                # growing the value evicted the key itself, popitem left it in a ghost list
+                self._forget_ghost(key)
+                self._t1[key] = size
+                self._t1_size += size
+                self._trim_ghosts()
+        else:
+            if key in self._b1:
+                self._p = min(self.maxsize, self._p + max(self._b2_size / self._b1_size, 1) * size)
+                self._b1_size -= self._b1.pop(key)
+                ghost: bool = True
+            elif key in self._b2:
+                self._p = max(0, self._p - max(self._b1_size / self._b2_size, 1) * size)
+                self._b2_size -= self._b2.pop(key)
+                self._from_b2 = True
+                ghost = True
+            else:
+                ghost = False
+            try:
+                cache_setitem(self, key, value)
+            finally:
+                self._from_b2 = False
+            if ghost:
+                self._t2[key] = size
+                self._t2_size += size
+            else:
+                self._t1[key] = size
+                self._t1_size += size
+            self._trim_ghosts()
+        self._stamp(key)
+
+    def __delitem__(self, key: Any,
+                    cache_delitem: Callable[[Cache, Any], None] = _TimedCache.__delitem__) -> None:
+        cache_delitem(self, key)
+        if key in self._t1:
+            self._t1_size -= self._t1.pop(key)
+        else:
+            self._t2_size -= self._t2.pop(key)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        """ Remove the LRU key of T1 or T2 following the target size, its key becomes a ghost """
+        if not self._t1 and not self._t2:
+            raise KeyError(f"{type(self).__name__} is empty")
+        if self._t1 and (not self._t2 or self._t1_size > self._p
+                         or (self._from_b2 and self._t1_size >= self._p)):
+            key: Any = next(iter(self._t1))
+            size: float = self._t1[key]
+            value: Any = Cache.__getitem__(self, key)
+            del self[key]
+            self._b1[key] = size
+            self._b1_size += size
+        else:
+            key = next(iter(self._t2))
+            size = self._t2[key]
+            value = Cache.__getitem__(self, key)
+            del self[key]
+            self._b2[key] = size
+            self._b2_size += size
+        return key, value
+
+    def _promote(self, key: Any, size: Optional[float] = None) -> None:
+        if key in self._t1:
+            previous: float = self._t1.pop(key)
+            self._t1_size -= previous
+        else:
+            previous = self._t2.pop(key)
+            self._t2_size -= previous
+        size = previous if size is None else size
+        self._t2[key] = size
+        self._t2_size += size
+
+    def _forget_ghost(self, key: Any) -> None:
+        if key in self._b1:
+            self._b1_size -= self._b1.pop(key)
+        elif key in self._b2:
+            self._b2_size -= self._b2.pop(key)
+
+    def _trim_ghosts(self) -> None:
+        while self._b1 and self._t1_size + self._b1_size > self.maxsize:
+            self._b1_size -= self._b1.popitem(last=False)[1]
+        while self._b2 and self._t1_size + self._t2_size + self._b1_size + self._b2_size > 2 * self.maxsize:
+            self._b2_size -= self._b2.popitem(last=False)[1]
+
+
+class TwoQCache(_TimedCache):
+    """ 2Q: new keys wait in the FIFO A1in, keys asked again after leaving it are remembered by the
+        ghost queue A1out and go to the LRU Am. One pass scans only churn A1in.
+    """
+
+    def __init__(self, maxsize: float, getsizeof: Optional[Callable[[Any], float]] = None,
+                 ttl: Optional[float] = None, timer: Callable[[], float] = time.monotonic) -> None:
+        _TimedCache.__init__(self, maxsize, getsizeof, ttl, timer)
+        self._a1in: collections.OrderedDict = collections.OrderedDict()
+        self._a1out: collections.OrderedDict = collections.OrderedDict()
+        self._am: collections.OrderedDict = collections.OrderedDict()
+        self._a1in_size: float = 0
+        self._a1out_size: float = 0
+        self._in_max: float = max(1, maxsize * TWO_Q_IN_RATIO)
+        self._out_max: float = max(1, maxsize * TWO_Q_OUT_RATIO)
+
+    def __getitem__(self, key: Any,
+                    cache_getitem: Callable[[Cache, Any], Any] = _TimedCache.__getitem__) -> Any:
+        value: Any = cache_getitem(self, key)
+        if key in self._am:
+            self._am.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Any, value: Any,
+                    cache_setitem: Callable[[Cache, Any, Any], None] = Cache.__setitem__) -> None:
+        self.expire()
+        size: float = self.getsizeof(value)
+        if key in self._am or key in self._a1in:
+            cache_setitem(self, key, value)
+            if key in self._am:
+                self._am[key] = size
+                self._am.move_to_end(key)
+            elif key in self._a1in:
+                self._a1in_size += size - self._a1in[key]
+                self._a1in[key] = size
+            else:
+                # growing the value evicted the key itself, it is stored again as a new key
+                if key in self._a1out:
+                    self._a1out_size -= self._a1out.pop(key)
+                self._a1in[key] = size
+                self._a1in_size += size
+        else:
+            remembered: bool = key in self._a1out
+            if remembered:
+                self._a1out_size -= self._a1out.pop(key)
+            cache_setitem(self, key, value)
+            if remembered:
+                self._am[key] = size
+            else:
+                self._a1in[key] = size
+                self._a1in_size += size
+        self._stamp(key)
+
+    def __delitem__(self, key: Any,
+                    cache_delitem: Callable[[Cache, Any], None] = _TimedCache.__delitem__) -> None:
+        cache_delitem(self, key)
+        if key in self._a1in:
+            self._a1in_size -= self._a1in.pop(key)
+        else:
+            del self._am[key]
+
+    def popitem(self) -> Tuple[Any, Any]:
+        """ Remove the head of A1in while it is over its share, the LRU key of Am otherwise """
+        if not self._a1in and not self._am:
+            raise KeyError(f"{type(self).__name__} is empty")
+        if self._a1in and (self._a1in_size > self._in_max or not self._am):
+            key: Any = next(iter(self._a1in))
+            size: float = self._a1in[key]
+            value: Any = Cache.__getitem__(self, key)
+            del self[key]
+            self._a1out[key] = size
+            self._a1out_size += size
+            while self._a1out_size > self._out_max:
+                self._a1out_size -= self._a1out.popitem(last=False)[1]
+            return key, value
+        key = next(iter(self._am))
+        value = Cache.__getitem__(self, key)
+        del self[key]
+        return key, value
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, Final, Coroutine
+
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import SerializableData, Strategy
+from cache.singleflight import SyncSingleFlight
+
+DEFAULT_BETA: float = 1.0
+REFRESH_WORKERS: Final[int] = 4
+
+# entry_state results
+HIT: Final[int] = 0
+COMPUTE: Final[int] = 1
+REVALIDATE: Final[int] = 2
+
+# memory regions that drop every entry at the ttl of the alias, whatever the ttl of the put
+EXPIRING_STRATEGIES: Final[Tuple[str, ...]] = (Strategy.TTL, Strategy.TLRU)
+
+_logger: logging.Logger = logging.getLogger(__name__)
+_refresh_tasks: Set[asyncio.Task] = set()
+_refresh_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS,
+                                                           thread_name_prefix="fwkcache-refresh")
+# (flight, key) of the sync refreshes queued or running, a busy pool must not queue a key twice
+_pending_refreshes: Set[Tuple[SyncSingleFlight, Hashable]] = set()
+_pending_lock: threading.Lock = threading.Lock()
+
+
+class CachedEntry:
+    """ Value stored by the decorators together with the metadata of its last computation.
+        delta is the compute duration in seconds and expiry the wall clock deadline, shared
+        by every worker reading the same remote entry.
+    """
+
+    __slots__ = ("value", "delta", "expiry")
+
+    def __init__(self, value: SerializableData, delta: float, expiry: Optional[float]) -> None:
+        self.value: SerializableData = value
+        self.delta: float = delta
+        self.expiry: Optional[float] = expiry
+
+    def __getstate__(self) -> Tuple[SerializableData, float, Optional[float]]:
+        return self.value, self.delta, self.expiry
+
+    def __setstate__(self, state: Tuple[SerializableData, float, Optional[float]]) -> None:
+        self.value, self.delta, self.expiry = state
+
+    def __repr__(self) -> str:
+        return f"CachedEntry(value={self.value!r}, delta={self.delta}, expiry={self.expiry})"
+
+    def should_refresh(self, beta: float = DEFAULT_BETA, now: Optional[float] = None) -> bool:
+        """ XFetch: refresh early with a probability that grows as the expiry gets closer """
+        if self.expiry is None:
+            return False
+        if now is None:
+            now = time.time()
+        # 1 - random() lies in (0, 1] so the logarithm is always defined
+        return now - self.delta * beta * math.log(1.0 - random.random()) >= self.expiry
+
+
+def entry_ttl(fwk_cache: Any) -> Optional[float]:
+    return getattr(fwk_cache, "_ttl", None)
+
+
+def _expiry(ttl: Optional[float]) -> Optional[float]:
+    if not ttl:
+        return None
+    return time.time() + ttl
+
+
+async def async_compute_entry(func: Callable[..., Awaitable[Any]], args: Tuple[Any, ...],
+                              kwargs: Dict[str, Any], ttl: Optional[float]) -> CachedEntry:
+    start: float = time.perf_counter()
+    value: SerializableData = await func(*args, **kwargs)
+    return CachedEntry(value, time.perf_counter() - start, _expiry(ttl))
+
+
+def sync_compute_entry(func: Callable[..., Any], args: Tuple[Any, ...],
+                       kwargs: Dict[str, Any], ttl: Optional[float]) -> CachedEntry:
+    start: float = time.perf_counter()
+    value: SerializableData = func(*args, **kwargs)
+    return CachedEntry(value, time.perf_counter() - start, _expiry(ttl))
+
+
+def negative_entry(negative_ttl: float, delta: float = 0.0) -> CachedEntry:
+    """ Entry of a None result, it expires after negative_ttl instead of the ttl of the alias """
+    return CachedEntry(None, delta, _expiry(negative_ttl))
+
+
+def storage_ttl(ttl: Optional[float], stale_ttl: Optional[float]) -> Optional[int]:
+    """ Backend ttl of an entry, it has to outlive the fresh ttl for the stale window """
+    if not ttl or not stale_ttl:
+        return None
+    return int(math.ceil(ttl + stale_ttl))
+
+
+def check_stale_ttl(alias: str, strategy: Optional[str], stale_ttl: Optional[float]) -> None:
+    """ the stale window starts when the entry expires, a region that drops it then never serves it """
+    if stale_ttl and strategy in EXPIRING_STRATEGIES:
+        raise ConfigurationError(f"stale_ttl is not supported by the {strategy} strategy of the alias "
+                                 f"{alias}, its entries are removed when the ttl of the alias ends")
+
+
+def entry_state(stored: Any, beta: float, early_refresh: bool, stale_ttl: Optional[float],
+                in_flight: bool, now: Optional[float] = None) -> int:
+    """ HIT when the stored value can be served, COMPUTE when the caller has to compute it and
+        REVALIDATE when the stale value is served while a background refresh rewrites it.
+    """
+    if not isinstance(stored, CachedEntry):
+        return COMPUTE
+    if stored.expiry is None:
+        return HIT
+    if now is None:
+        now = time.time()
+    if now >= stored.expiry:
+        if stale_ttl and now < stored.expiry + stale_ttl:
+            return HIT if in_flight else REVALIDATE
+        return COMPUTE
+    if early_refresh and not in_flight and stored.should_refresh(beta, now):
+        return COMPUTE
+    return HIT
+
+
+def revalidate_async(refresh: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    task: asyncio.Task = asyncio.get_running_loop().create_task(refresh)
+    # the event loop only keeps weak references to its tasks
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_done)
+    return task
+
+
+def revalidate_sync(flight: SyncSingleFlight, key: Hashable, refresh: Callable[[], Any]) -> Optional[Future]:
+    """ refreshes the key in the pool through the flight, None when a refresh of it is already
+        queued or running
+    """
+    pending: Tuple[SyncSingleFlight, Hashable] = (flight, key)
+    with _pending_lock:
+        if pending in _pending_refreshes:
+            return None
+        _pending_refreshes.add(pending)
+    try:
+        future: Future = _refresh_executor.submit(flight.run, key, refresh)
+    except BaseException:
+        with _pending_lock:
+            _pending_refreshes.discard(pending)
+        raise
+    future.add_done_callback(lambda done: _refresh_done(done, pending))
+    return future
+
+
+def _refresh_done(future: Any, pending: Optional[Tuple[SyncSingleFlight, Hashable]] = None) -> None:
+    _refresh_tasks.discard(future)
+    if pending is not None:
+        with _pending_lock:
+            _pending_refreshes.discard(pending)
+    if future.cancelled():
+        return None
+    exc: Optional[BaseException] = future.exception()
+    if exc is not None:
+        _logger.warning("Background cache refresh failed: %r", exc)
+    return None
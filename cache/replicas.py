@@ -0,0 +1,74 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Final, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+from cache.exceptions import ConfigurationError
+
+C = TypeVar("C")
+
+ROUND_ROBIN: Final[str] = "round_robin"
+LEAST_OUTSTANDING: Final[str] = "least_outstanding"
+READ_STRATEGIES: Final[List[str]] = [ROUND_ROBIN, LEAST_OUTSTANDING]
+
+
+class ReadRouter(Generic[C]):
+    """ Chooses the replica of every read. round_robin takes the replicas in turn and
+        least_outstanding the one with fewer reads in flight. With a read_your_writes window the keys
+        written by this process are read from the primary for that many seconds, pick returns None
+        for them.
+    """
+
+    def __init__(self, replicas: List[C], strategy: str = ROUND_ROBIN, read_your_writes: float = 0.0) -> None:
+        if not replicas:
+            raise ConfigurationError("A read router needs at least one replica")
+        if strategy not in READ_STRATEGIES:
+            raise ConfigurationError(f"The read strategy {strategy} is not implemented, "
+                                     f"use one of {READ_STRATEGIES}")
+        self._replicas: List[C] = replicas
+        self._strategy: str = strategy
+        # the counters are not locked, least_outstanding only needs an estimate
+        self._outstanding: List[int] = [0] * len(replicas)
+        self._turn: Iterator[int] = itertools.count()
+        self._window: float = read_your_writes
+        # key -> end of its window, the windows have the same length so the first one ends first
+        self._pinned: OrderedDict = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    @property
+    def replicas(self) -> List[C]:
+        return list(self._replicas)
+
+    def pick(self, ns_keys: Iterable[str]) -> Optional[int]:
+        """ replica of the read, None when one of the keys has to be read from the primary """
+        if self._pinned:
+            now: float = time.monotonic()
+            if any(self._pinned.get(ns_key, 0.0) > now for ns_key in ns_keys):
+                return None
+        if self._strategy == ROUND_ROBIN:
+            return next(self._turn) % len(self._replicas)
+        return min(range(len(self._replicas)), key=self._outstanding.__getitem__)
+
+    def client(self, replica: int) -> C:
+        return self._replicas[replica]
+
+    def begin(self, replica: int) -> None:
+        self._outstanding[replica] += 1
+
+    def end(self, replica: int) -> None:
+        self._outstanding[replica] -= 1
+
+    def written(self, ns_keys: Iterable[str]) -> None:
+        if not self._window:
+            return None
+        now: float = time.monotonic()
+        with self._lock:
+            for ns_key in ns_keys:
+                self._pinned[ns_key] = now + self._window
+                self._pinned.move_to_end(ns_key)
+            while self._pinned:
+                ns_key, deadline = next(iter(self._pinned.items()))
+                if deadline > now:
+                    break
+                del self._pinned[ns_key]
@@ -0,0 +1,86 @@
+import threading
+from typing import Any, Callable, Iterator, List, MutableMapping, Optional, Tuple
+
+from cache.exceptions import ConfigurationError
+
+_MISSING: Any = object()
+
+
+class SegmentedCache(MutableMapping):
+    """ Memory region split in independently locked segments, the segment of a key is chosen by
+        its hash. Every segment is a cachetools region with the strategy of the alias and evicts
+        on its own, so the region holds at most shards * the max_size of a segment.
+    """
+
+    def __init__(self, shards: int, segment_factory: Callable[[], MutableMapping]) -> None:
+        if shards < 1:
+            raise ConfigurationError("A segmented memory region needs at least one shard")
+        self._segments: Tuple[Tuple[threading.Lock, MutableMapping], ...] = tuple(
+            (threading.Lock(), segment_factory()) for _ in range(shards))
+        self._shards: int = shards
+
+    def _segment(self, key: Any) -> Tuple[threading.Lock, MutableMapping]:
+        return self._segments[hash(key) % self._shards]
+
+    @property
+    def shards(self) -> int:
+        return self._shards
+
+    @property
+    def maxsize(self) -> float:
+        return sum(segment.maxsize for _, segment in self._segments)
+
+    @property
+    def currsize(self) -> float:
+        return sum(segment.currsize for _, segment in self._segments)
+
+    def __getitem__(self, key: Any) -> Any:
+        lock, segment = self._segment(key)
+        with lock:
+            return segment[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        lock, segment = self._segment(key)
+        with lock:
+            segment[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        lock, segment = self._segment(key)
+        with lock:
+            del segment[key]
+
+    def __contains__(self, key: Any) -> bool:
+        lock, segment = self._segment(key)
+        with lock:
+            return key in segment
+
+    def get(self, key: Any, default: Optional[Any] = None) -> Any:
+        lock, segment = self._segment(key)
+        with lock:
+            return segment.get(key, default)
+
+    def pop(self, key: Any, default: Any = _MISSING) -> Any:
+        lock, segment = self._segment(key)
+        with lock:
+            if default is _MISSING:
+                return segment.pop(key)
+            return segment.pop(key, default)
+
+    def clear(self) -> None:
+        for lock, segment in self._segments:
+            with lock:
+                segment.clear()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for _, segment in self._segments)
+
+    def __iter__(self) -> Iterator[Any]:
+        # each segment is copied under its lock, the iteration never sees a region being resized
+        for lock, segment in self._segments:
+            with lock:
+                keys: List[Any] = list(segment)
+            yield from keys
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(shards={self._shards}, currsize={self.currsize}, " \
+               f"maxsize={self.maxsize})"
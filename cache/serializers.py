@@ -0,0 +1,178 @@
+import json
+import pickle
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Union, Type, Final
+
+import ujson
+
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import SerializableData
+from cache.refresh import CachedEntry
+
+try:
+    import msgpack
+except ImportError:
+    # msgpack is optional, the serializer raises a ConfigurationError when it is selected
+    msgpack = None
+
+Buffer = Union[bytes, bytearray, memoryview]
+SerializerConfig = Union[None, str, Dict[str, Any]]
+
+# pickle streams written with protocol >= 2 start with the PROTO opcode, values stored before
+# the format tag existed are recognised by it
+LEGACY_PICKLE_TAG: Final[int] = 0x80
+DEFAULT_SERIALIZER: Final[str] = "pickle"
+# json and msgpack only know plain types, the CachedEntry values of the decorators travel as
+# a one key mapping holding value, delta and expiry
+ENTRY_MARKER: Final[str] = "__fwkcache_entry__"
+
+
+class Serializer(ABC):
+    """ Each stored value is prefixed with the one byte TAG of the format that wrote it """
+    TAG: int = 0
+    NAME: str = ""
+
+    @abstractmethod
+    def dumps(self, value: SerializableData) -> bytes:
+        """ dumps """
+        pass
+
+    @abstractmethod
+    def loads(self, payload: Buffer) -> SerializableData:
+        """ loads """
+        pass
+
+    def encode(self, value: SerializableData) -> bytes:
+        return bytes((self.TAG,)) + self.dumps(value)
+
+
+def _pack_entry(value: SerializableData) -> SerializableData:
+    if isinstance(value, CachedEntry):
+        return {ENTRY_MARKER: [value.value, value.delta, value.expiry]}
+    return value
+
+
+def _unpack_entry(value: SerializableData) -> SerializableData:
+    if isinstance(value, dict) and len(value) == 1 and ENTRY_MARKER in value:
+        return CachedEntry(*value[ENTRY_MARKER])
+    return value
+
+
+class PickleSerializer(Serializer):
+    TAG: int = 0x01
+    NAME: str = "pickle"
+
+    def __init__(self, protocol: int = pickle.HIGHEST_PROTOCOL) -> None:
+        if not 2 <= protocol <= pickle.HIGHEST_PROTOCOL:
+            raise ConfigurationError(f"The pickle protocol must be between 2 and "
+                                     f"{pickle.HIGHEST_PROTOCOL}")
+        self._protocol: int = protocol
+
+    def dumps(self, value: SerializableData) -> bytes:
+        return pickle.dumps(value, protocol=self._protocol)
+
+    def loads(self, payload: Buffer) -> SerializableData:
+        return pickle.loads(payload, encoding="utf-8")
+
+
+class JsonSerializer(Serializer):
+    TAG: int = 0x02
+    NAME: str = "json"
+
+    def dumps(self, value: SerializableData) -> bytes:
+        return json.dumps(_pack_entry(value), separators=(",", ":")).encode("utf-8")
+
+    def loads(self, payload: Buffer) -> SerializableData:
+        return _unpack_entry(json.loads(bytes(payload)))
+
+
+class UJsonSerializer(JsonSerializer):
+    """ Same wire format as JsonSerializer, encoded and decoded with ujson """
+    NAME: str = "ujson"
+
+    def dumps(self, value: SerializableData) -> bytes:
+        return ujson.dumps(_pack_entry(value), ensure_ascii=False).encode("utf-8")
+
+    def loads(self, payload: Buffer) -> SerializableData:
+        return _unpack_entry(ujson.loads(bytes(payload)))
+
+
+class RawSerializer(Serializer):
+    TAG: int = 0x03
+    NAME: str = "raw"
+
+    def dumps(self, value: SerializableData) -> bytes:
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError(f"The raw serializer only stores bytes, not {type(value).__name__}")
+        return bytes(value)
+
+    def loads(self, payload: Buffer) -> SerializableData:
+        return bytes(payload)
+
+
+class MsgpackSerializer(Serializer):
+    TAG: int = 0x04
+    NAME: str = "msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise ConfigurationError("The msgpack serializer needs the msgpack package")
+
+    def dumps(self, value: SerializableData) -> bytes:
+        return msgpack.packb(_pack_entry(value), use_bin_type=True)
+
+    def loads(self, payload: Buffer) -> SerializableData:
+        return _unpack_entry(msgpack.unpackb(payload, raw=False))
+
+
+SERIALIZERS: Final[Dict[str, Type[Serializer]]] = {
+    PickleSerializer.NAME: PickleSerializer,
+    JsonSerializer.NAME: JsonSerializer,
+    UJsonSerializer.NAME: UJsonSerializer,
+    RawSerializer.NAME: RawSerializer,
+    MsgpackSerializer.NAME: MsgpackSerializer,
+}
+
+# the reader only needs one decoder per wire format
+_DECODERS: Dict[int, Serializer] = {}
+
+
+def get_serializer(config: SerializerConfig = None) -> Serializer:
+    """ config is a serializer name or a dict with a 'name' and its options,
+        for example {'name': 'pickle', 'protocol': 4}
+    """
+    if config is None:
+        config = DEFAULT_SERIALIZER
+    options: Dict[str, Any] = {"name": config} if isinstance(config, str) else dict(config)
+    name: str = options.pop("name", DEFAULT_SERIALIZER)
+    try:
+        serializer_class: Type[Serializer] = SERIALIZERS[name]
+    except KeyError:
+        raise ConfigurationError(f"The serializer {name} is not implemented, "
+                                 f"use one of {list(SERIALIZERS)}")
+    try:
+        return serializer_class(**options)
+    except TypeError as exc:
+        raise ConfigurationError(f"Wrong options for the serializer {name}: {exc}")
+
+
+def decode(data: Buffer) -> SerializableData:
+    """ Detects the format from the tag, so values written by different serializers coexist """
+    tag: int = data[0]
+    if tag == LEGACY_PICKLE_TAG:
+        return pickle.loads(data, encoding="utf-8")
+    try:
+        decoder: Serializer = _DECODERS[tag]
+    except KeyError:
+        raise ValueError(f"Unknown serialization tag {tag:#04x}")
+    return decoder.loads(memoryview(data)[1:])
+
+
+def _register_decoders() -> None:
+    for serializer_class in (PickleSerializer, UJsonSerializer, RawSerializer):
+        _DECODERS[serializer_class.TAG] = serializer_class()
+    if msgpack is not None:
+        _DECODERS[MsgpackSerializer.TAG] = MsgpackSerializer()
+
+
+_register_decoders()
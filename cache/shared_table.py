@@ -0,0 +1,310 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Any, Final, Iterator, List, Optional, Tuple
+
+from cache.exceptions import ConfigurationError
+
+MAGIC: Final[bytes] = b"FWKSHM01"
+LAYOUT_VERSION: Final[int] = 2
+BUCKET_SLOTS: Final[int] = 8
+LOCK_STRIPES: Final[int] = 64
+SEQLOCK_RETRIES: Final[int] = 64
+HEADER_SIZE: Final[int] = 64
+SLOT_HEADER_SIZE: Final[int] = 32
+MAX_KEY_LENGTH: Final[int] = 0xFFFF
+
+# magic, layout version, slots, slot size, slots per bucket
+_TABLE_HEADER: Final[struct.Struct] = struct.Struct("<8sIIII")
+# every slot starts with its sequence, odd while a writer is changing the slot
+_SEQ: Final[struct.Struct] = struct.Struct("<I")
+# state, reference bit, key length, value length, key hash, expiry (0 without ttl), crc32 of the key
+# and the value
+_SLOT_FIELDS: Final[struct.Struct] = struct.Struct("<BBHIQdI")
+_REF_OFFSET: Final[int] = _SEQ.size + 1
+_EMPTY: Final[int] = 0
+_USED: Final[int] = 1
+_BUSY: Any = object()
+
+
+def shared_path(name: str) -> str:
+    """ /dev/shm keeps the segment in memory, the temp dir is the fallback of other systems """
+    directory: str = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, name)
+
+
+def key_hash(key: bytes) -> int:
+    return int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedTable:
+    """ Fixed size hash table in a file mapped by every worker of the host. The slots are grouped in
+        buckets of BUCKET_SLOTS and a key only lives in the bucket of its hash, a full bucket evicts
+        with CLOCK. Writers hold the stripe of the bucket, a thread lock and a fcntl lock on one byte
+        of the file, and flip the sequence of the slot around the write. Readers take no lock, they
+        retry while the sequence is odd or changed under them and lock after SEQLOCK_RETRIES.
+    """
+
+    def __init__(self, path: str, slots: int, slot_size: int) -> None:
+        if slots < 1:
+            raise ConfigurationError("A shared table needs at least one slot")
+        if slot_size <= SLOT_HEADER_SIZE:
+            raise ConfigurationError(f"The slot size must be over the {SLOT_HEADER_SIZE} bytes "
+                                     f"of the slot header")
+        self._path: str = path
+        self._buckets: int = -(-slots // BUCKET_SLOTS)
+        self._slots: int = self._buckets * BUCKET_SLOTS
+        # slots start on 8 bytes boundaries, the sequence is never split between two words
+        self._slot_size: int = -(-slot_size // 8) * 8
+        self._hands_offset: int = HEADER_SIZE
+        self._slots_offset: int = HEADER_SIZE + -(-self._buckets // HEADER_SIZE) * HEADER_SIZE
+        self._size: int = self._slots_offset + self._slots * self._slot_size
+        self._stripes: int = min(LOCK_STRIPES, self._buckets)
+        # fcntl locks belong to the process, the threads of a worker also need their own lock
+        self._thread_locks: List[threading.Lock] = [threading.Lock() for _ in range(self._stripes)]
+        self._fd: int = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._map: mmap.mmap = self._attach()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    @property
+    def slot_size(self) -> int:
+        return self._slot_size
+
+    @property
+    def capacity(self) -> int:
+        """ largest key plus value a slot holds """
+        return self._slot_size - SLOT_HEADER_SIZE
+
+    def _attach(self) -> mmap.mmap:
+        # the first worker sizes the file and writes the header, the others check its geometry
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, self._size)
+                segment: mmap.mmap = mmap.mmap(self._fd, self._size)
+                _TABLE_HEADER.pack_into(segment, 0, MAGIC, LAYOUT_VERSION, self._slots,
+                                        self._slot_size, BUCKET_SLOTS)
+                return segment
+            segment = mmap.mmap(self._fd, 0)
+            magic, version, slots, slot_size, bucket_slots = _TABLE_HEADER.unpack_from(segment, 0)
+            if (magic, version, slots, slot_size, bucket_slots, len(segment)) != (
+                    MAGIC, LAYOUT_VERSION, self._slots, self._slot_size, BUCKET_SLOTS, self._size):
+                segment.close()
+                raise ConfigurationError(f"The shared segment {self._path} was created with another "
+                                         f"layout, remove it or use another name")
+            return segment
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _bucket(self, hashed: int) -> int:
+        return hashed % self._buckets
+
+    def _slot_offset(self, bucket: int, position: int) -> int:
+        return self._slots_offset + (bucket * BUCKET_SLOTS + position) * self._slot_size
+
+    @contextmanager
+    def _locked(self, bucket: int) -> Iterator[None]:
+        stripe: int = bucket % self._stripes
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+
+    def _match(self, offset: int, hashed: int, key: bytes, now: float) -> Optional[bytes]:
+        """ value of the slot when it holds the key and has not expired, read without any lock """
+        state, _, key_length, value_length, slot_hash, expiry, _ = _SLOT_FIELDS.unpack_from(
+            self._map, offset + _SEQ.size)
+        if state != _USED or slot_hash != hashed or key_length != len(key):
+            return None
+        if expiry and expiry <= now:
+            return None
+        start: int = offset + SLOT_HEADER_SIZE
+        if self._map[start:start + key_length] != key:
+            return None
+        start += key_length
+        # a torn length is caught by the sequence, the slice never leaves the mapping
+        return self._map[start:start + value_length]
+
+    def _read(self, offset: int, hashed: int, key: bytes, now: float) -> Any:
+        """ _BUSY when a writer held the slot for every retry """
+        segment: mmap.mmap = self._map
+        for _ in range(SEQLOCK_RETRIES):
+            sequence: int = _SEQ.unpack_from(segment, offset)[0]
+            if sequence & 1:
+                continue
+            value: Optional[bytes] = self._match(offset, hashed, key, now)
+            if _SEQ.unpack_from(segment, offset)[0] == sequence:
+                return value
+        return _BUSY
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """ stored bytes of the key, None when it is missing or expired """
+        hashed: int = key_hash(key)
+        bucket: int = self._bucket(hashed)
+        now: float = time.time()
+        busy: bool = False
+        for position in range(BUCKET_SLOTS):
+            offset: int = self._slot_offset(bucket, position)
+            value: Any = self._read(offset, hashed, key, now)
+            if value is _BUSY:
+                busy = True
+            elif value is not None:
+                if not self._map[offset + _REF_OFFSET]:
+                    # CLOCK only needs a hint, the reference bit is set without the lock
+                    self._map[offset + _REF_OFFSET] = 1
+                return value
+        if not busy:
+            return None
+        # a writer kept a slot busy for every retry or died in it, the locked read checks the crc
+        with self._locked(bucket):
+            return self._find_value(bucket, hashed, key, now)
+
+    def _find_value(self, bucket: int, hashed: int, key: bytes, now: float) -> Optional[bytes]:
+        """ value of the key read under the lock of the bucket, the slot left torn by a writer that
+            died is emptied instead of returned
+        """
+        for position in range(BUCKET_SLOTS):
+            offset: int = self._slot_offset(bucket, position)
+            value: Optional[bytes] = self._match(offset, hashed, key, now)
+            if value is None:
+                continue
+            crc: int = _SLOT_FIELDS.unpack_from(self._map, offset + _SEQ.size)[6]
+            if crc == zlib.crc32(value, zlib.crc32(key)):
+                return value
+            self._write(offset, _EMPTY, 0, b"", b"", 0.0)
+        return None
+
+    def _find(self, bucket: int, hashed: int, key: bytes) -> Optional[int]:
+        for position in range(BUCKET_SLOTS):
+            offset: int = self._slot_offset(bucket, position)
+            state, _, key_length, _, slot_hash, _, _ = _SLOT_FIELDS.unpack_from(self._map,
+                                                                                offset + _SEQ.size)
+            if state == _USED and slot_hash == hashed and key_length == len(key):
+                start: int = offset + SLOT_HEADER_SIZE
+                if self._map[start:start + key_length] == key:
+                    return offset
+        return None
+
+    def _victim(self, bucket: int, now: float) -> int:
+        """ empty or expired slot of the bucket, CLOCK picks one when every slot is live """
+        for position in range(BUCKET_SLOTS):
+            offset: int = self._slot_offset(bucket, position)
+            state, _, _, _, _, expiry, _ = _SLOT_FIELDS.unpack_from(self._map, offset + _SEQ.size)
+            if state != _USED or (expiry and expiry <= now):
+                return offset
+        hand_offset: int = self._hands_offset + bucket
+        hand: int = self._map[hand_offset]
+        # two turns at most, the first one clears every reference bit
+        for _ in range(2 * BUCKET_SLOTS):
+            offset = self._slot_offset(bucket, hand)
+            hand = (hand + 1) % BUCKET_SLOTS
+            if not self._map[offset + _REF_OFFSET]:
+                break
+            self._map[offset + _REF_OFFSET] = 0
+        self._map[hand_offset] = hand
+        return offset
+
+    def _write(self, offset: int, state: int, hashed: int, key: bytes, value: bytes,
+               expiry: float) -> None:
+        segment: mmap.mmap = self._map
+        # forced odd, a writer that died mid write left an odd sequence and must not invert the parity
+        sequence: int = _SEQ.unpack_from(segment, offset)[0] | 1
+        _SEQ.pack_into(segment, offset, sequence)
+        start: int = offset + SLOT_HEADER_SIZE
+        segment[start:start + len(key)] = key
+        segment[start + len(key):start + len(key) + len(value)] = value
+        _SLOT_FIELDS.pack_into(segment, offset + _SEQ.size, state, 1, len(key), len(value), hashed,
+                               expiry, zlib.crc32(value, zlib.crc32(key)))
+        # the sequence is written last, a reader never sees an even sequence with torn fields
+        _SEQ.pack_into(segment, offset, (sequence + 1) & 0xFFFFFFFF)
+
+    def put(self, key: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        """ False when the key and the value do not fit in a slot, the previous value is dropped """
+        hashed: int = key_hash(key)
+        bucket: int = self._bucket(hashed)
+        fits: bool = len(key) <= MAX_KEY_LENGTH and len(key) + len(value) <= self.capacity
+        now: float = time.time()
+        with self._locked(bucket):
+            offset: Optional[int] = self._find(bucket, hashed, key)
+            if not fits:
+                if offset is not None:
+                    self._write(offset, _EMPTY, 0, b"", b"", 0.0)
+                return False
+            if offset is None:
+                offset = self._victim(bucket, now)
+            self._write(offset, _USED, hashed, key, value, now + ttl if ttl else 0.0)
+        return True
+
+    def delete(self, key: bytes) -> bool:
+        hashed: int = key_hash(key)
+        bucket: int = self._bucket(hashed)
+        with self._locked(bucket):
+            offset: Optional[int] = self._find(bucket, hashed, key)
+            if offset is None:
+                return False
+            live: bool = self._find_value(bucket, hashed, key, time.time()) is not None
+            self._write(offset, _EMPTY, 0, b"", b"", 0.0)
+        return live
+
+    def _keys(self, bucket: int) -> Iterator[Tuple[int, bytes]]:
+        """ offset and key of the used slots of the bucket """
+        for position in range(BUCKET_SLOTS):
+            offset: int = self._slot_offset(bucket, position)
+            state, _, key_length, _, _, _, _ = _SLOT_FIELDS.unpack_from(self._map, offset + _SEQ.size)
+            if state == _USED:
+                start: int = offset + SLOT_HEADER_SIZE
+                yield offset, self._map[start:start + key_length]
+
+    def clear(self, prefix: bytes = b"") -> int:
+        """ empties the slots whose key starts with prefix, every stripe is locked once """
+        removed: int = 0
+        for stripe in range(self._stripes):
+            with self._locked(stripe):
+                for bucket in range(stripe, self._buckets, self._stripes):
+                    for offset, key in list(self._keys(bucket)):
+                        if key.startswith(prefix):
+                            self._write(offset, _EMPTY, 0, b"", b"", 0.0)
+                            removed += 1
+        return removed
+
+    def count(self, prefix: bytes = b"") -> int:
+        """ live keys starting with prefix, the scan takes no lock so the count is approximate """
+        now: float = time.time()
+        live: int = 0
+        for bucket in range(self._buckets):
+            for offset, key in self._keys(bucket):
+                expiry: float = _SLOT_FIELDS.unpack_from(self._map, offset + _SEQ.size)[5]
+                if key.startswith(prefix) and not (expiry and expiry <= now):
+                    live += 1
+        return live
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def unlink(self) -> None:
+        """ removes the segment, the workers that mapped it keep their mapping until they close """
+        try:
+            os.unlink(self._path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class AsyncSingleFlight:
+    """ Runs at most one computation per key at a time, concurrent callers await the same future.
+        If the leader fails or is cancelled one of the followers takes over the computation.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def run(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Any:
+        call: Optional[asyncio.Future] = self._calls.get(key)
+        while call is not None:
+            try:
+                return await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+            except Exception:
+                pass
+            call = self._calls.get(key)
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # followers retrieve the outcome, the callback avoids warnings when nobody was waiting
+        future.add_done_callback(AsyncSingleFlight._retrieve)
+        self._calls[key] = future
+        try:
+            result: Any = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    @staticmethod
+    def _retrieve(future: asyncio.Future) -> None:
+        if not future.cancelled():
+            _: Optional[BaseException] = future.exception()
+
+
+class _SyncCall:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event: threading.Event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SyncSingleFlight:
+    """ Thread based counterpart of AsyncSingleFlight, followers wait on the leader event """
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._calls: Dict[Hashable, _SyncCall] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def run(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        call: _SyncCall
+        while True:
+            with self._lock:
+                current: Optional[_SyncCall] = self._calls.get(key)
+                if current is None:
+                    call = _SyncCall()
+                    self._calls[key] = call
+                    break
+            current.event.wait()
+            if current.error is None:
+                return current.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
@@ -0,0 +1,83 @@
+import pickle
+import sys
+import types
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Set, Tuple, Final
+
+from cache.exceptions import ConfigurationError
+
+Sizer = Callable[[Any], int]
+
+DEFAULT_SIZER: Final[str] = "deep"
+_ATOMIC: Final[Tuple[type, ...]] = (str, bytes, bytearray, int, float, complex, bool, type(None))
+_MAPPINGS: Final[Tuple[type, ...]] = (dict,)
+_SEQUENCES: Final[Tuple[type, ...]] = (list, tuple, set, frozenset)
+# shared by the whole process, following them would count their globals and their module
+_NOT_FOLLOWED: Final[Tuple[type, ...]] = (type, types.ModuleType, types.FunctionType, types.MethodType,
+                                          types.BuiltinFunctionType, types.MethodWrapperType,
+                                          types.WrapperDescriptorType, types.MethodDescriptorType)
+
+
+@lru_cache(maxsize=1_024)
+def _slots(cls: type) -> Tuple[str, ...]:
+    names: List[str] = []
+    for klass in cls.__mro__:
+        slots: Any = klass.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return tuple(name for name in names if name not in ("__dict__", "__weakref__"))
+
+
+def deep_getsizeof(value: Any) -> int:
+    """ Bytes held by value and everything it references, every object is counted once even when
+        it is shared or part of a cycle. Classes, modules and functions are not followed.
+    """
+    value_type: type = type(value)
+    if value_type in _ATOMIC:
+        return sys.getsizeof(value)
+    seen: Set[int] = set()
+    pending: List[Any] = [value]
+    size: int = 0
+    while pending:
+        current: Any = pending.pop()
+        identity: int = id(current)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        size += sys.getsizeof(current)
+        current_type: type = type(current)
+        if current_type in _ATOMIC or isinstance(current, _NOT_FOLLOWED):
+            continue
+        if isinstance(current, _MAPPINGS):
+            pending.extend(current.keys())
+            pending.extend(current.values())
+        elif isinstance(current, _SEQUENCES):
+            pending.extend(current)
+        else:
+            attributes: Any = getattr(current, "__dict__", None)
+            if attributes is not None:
+                pending.append(attributes)
+            for name in _slots(current_type):
+                if hasattr(current, name):
+                    pending.append(getattr(current, name))
+    return size
+
+
+def serialized_size(value: Any) -> int:
+    """ Length of the pickled value, cheaper than deep_getsizeof for large flat payloads """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return deep_getsizeof(value)
+
+
+SIZERS: Final[Dict[str, Sizer]] = {
+    "deep": deep_getsizeof,
+    "serialized": serialized_size,
+}
+
+
+def get_sizer(name: str = DEFAULT_SIZER) -> Sizer:
+    try:
+        return SIZERS[name]
+    except KeyError:
+        raise ConfigurationError(f"The sizer {name} is not implemented, use one of {list(SIZERS)}")
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+from typing import Any, Dict, Final, Iterable, List, Optional, Union
+
+import redis
+import redis.asyncio
+
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import namespace_prefix
+
+INVALIDATE_CHANNEL: Final[str] = "__redis__:invalidate"
+DEFAULT_MAX_SIZE: Final[int] = 10_000
+# seconds between two attempts to connect the listener and between two polls of its messages
+RECONNECT_DELAY: Final[float] = 1.0
+POLL_TIMEOUT: Final[float] = 1.0
+TrackingConfig = Union[None, bool, Dict[str, Any]]
+
+MISSING: Any = object()
+_logger: logging.Logger = logging.getLogger(__name__)
+
+
+class InvalidationTracker:
+    """ Local copy of the values read by an async redis client, kept coherent with the server
+        assisted client side caching of Redis 6+. redis-py 4.4 only speaks RESP2, so a dedicated
+        connection enables CLIENT TRACKING in BCAST mode for the prefixes, redirects the
+        invalidations to itself and subscribes to __redis__:invalidate. Any write of a key under the
+        prefixes, by any client, drops the local copy.
+
+        The local copy is only used while the listener is subscribed, it is emptied whenever the
+        connection drops because the invalidations sent meanwhile are lost. A read that started
+        before an invalidation of its key does not store its reply.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis, prefixes: List[str],
+                 max_size: int = DEFAULT_MAX_SIZE) -> None:
+        if max_size < 1:
+            raise ConfigurationError("The tracking cache needs room for at least one key")
+        self._client: redis.asyncio.Redis = client
+        self._prefixes: List[str] = prefixes
+        self._max_size: int = max_size
+        # stored replies, None for the keys that do not exist on the server
+        self._local: Dict[str, Optional[bytes]] = {}
+        # key -> token of the read in flight, an invalidation removes it
+        self._pending: Dict[str, object] = {}
+        self._ready: bool = False
+        # a server without tracking rejects the handshake, the alias then always reads from it
+        self._disabled: bool = False
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def _ensure_listener(self) -> None:
+        if self._disabled:
+            return None
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        if self._listener is None or self._listener.done() or self._listener.get_loop() is not loop:
+            self._ready = False
+            self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub: redis.asyncio.client.PubSub = self._client.pubsub()
+            try:
+                await self._subscribe(pubsub)
+                self._ready = True
+                while True:
+                    message: Optional[Dict[str, Any]] = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=POLL_TIMEOUT)
+                    if message is not None and message.get("type") == "message":
+                        self.invalidate(message["data"])
+            except redis.ResponseError as exc:
+                _logger.warning("client tracking is not available, the local copy is disabled: %s", exc)
+                self._disabled = True
+                return None
+            except (redis.ConnectionError, redis.TimeoutError, OSError) as exc:
+                _logger.debug("client tracking listener disconnected: %s", exc)
+            finally:
+                self._reset()
+                await pubsub.close()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _subscribe(self, pubsub: redis.asyncio.client.PubSub) -> None:
+        # the replies are read by hand, the connection is not subscribed yet
+        await pubsub.execute_command("CLIENT", "ID")
+        client_id: int = await pubsub.parse_response(block=True)
+        prefixes: List[str] = [argument for prefix in self._prefixes for argument in ("PREFIX", prefix)]
+        await pubsub.execute_command("CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes)
+        _: Any = await pubsub.parse_response(block=True)
+        await pubsub.subscribe(INVALIDATE_CHANNEL)
+
+    def _reset(self) -> None:
+        self._ready = False
+        self._local.clear()
+        self._pending.clear()
+
+    def lookup(self, ns_key: str) -> Any:
+        """ local reply of the key, MISSING when it has to be read from the server """
+        self._ensure_listener()
+        if not self._ready:
+            return MISSING
+        return self._local.get(ns_key, MISSING)
+
+    def begin(self, ns_key: str) -> Optional[object]:
+        if not self._ready:
+            return None
+        token: object = object()
+        self._pending[ns_key] = token
+        return token
+
+    def store(self, ns_key: str, token: Optional[object], value: Optional[bytes]) -> None:
+        if token is None or self._pending.get(ns_key) is not token:
+            return None
+        del self._pending[ns_key]
+        if len(self._local) >= self._max_size and ns_key not in self._local:
+            # first in first out, the oldest copy is the most likely to be stale soon
+            del self._local[next(iter(self._local))]
+        self._local[ns_key] = value
+
+    def invalidate(self, keys: Optional[Iterable[Union[str, bytes]]]) -> None:
+        """ keys None, as sent after FLUSHALL, drops every local copy """
+        if keys is None:
+            self._local.clear()
+            self._pending.clear()
+            return None
+        if isinstance(keys, (str, bytes)):
+            keys = [keys]
+        for key in keys:
+            ns_key: str = key.decode("utf-8") if isinstance(key, bytes) else key
+            self._local.pop(ns_key, None)
+            self._pending.pop(ns_key, None)
+
+    async def close(self) -> None:
+        if self._listener is not None and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._reset()
+
+
+def get_tracker(config: TrackingConfig, client: redis.asyncio.Redis,
+                namespace: str) -> Optional[InvalidationTracker]:
+    """ config is True to track the namespace of the alias or a dict with 'prefixes' and 'max_size' """
+    if not config:
+        return None
+    options: Dict[str, Any] = {} if config is True else dict(config)
+    prefixes: List[str] = options.pop("prefixes", [namespace_prefix(namespace)] if namespace else [])
+    try:
+        return InvalidationTracker(client, prefixes, **options)
+    except TypeError as exc:
+        raise ConfigurationError(f"Wrong options for the client tracking: {exc}")
@@ -1,10 +1,18 @@
 import asyncio
 from functools import wraps
-from typing import Optional, Any, Mapping, Tuple
+from typing import Optional, Any, Dict, Mapping, Tuple, Callable
 
-from cache.test_memorycache import AsyncMemoryCache, SyncMemoryCache
-from cache.test_rediscache import SyncRedisCache, AsyncRedisCache
+from cache_async_redis.fwk_memorycache import AsyncMemoryCache, SyncMemoryCache
+from cache_async_redis.fwk_rediscache import SyncRedisCache, AsyncRedisCache
 from cache.test_cache import SerializableData
+from cache.refresh import (CachedEntry, DEFAULT_BETA, COMPUTE, REVALIDATE, async_compute_entry,
+                           check_stale_ttl, entry_ttl, entry_state, revalidate_async, revalidate_sync,
+                           storage_ttl, sync_compute_entry)
+from cache.singleflight import AsyncSingleFlight, SyncSingleFlight
+from cache.handles import AsyncHandle, SyncHandle
+
+# default of the plain reads, stored 0, False or [] results are hits
+_MISS: Any = object()
 
 
 def _key_from_args(func, args: Tuple[Any, ...], kwargs: Mapping[Any, Any]) -> str:
@@ -12,32 +20,99 @@ def _key_from_args(func, args: Tuple[Any, ...], kwargs: Mapping[Any, Any]) -> st
     return str(func.__module__ or '') + func.__name__ + str(args) + str(ordered_kwargs)
 
 
+def _checked_client(client: Any, stale_ttl: Optional[int]) -> Any:
+    options: Dict[str, Any] = client.get_options()
+    check_stale_ttl(options['alias'], options.get('strategy'), stale_ttl)
+    return client
+
+
+def _entry_decorator(func: Any, async_factory: Callable[[], Any], sync_factory: Callable[[], Any],
+                     namespace: Optional[str], early_refresh: bool, beta: float,
+                     stale_ttl: Optional[int]) -> Any:
+    """ Wrappers storing CachedEntry values for the early refresh and stale-while-revalidate modes """
+    async_flight: AsyncSingleFlight = AsyncSingleFlight()
+    sync_flight: SyncSingleFlight = SyncSingleFlight()
+    async_handle: AsyncHandle = AsyncHandle(lambda: _checked_client(async_factory(), stale_ttl))
+    sync_handle: SyncHandle = SyncHandle(lambda: _checked_client(sync_factory(), stale_ttl))
+
+    async def async_refresh(fwk_cache: Any, key: str, args: Tuple[Any, ...],
+                            kwargs: Mapping[str, Any]) -> CachedEntry:
+        ttl: Optional[int] = entry_ttl(fwk_cache)
+        entry: CachedEntry = await async_compute_entry(func, args, kwargs, ttl)
+        _: bool = await fwk_cache.put(key, entry, namespace=namespace,
+                                      ttl=storage_ttl(ttl, stale_ttl))
+        return entry
+
+    def sync_refresh(fwk_cache: Any, key: str, args: Tuple[Any, ...],
+                     kwargs: Mapping[str, Any]) -> CachedEntry:
+        ttl: Optional[int] = entry_ttl(fwk_cache)
+        entry: CachedEntry = sync_compute_entry(func, args, kwargs, ttl)
+        _: bool = fwk_cache.put(key, entry, namespace=namespace, ttl=storage_ttl(ttl, stale_ttl))
+        return entry
+
+    @wraps(func)
+    async def handled_async_func(*args, **kwargs) -> Any:
+        fwk_cache: Any = async_handle.get()
+        key = _key_from_args(func, args, kwargs)
+        value: SerializableData = await fwk_cache.get(key, namespace=namespace)
+        state: int = entry_state(value, beta, early_refresh, stale_ttl, key in async_flight)
+        if state == COMPUTE:
+            value = await async_flight.run(key, lambda: async_refresh(fwk_cache, key, args, kwargs))
+        elif state == REVALIDATE:
+            revalidate_async(async_flight.run(key, lambda: async_refresh(fwk_cache, key, args, kwargs)))
+        return value.value
+
+    @wraps(func)
+    def handled_sync_func(*args, **kwargs) -> Any:
+        fwk_cache: Any = sync_handle.get()
+        key = _key_from_args(func, args, kwargs)
+        value: SerializableData = fwk_cache.get(key, namespace=namespace)
+        state: int = entry_state(value, beta, early_refresh, stale_ttl, key in sync_flight)
+        if state == COMPUTE:
+            value = sync_flight.run(key, lambda: sync_refresh(fwk_cache, key, args, kwargs))
+        elif state == REVALIDATE:
+            revalidate_sync(sync_flight, key, lambda: sync_refresh(fwk_cache, key, args, kwargs))
+        return value.value
+
+    if asyncio.iscoroutinefunction(func):
+        return handled_async_func
+    return handled_sync_func
+
+
 def redis_cache(alias: str, ttl: Optional[int] = None,
-                namespace: Optional[str] = None) -> Any:
+                namespace: Optional[str] = None, early_refresh: bool = False,
+                beta: float = DEFAULT_BETA, stale_ttl: Optional[int] = None) -> Any:
 
     def manage_params(func: Any) -> Any:
+        if early_refresh or stale_ttl:
+            return _entry_decorator(func, lambda: AsyncRedisCache(alias, ttl, namespace),
+                                    lambda: SyncRedisCache(alias, ttl, namespace), namespace,
+                                    early_refresh, beta, stale_ttl)
+        # the clients are kept for the life of the decorated function, not closed per call
+        async_handle: AsyncHandle[AsyncRedisCache] = AsyncHandle(
+            lambda: AsyncRedisCache(alias, ttl, namespace))
+        sync_handle: SyncHandle[SyncRedisCache] = SyncHandle(lambda: SyncRedisCache(alias, ttl, namespace))
+
         @wraps(func)
         async def handled_async_func(*args, **kwargs) -> Any:
-            fwk_cache: AsyncRedisCache = AsyncRedisCache(alias, ttl, namespace)
+            fwk_cache: AsyncRedisCache = async_handle.get()
             key = _key_from_args(func, args, kwargs)
-            value: SerializableData = await fwk_cache.get(key, namespace=namespace)
+            value: SerializableData = await fwk_cache.get(key, _MISS, namespace=namespace)
 
-            if not value:
+            if value is _MISS:
                 value: SerializableData = await func(*args, **kwargs)
                 _: bool = await fwk_cache.put(key, value, namespace=namespace)
-            _: await fwk_cache.close()
             return value
 
         @wraps(func)
         def handled_sync_func(*args, **kwargs) -> Any:
-            fwk_cache: SyncRedisCache = SyncRedisCache(alias, ttl, namespace)
+            fwk_cache: SyncRedisCache = sync_handle.get()
             key = _key_from_args(func, args, kwargs)
-            value: SerializableData = fwk_cache.get(key, namespace=namespace)
+            value: SerializableData = fwk_cache.get(key, _MISS, namespace=namespace)
 
-            if not value:
+            if value is _MISS:
                 value: SerializableData = func(*args, **kwargs)
                 _: bool = fwk_cache.put(key, value, namespace=namespace)
-            _: fwk_cache.close()
             return value
 
         if asyncio.iscoroutinefunction(func):
@@ -48,29 +123,39 @@ def redis_cache(alias: str, ttl: Optional[int] = None,
 
 def memory_cache(alias: str, strategy: Optional[str] = None, max_size: Optional[int] = None,
                  ttl: Optional[int] = None, namespace: Optional[str] = None,
-                 getsizeof: Optional[int] = None) -> Any:
+                 getsizeof: Optional[int] = None, early_refresh: bool = False,
+                 beta: float = DEFAULT_BETA, stale_ttl: Optional[int] = None) -> Any:
 
     def manage_params(func: Any) -> Any:
+        if early_refresh or stale_ttl:
+            return _entry_decorator(func, lambda: AsyncMemoryCache(alias, strategy, max_size, ttl,
+                                                                   namespace, getsizeof),
+                                    lambda: SyncMemoryCache(alias, strategy, max_size, ttl,
+                                                            namespace, getsizeof),
+                                    namespace, early_refresh, beta, stale_ttl)
+        async_handle: AsyncHandle[AsyncMemoryCache] = AsyncHandle(
+            lambda: AsyncMemoryCache(alias, strategy, max_size, ttl, namespace, getsizeof))
+        sync_handle: SyncHandle[SyncMemoryCache] = SyncHandle(
+            lambda: SyncMemoryCache(alias, strategy, max_size, ttl, namespace, getsizeof))
+
         @wraps(func)
         async def handled_async_func(*args, **kwargs) -> Any:
-            fwk_cache: AsyncMemoryCache = AsyncMemoryCache(alias, strategy, max_size, ttl,
-                                                           namespace, getsizeof)
+            fwk_cache: AsyncMemoryCache = async_handle.get()
             key = _key_from_args(func, args, kwargs)
-            value: SerializableData = await fwk_cache.get(key, namespace=namespace)
+            value: SerializableData = await fwk_cache.get(key, _MISS, namespace=namespace)
 
-            if not value:
+            if value is _MISS:
                 value: SerializableData = await func(*args, **kwargs)
                 _: bool = await fwk_cache.put(key, value, namespace=namespace)
             return value
 
         @wraps(func)
         def handled_sync_func(*args, **kwargs) -> Any:
-            fwk_cache: SyncMemoryCache = SyncMemoryCache(alias, strategy, max_size, ttl,
-                                                         namespace, getsizeof)
+            fwk_cache: SyncMemoryCache = sync_handle.get()
             key = _key_from_args(func, args, kwargs)
-            value: SerializableData = fwk_cache.get(key, namespace=namespace)
+            value: SerializableData = fwk_cache.get(key, _MISS, namespace=namespace)
 
-            if not value:
+            if value is _MISS:
                 value: SerializableData = func(*args, **kwargs)
                 _: bool = fwk_cache.put(key, value, namespace=namespace)
             return value
@@ -184,7 +184,7 @@ class AsyncMemoryCache(MemoryCommonCache, AbstractAsyncTestCache):
         return default
 
     async def put(self, key: InmutableKey, data: SerializableData,
-                  namespace: Optional[str] = None) -> bool:
+                  namespace: Optional[str] = None, ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key, namespace)
         self._cache[ns_key] = data
         return True
@@ -215,6 +215,9 @@ class AsyncMemoryCache(MemoryCommonCache, AbstractAsyncTestCache):
             return True
         return False
 
+    async def close(self) -> bool:
+        return True
+
     def _search_key(self, key: InmutableKey,  namespace: Optional[str] = None,
                     pop: bool = False) -> Any:
         value: SerializableData
@@ -255,7 +258,8 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncTestCache):
             return value
         return default
 
-    def put(self, key: InmutableKey, data: SerializableData, namespace: Optional[str] = None) -> bool:
+    def put(self, key: InmutableKey, data: SerializableData, namespace: Optional[str] = None,
+            ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key, namespace)
         self._cache[ns_key] = data
         return True
@@ -286,6 +290,9 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncTestCache):
             return True
         return False
 
+    def close(self) -> bool:
+        return True
+
     def _search_key(self, key: InmutableKey, namespace: Optional[str] = None,
                     pop: bool = False) -> Any:
         value: SerializableData
@@ -311,5 +318,5 @@ class SyncMemoryCache(MemoryCommonCache, AbstractSyncTestCache):
             return cache.get
 
 
-TestCache.load_config(memory_config)
+TestCache.load_cache(memory_config)
 
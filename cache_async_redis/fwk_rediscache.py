@@ -1,7 +1,9 @@
 
+import asyncio
 import pickle
 from abc import ABC
 from typing import Dict, Any, Optional, List, Final
+from weakref import WeakKeyDictionary
 
 import aiocache
 from redis import Redis
@@ -111,7 +113,8 @@ class RedisCommonCache(TestCache, ABC):
 
 
 class AsyncRedisCache(RedisCommonCache, AbstractAsyncTestCache):
-    _connection_pool: Optional[Any] = None
+    # event loop -> alias -> pool, the asyncio connections are bound to the loop that opened them
+    _connection_pools: WeakKeyDictionary = WeakKeyDictionary()
 
     def __init__(self, alias: str = "default", ttl: Optional[int] = None,
                  namespace: Optional[str] = None) -> None:
@@ -121,7 +124,7 @@ class AsyncRedisCache(RedisCommonCache, AbstractAsyncTestCache):
     def _set_cache(self, alias: str) -> redis.asyncio.Redis:
         # if not exists the alias create the cache on the fly based on the current
         # configuration (default)
-        self._selected_config = self._get_alias_config(alias)
+        self._selected_config = self.get_alias_config(alias)
         self._backend: str = Backend.REDIS
         self._strategy: str = "REDIS"
         self._max_size: int = 0
@@ -137,13 +140,16 @@ class AsyncRedisCache(RedisCommonCache, AbstractAsyncTestCache):
         password: Optional[str] = self.selected_config.get("password")
         self._timeout = self.selected_config.get("timeout", 10)
         max_connections: int = self.selected_config.get("max_connections", 50)
-        if not AsyncRedisCache._connection_pool:
+        loop_pools: Dict[str, BlockingConnectionPool] = AsyncRedisCache._connection_pools.setdefault(
+            asyncio.get_running_loop(), {})
+        pool: Optional[BlockingConnectionPool] = loop_pools.get(alias)
+        if pool is None:
             pool = BlockingConnectionPool(host=host, port=port, db=db, username=username, password=password,
                                           max_connections=max_connections, socket_timeout=self._timeout)
-            AsyncRedisCache._connection_pool = pool
+            loop_pools[alias] = pool
         # cache: AsyncRedis = AsyncRedis(host=endpoint, port=port, db=db, password=password,
         # socket_timeout=self._timeout)
-        cache: redis.asyncio.Redis = redis.asyncio.Redis(connection_pool=AsyncRedisCache._connection_pool)
+        cache: redis.asyncio.Redis = redis.asyncio.Redis(connection_pool=pool)
         return cache
 
     async def close(self) -> bool:
@@ -153,14 +159,16 @@ class AsyncRedisCache(RedisCommonCache, AbstractAsyncTestCache):
     async def get(self, key: InmutableKey, default: Optional[object] = None,
                   namespace: Optional[str] = None) -> SerializableData:
         ns_key: str = self._nskey(key, namespace)
-        value: bytes = await self._cache.get(ns_key)
+        value: Optional[bytes] = await self._cache.get(ns_key)
+        if value is None:
+            return default
         return RedisCommonCache._deserialize(value)
 
     async def put(self, key: InmutableKey, data: SerializableData,
-                  namespace: Optional[str] = None) -> bool:
+                  namespace: Optional[str] = None, ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key, namespace)
         value: bytes = RedisCommonCache._serialize(data)
-        await self._cache.set(ns_key, value, ex=self._ttl)
+        await self._cache.set(ns_key, value, ex=self._ttl if ttl is None else ttl)
         return True
 
     async def clear(self, namespace: Optional[str] = None) -> bool:
@@ -188,7 +196,7 @@ class SyncRedisCache(RedisCommonCache, AbstractSyncTestCache):
     def _set_cache(self, alias: str) -> Redis:
         # if not exists the alias create the cache on the fly based on the current
         # configuration (default)
-        self._selected_config = self._get_alias_config(alias)
+        self._selected_config = self.get_alias_config(alias)
         self._backend: str = Backend.REDIS
         self._strategy: str = "REDIS"
         self._max_size: int = 0
@@ -214,12 +222,16 @@ class SyncRedisCache(RedisCommonCache, AbstractSyncTestCache):
     def get(self, key: InmutableKey, default: Optional[object] = None,
             namespace: Optional[str] = None) -> SerializableData:
         ns_key: str = self._nskey(key, namespace)
-        return RedisCommonCache._deserialize(self._cache.get(ns_key))
+        value: Optional[bytes] = self._cache.get(ns_key)
+        if value is None:
+            return default
+        return RedisCommonCache._deserialize(value)
 
     def put(self, key: InmutableKey, data: SerializableData,
-            namespace: Optional[str] = None) -> bool:
+            namespace: Optional[str] = None, ttl: Optional[int] = None) -> bool:
         ns_key: str = self._nskey(key, namespace)
-        self._cache.set(ns_key, RedisCommonCache._serialize(data), ex=self._ttl)
+        self._cache.set(ns_key, RedisCommonCache._serialize(data),
+                        ex=self._ttl if ttl is None else ttl)
         return True
 
     def clear(self, namespace: Optional[str] = None) -> bool:
@@ -236,4 +248,4 @@ class SyncRedisCache(RedisCommonCache, AbstractSyncTestCache):
         return True
 
 
-TestCache.load_config(redis_config)
+TestCache.load_cache(redis_config)
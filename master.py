@@ -12,7 +12,7 @@ from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from routes import test_async_routes, custom_route
+from routes import test_async_routes, custom_route, metrics_route
 from utils import apilog
 
 ACCESS_PORT = 5000
@@ -37,6 +37,7 @@ app.add_middleware(
 
 app.include_router(test_async_routes.router)
 app.include_router(custom_route.router)
+app.include_router(metrics_route.router)
 
 
 @app.on_event("startup")
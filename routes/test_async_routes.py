@@ -12,10 +12,10 @@ from starlette.responses import JSONResponse
 
 import utils
 from cache.DElete_cache_configuration import SerializableData
-from cache.cache_creator import TestCacheCreate
-from cache.decorators import TestCache
+from cache.cache_creator import FwkCacheCreate
 from cache.test_memorycache import AsyncMemoryCache
 from cache.test_rediscache import AsyncRedisCache
+from cache.fwk_cache import AbstractAsyncFwkCache
 from cache.test_cache import AbstractAsyncTestCache
 from dependencies.api_log import get_log
 from services import cache_system
@@ -48,7 +48,7 @@ async def test_async_aiocache(request: Request, log: Logger = Depends(get_log),
         key_code: str = "async_code"
         key_decorator: str = "async_decorator"
         key_create: str = "async_create"
-        cache: TestCache = TestCacheCreate.create("memory")
+        cache: AbstractAsyncFwkCache = FwkCacheCreate.create_async("memory")
         value: User = cast(User, await cache.get(key_create))
         if not value:
             value: User = cast(User, await utils.get_async_data(key_create))
@@ -59,7 +59,6 @@ async def test_async_aiocache(request: Request, log: Logger = Depends(get_log),
             # print("close", await cache.close())
             # print("delete", await cache.delete(key_decorator))
         # print("exists", await cache.exists(key_decorator))
-        _: bool = await cache.close()
         if cache_type == "redis":
             value = await cache_system.redis_get_data_async(key_decorator)
             data.update({"decorator": value})
@@ -0,0 +1,69 @@
+import itertools
+import threading
+from typing import Any, Callable, Dict, Iterator, List
+
+import fakeredis
+import pytest
+import redis
+
+from cache.fwk_cache import FwkCache
+from cache.fwk_diskcache import DiskCommonCache
+from cache.fwk_memorycache import MemoryCommonCache
+from cache.fwk_sharedcache import SharedCommonCache
+
+REDIS_SERVERS: int = 3
+
+_aliases: Iterator[int] = itertools.count()
+
+
+@pytest.fixture
+def make_alias() -> Iterator[Callable[..., str]]:
+    """ registers an alias with a name of its own, the backends keep their regions and pools per
+        alias for the life of the process
+    """
+    created: List[str] = []
+
+    def make(backend: str, **options: Any) -> str:
+        alias: str = f"test_{backend}_{next(_aliases)}"
+        FwkCache.load_cache({alias: {'backend': backend, **options}})
+        created.append(alias)
+        return alias
+
+    yield make
+    for alias in created:
+        FwkCache.get_config().pop(alias, None)
+        MemoryCommonCache._caches.pop(alias, None)
+        table: Any = SharedCommonCache._tables.pop(alias, None)
+        if table is not None:
+            table.close()
+            table.unlink()
+        log: Any = DiskCommonCache._logs.pop(alias, None)
+        if log is not None:
+            log.close()
+
+
+@pytest.fixture(scope="session")
+def redis_nodes() -> Iterator[List[str]]:
+    """ "host:port" of fake Redis servers speaking RESP over TCP, the clients under test open real
+        connections and pools against them
+    """
+    servers: List[fakeredis.TcpFakeServer] = []
+    for _ in range(REDIS_SERVERS):
+        server: fakeredis.TcpFakeServer = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    yield [f"127.0.0.1:{server.server_address[1]}" for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def redis_options(redis_nodes: List[str]) -> Dict[str, Any]:
+    """ host and port of the first server, every server starts the test empty """
+    for node in redis_nodes:
+        host, _, port = node.rpartition(":")
+        with redis.Redis(host=host, port=int(port)) as client:
+            client.flushall()
+    host, _, port = redis_nodes[0].rpartition(":")
+    return {'host': host, 'port': int(port), 'timeout': 5}
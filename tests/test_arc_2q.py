@@ -0,0 +1,114 @@
+import random
+from typing import Any, Callable, List, Type
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.policies import ARCCache, TwoQCache
+
+
+def check_arc(region: ARCCache) -> None:
+    assert set(region._t1) | set(region._t2) == set(region.keys())
+    assert not (set(region._b1) | set(region._b2)) & set(region.keys())
+    assert region._t1_size == sum(region._t1.values())
+    assert region._t2_size == sum(region._t2.values())
+    assert region._b1_size == sum(region._b1.values())
+    assert region._b2_size == sum(region._b2.values())
+    assert region._t1_size + region._t2_size == region.currsize <= region.maxsize
+
+
+def check_two_q(region: TwoQCache) -> None:
+    assert set(region._a1in) | set(region._am) == set(region.keys())
+    assert not set(region._a1out) & set(region.keys())
+    assert region._a1in_size == sum(region._a1in.values())
+    assert region._a1out_size == sum(region._a1out.values())
+    assert region.currsize <= region.maxsize
+
+
+CHECKS: List[Any] = [(ARCCache, check_arc), (TwoQCache, check_two_q)]
+
+
+@pytest.mark.parametrize("region_class, check", CHECKS)
+@pytest.mark.parametrize("others", [0, 1, 5])
+@pytest.mark.parametrize("promoted", [False, True])
+def test_a_growing_value_may_evict_its_own_key(region_class: Type, check: Callable[[Any], None],
+                                               others: int, promoted: bool) -> None:
+    region: Any = region_class(1_000, getsizeof=len)
+    for other in range(others):
+        region[f"other{other}"] = "o" * 10
+    region["a"] = "x" * 100
+    if promoted:
+        assert region["a"] == "x" * 100
+    region["a"] = "y" * 950
+    assert region["a"] == "y" * 950
+    check(region)
+    region["b"] = "z" * 40
+    check(region)
+
+
+@pytest.mark.parametrize("region_class, check", CHECKS)
+def test_bookkeeping_under_random_sized_load(region_class: Type, check: Callable[[Any], None]) -> None:
+    region: Any = region_class(2_000, getsizeof=len)
+    generator: random.Random = random.Random(11)
+    for _ in range(20_000):
+        key: int = int(generator.paretovariate(1.1)) % 500
+        if region.get(key) is None or generator.random() < 0.1:
+            region[key] = "v" * generator.randint(1, 400)
+        if generator.random() < 0.01 and key in region:
+            del region[key]
+    check(region)
+
+
+@pytest.mark.parametrize("region_class, check", CHECKS)
+def test_entries_expire_with_the_ttl(region_class: Type, check: Callable[[Any], None]) -> None:
+    now: List[float] = [0.0]
+    region: Any = region_class(10, ttl=5, timer=lambda: now[0])
+    region["a"] = 1
+    assert region["a"] == 1
+    now[0] = 5.0
+    assert "a" not in region
+    assert region.get("a") is None
+    region["b"] = 2
+    assert list(region.keys()) == ["b"]
+    check(region)
+
+
+def test_arc_ghost_hits_move_the_target() -> None:
+    region: ARCCache = ARCCache(4)
+    for key in range(2):
+        region[key] = key
+        assert region[key] == key
+    for key in range(2, 6):
+        region[key] = key
+    assert list(region._b1) == [2, 3]
+    assert region.target == 0
+    region[2] = 2
+    assert region.target > 0
+    assert 2 in region._t2
+    check_arc(region)
+
+
+def test_two_q_keeps_the_hot_keys_through_a_scan() -> None:
+    region: TwoQCache = TwoQCache(100)
+    hot: List[int] = list(range(20))
+    for key in hot:
+        region[key] = key
+    for key in range(1_000, 1_100):
+        region[key] = key
+    for key in hot:
+        region[key] = key
+    for key in range(2_000, 2_500):
+        region[key] = key
+    assert all(key in region for key in hot)
+    check_two_q(region)
+
+
+@pytest.mark.parametrize("strategy, region_class", [("ARC", ARCCache), ("2Q", TwoQCache)])
+def test_memory_alias_with_byte_budget(strategy: str, region_class: Type,
+                                       make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", strategy=strategy, max_bytes=4_096)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert isinstance(cache._cache, region_class)
+    assert cache.put("a", "x" * 100)
+    assert cache.put("a", "y" * 3_500)
+    assert cache.get("a") == "y" * 3_500
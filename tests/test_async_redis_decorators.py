@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+import pytest
+
+from cache.exceptions import ConfigurationError
+from cache.refresh import CachedEntry
+from cache.test_cache import TestCache
+from cache_async_redis.decorators import _key_from_args, memory_cache, redis_cache
+from cache_async_redis.fwk_memorycache import SyncMemoryCache
+from cache_async_redis.fwk_rediscache import SyncRedisCache
+
+BACKENDS: List[str] = ["memory", "redis"]
+
+_aliases: Iterator[int] = itertools.count()
+
+
+@pytest.fixture
+def legacy_alias(request: pytest.FixtureRequest) -> Iterator[Callable[..., str]]:
+    """ the clients of cache_async_redis read their aliases from the TestCache configuration """
+    created: List[str] = []
+
+    def make(backend: str, **options: Any) -> str:
+        alias: str = f"legacy_{backend}_{next(_aliases)}"
+        if backend == "redis":
+            redis_options: Dict[str, Any] = request.getfixturevalue("redis_options")
+            # the async client connects to host and the sync one to endpoint
+            options = {'host': redis_options['host'], 'endpoint': redis_options['host'],
+                       'port': redis_options['port'], **options}
+        TestCache.load_cache({alias: {'backend': backend, 'namespace': 'legacy', **options}})
+        created.append(alias)
+        return alias
+
+    yield make
+    for alias in created:
+        TestCache.get_config().pop(alias, None)
+
+
+def _decorator(backend: str, alias: str, **options: Any) -> Callable[[Any], Any]:
+    if backend == "memory":
+        return memory_cache(alias, **options)
+    return redis_cache(alias, **options)
+
+
+def _stale_alias(backend: str, legacy_alias: Callable[..., str]) -> str:
+    # the TTL region of the memory default drops the entries at the ttl, before they turn stale
+    if backend == "memory":
+        return legacy_alias(backend, ttl=30, strategy="FIFO")
+    return legacy_alias(backend, ttl=30)
+
+
+def _store(backend: str, alias: str, key: str, value: Any) -> None:
+    client: Any = SyncMemoryCache(alias) if backend == "memory" else SyncRedisCache(alias)
+    _: bool = client.put(key, value)
+
+
+def _wait_for(condition: Callable[[], bool]) -> None:
+    deadline: float = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_plain_decorator_computes_once(backend: str, legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias(backend, ttl=30)
+    calls: List[int] = []
+
+    @_decorator(backend, alias)
+    def sync_fetch(item: int) -> str:
+        calls.append(item)
+        return f"sync {item}"
+
+    @_decorator(backend, alias)
+    async def async_fetch(item: int) -> str:
+        calls.append(item)
+        return f"async {item}"
+
+    async def scenario() -> List[str]:
+        return [await async_fetch(2), await async_fetch(2)]
+
+    assert [sync_fetch(1), sync_fetch(1)] == ["sync 1", "sync 1"]
+    assert asyncio.run(scenario()) == ["async 2", "async 2"]
+    assert calls == [1, 2]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_falsy_results_are_hits(backend: str, legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias(backend, ttl=30)
+    calls: List[Any] = []
+
+    @_decorator(backend, alias)
+    def sync_fetch(item: Any) -> Any:
+        calls.append(item)
+        return item
+
+    @_decorator(backend, alias)
+    async def async_fetch(item: Any) -> Any:
+        calls.append(item)
+        return item
+
+    async def scenario() -> List[Any]:
+        return [await async_fetch(""), await async_fetch("")]
+
+    assert [sync_fetch(0), sync_fetch(0), sync_fetch(False), sync_fetch(False)] == [0, 0, False, False]
+    assert asyncio.run(scenario()) == ["", ""]
+    assert calls == [0, False, ""]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_early_refresh_recomputes_before_expiry(backend: str, legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias(backend, ttl=30)
+    calls: List[int] = []
+
+    # with a huge beta the XFetch draw always lands past the expiry
+    @_decorator(backend, alias, early_refresh=True, beta=1e12)
+    def sync_fetch(item: int) -> int:
+        calls.append(item)
+        time.sleep(0.001)
+        return len(calls)
+
+    @_decorator(backend, alias, early_refresh=True, beta=1e12)
+    async def async_fetch(item: int) -> int:
+        calls.append(item)
+        await asyncio.sleep(0.001)
+        return len(calls)
+
+    async def scenario() -> List[int]:
+        return [await async_fetch(2), await async_fetch(2)]
+
+    assert [sync_fetch(1), sync_fetch(1)] == [1, 2]
+    assert asyncio.run(scenario()) == [3, 4]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_early_refresh_serves_the_entry_without_a_close_expiry(backend: str,
+                                                               legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias(backend, ttl=3600)
+    calls: List[int] = []
+
+    @_decorator(backend, alias, early_refresh=True, beta=1.0)
+    def fetch(item: int) -> int:
+        calls.append(item)
+        return len(calls)
+
+    assert [fetch(1), fetch(1), fetch(1)] == [1, 1, 1]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stale_entry_is_served_while_it_is_refreshed_sync(backend: str,
+                                                          legacy_alias: Callable[..., str]) -> None:
+    alias: str = _stale_alias(backend, legacy_alias)
+    calls: List[int] = []
+
+    def fetch(item: int) -> str:
+        calls.append(item)
+        return f"fresh {len(calls)}"
+
+    decorated: Any = _decorator(backend, alias, stale_ttl=60)(fetch)
+    assert decorated(1) == "fresh 1"
+    _store(backend, alias, _key_from_args(fetch, (1,), {}), CachedEntry("stale", 0.0, time.time() - 1))
+
+    assert decorated(1) == "stale"
+    _wait_for(lambda: len(calls) == 2)
+    _wait_for(lambda: decorated(1) == "fresh 2")
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stale_entry_is_served_while_it_is_refreshed_async(backend: str,
+                                                           legacy_alias: Callable[..., str]) -> None:
+    alias: str = _stale_alias(backend, legacy_alias)
+    calls: List[int] = []
+
+    async def fetch(item: int) -> str:
+        calls.append(item)
+        return f"fresh {len(calls)}"
+
+    decorated: Any = _decorator(backend, alias, stale_ttl=60)(fetch)
+
+    async def scenario() -> None:
+        assert await decorated(1) == "fresh 1"
+        _store(backend, alias, _key_from_args(fetch, (1,), {}), CachedEntry("stale", 0.0, time.time() - 1))
+        assert await decorated(1) == "stale"
+        for _ in range(100):
+            if len(calls) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert await decorated(1) == "fresh 2"
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_redis_entries_outlive_the_ttl_by_the_stale_window(legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias("redis", ttl=30)
+
+    def fetch(item: int) -> int:
+        return item
+
+    decorated: Any = redis_cache(alias, stale_ttl=60)(fetch)
+    assert decorated(1) == 1
+    client: SyncRedisCache = SyncRedisCache(alias)
+    assert 60 < client._cache.ttl("legacy" + _key_from_args(fetch, (1,), {})) <= 90
+
+
+def test_stale_ttl_is_rejected_on_the_ttl_region(legacy_alias: Callable[..., str]) -> None:
+    alias: str = legacy_alias("memory", ttl=30)
+
+    def fetch(item: int) -> int:
+        return item
+
+    with pytest.raises(ConfigurationError):
+        memory_cache(alias, stale_ttl=60)(fetch)(1)
+    assert memory_cache(alias, strategy="FIFO", stale_ttl=60)(fetch)(1) == 1
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.batching import GetBatcher, get_batcher
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+
+
+class Backend:
+    """ fetch of a batcher that records every batch """
+
+    def __init__(self, delay: float = 0.0, error: bool = False) -> None:
+        self.batches: List[List[str]] = []
+        self._delay: float = delay
+        self._error: bool = error
+
+    async def fetch(self, ns_keys: List[str]) -> List[Any]:
+        self.batches.append(ns_keys)
+        await asyncio.sleep(self._delay)
+        if self._error:
+            raise ConnectionError("node down")
+        return [f"value-{ns_key}" for ns_key in ns_keys]
+
+
+def test_reads_of_the_same_iteration_share_a_batch() -> None:
+    backend: Backend = Backend()
+
+    async def scenario() -> List[Any]:
+        batcher: GetBatcher[Any] = GetBatcher(backend.fetch)
+        values: List[Any] = await asyncio.gather(*(batcher.load(key) for key in ["a", "b", "a", "c"]))
+        return values + [await batcher.load("d")]
+
+    assert asyncio.run(scenario()) == ["value-a", "value-b", "value-a", "value-c", "value-d"]
+    assert backend.batches == [["a", "b", "c"], ["d"]]
+
+
+def test_full_batches_are_sent_at_once() -> None:
+    backend: Backend = Backend()
+
+    async def scenario() -> List[Any]:
+        batcher: GetBatcher[Any] = GetBatcher(backend.fetch, max_batch=2)
+        return await asyncio.gather(*(batcher.load(str(key)) for key in range(5)))
+
+    assert asyncio.run(scenario()) == [f"value-{key}" for key in range(5)]
+    assert backend.batches == [["0", "1"], ["2", "3"], ["4"]]
+
+
+def test_the_window_waits_for_later_reads() -> None:
+    backend: Backend = Backend()
+
+    async def late(batcher: GetBatcher[Any]) -> Any:
+        await asyncio.sleep(0.001)
+        return await batcher.load("b")
+
+    async def scenario() -> List[Any]:
+        batcher: GetBatcher[Any] = GetBatcher(backend.fetch, window_us=100_000)
+        return await asyncio.gather(batcher.load("a"), late(batcher))
+
+    assert asyncio.run(scenario()) == ["value-a", "value-b"]
+    assert backend.batches == [["a", "b"]]
+
+
+def test_every_caller_gets_the_error() -> None:
+    backend: Backend = Backend(error=True)
+
+    async def scenario() -> List[Any]:
+        batcher: GetBatcher[Any] = GetBatcher(backend.fetch)
+        return await asyncio.gather(batcher.load("a"), batcher.load("b"), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(scenario())] == [ConnectionError, ConnectionError]
+
+
+def test_a_cancelled_caller_leaves_the_others_waiting() -> None:
+    backend: Backend = Backend(delay=0.01)
+
+    async def scenario() -> Any:
+        batcher: GetBatcher[Any] = GetBatcher(backend.fetch)
+        first: asyncio.Task = asyncio.create_task(batcher.load("a"))
+        second: asyncio.Task = asyncio.create_task(batcher.load("a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "value-a"
+    assert backend.batches == [["a"]]
+
+
+def test_batching_options() -> None:
+    assert get_batcher(None, Backend().fetch) is None
+    assert get_batcher(False, Backend().fetch) is None
+    assert isinstance(get_batcher({'max_batch': 8, 'window_us': 50}, Backend().fetch), GetBatcher)
+    with pytest.raises(ConfigurationError):
+        get_batcher({'size': 8}, Backend().fetch)
+    with pytest.raises(ConfigurationError):
+        get_batcher({'max_batch': 0}, Backend().fetch)
+    with pytest.raises(ConfigurationError):
+        get_batcher({'window_us': -1}, Backend().fetch)
+
+
+@pytest.mark.parametrize("sharded", [False, True])
+def test_redis_alias_with_batching(sharded: bool, make_alias: Callable[..., str],
+                                   redis_options: Dict[str, Any], redis_nodes: List[str]) -> None:
+    options: Dict[str, Any] = {'nodes': redis_nodes} if sharded else redis_options
+    alias: str = make_alias("redis", namespace="batch", batching=True, **options)
+
+    async def scenario() -> List[Any]:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        backend_fetch: Any = cache._batcher._fetch
+        batches: List[List[str]] = []
+
+        async def fetch(ns_keys: List[str]) -> List[Any]:
+            batches.append(ns_keys)
+            return await backend_fetch(ns_keys)
+
+        cache._batcher._fetch = fetch
+        assert await cache.put_many({key: key for key in range(20)})
+        values: List[Any] = await asyncio.gather(*(cache.get(key, "missing") for key in range(25)))
+        assert len(batches) == 1
+        return values
+
+    assert asyncio.run(scenario()) == list(range(20)) + ["missing"] * 5
@@ -0,0 +1,96 @@
+import asyncio
+import pathlib
+from typing import Any, Callable, Dict, Type
+
+import pytest
+
+from cache import cache_creator
+from cache.cache_creator import FwkCacheCreate, build_async, build_sync
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import FwkCache
+from cache.fwk_diskcache import AsyncDiskCache, SyncDiskCache
+from cache.fwk_memorycache import AsyncMemoryCache, SyncMemoryCache
+from cache.fwk_rediscache import AsyncRedisCache, SyncRedisCache
+from cache.fwk_sharedcache import AsyncSharedCache, SyncSharedCache
+
+
+@pytest.fixture
+def backend_options(request: pytest.FixtureRequest,
+                    tmp_path: pathlib.Path) -> Callable[[str], Dict[str, Any]]:
+    def options(backend: str) -> Dict[str, Any]:
+        if backend == "redis":
+            return request.getfixturevalue("redis_options")
+        if backend == "shared":
+            return {'slots': 64, 'slot_size': 256}
+        if backend == "disk":
+            return {'path': str(tmp_path / "disk"), 'compaction_interval': None}
+        return {}
+
+    return options
+
+
+@pytest.mark.parametrize("backend, sync_class, async_class", [
+    ("memory", SyncMemoryCache, AsyncMemoryCache),
+    ("redis", SyncRedisCache, AsyncRedisCache),
+    ("shared", SyncSharedCache, AsyncSharedCache),
+    ("disk", SyncDiskCache, AsyncDiskCache),
+])
+def test_builders_pick_the_class_of_the_backend(backend: str, sync_class: Type, async_class: Type,
+                                                make_alias: Callable[..., str],
+                                                backend_options: Callable[[str], Dict[str, Any]]) -> None:
+    alias: str = make_alias(backend, **backend_options(backend))
+    assert type(build_sync(alias)) is sync_class
+
+    async def build() -> Any:
+        return build_async(alias)
+
+    assert type(asyncio.run(build())) is async_class
+
+
+def test_unknown_backends_and_aliases(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("cassandra")
+    with pytest.raises(NotImplementedError):
+        build_sync(alias)
+    with pytest.raises(ConfigurationError):
+        FwkCacheCreate.create_sync("not_configured")
+
+
+def test_registry_shares_the_sync_client(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory")
+    client: Any = FwkCacheCreate.create_sync(alias)
+    assert FwkCacheCreate.create_sync(alias) is client
+    assert FwkCacheCreate.create(alias) is client
+    assert build_sync(alias) is not client
+
+
+def test_registry_keeps_one_async_client_per_loop(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory")
+
+    async def clients() -> Any:
+        client: Any = FwkCacheCreate.create_async(alias)
+        assert FwkCacheCreate.create(alias, asynchronous=True) is client
+        return client
+
+    assert asyncio.run(clients()) is not asyncio.run(clients())
+
+
+def test_reset_rebuilds_with_the_current_config(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="before")
+    client: Any = FwkCacheCreate.create_sync(alias)
+    FwkCache.load_cache({alias: {'backend': 'memory', 'namespace': 'after'}})
+    assert FwkCacheCreate.create_sync(alias)._namespace == "before"
+    FwkCacheCreate.reset()
+    rebuilt: Any = FwkCacheCreate.create_sync(alias)
+    assert rebuilt is not client
+    assert rebuilt._namespace == "after"
+
+
+def test_registry_is_not_instantiable() -> None:
+    with pytest.raises(TypeError):
+        FwkCacheCreate()
+
+
+def test_former_name_of_the_registry(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory")
+    # imported through the module, pytest would collect a Test* name
+    assert cache_creator.TestCacheCreate.create_sync(alias) is FwkCacheCreate.create_sync(alias)
@@ -0,0 +1,86 @@
+import os
+from typing import Any, Callable, Dict
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.compression import (BZ2_TAG, LZMA_TAG, ZLIB_TAG, CompressionStats, Compressor, decompress,
+                               get_compressor)
+from cache.exceptions import ConfigurationError
+from cache.serializers import decode, get_serializer
+
+PAYLOAD: bytes = b"compressible " * 200
+
+
+@pytest.mark.parametrize("codec, tag", [("zlib", ZLIB_TAG), ("lzma", LZMA_TAG), ("bz2", BZ2_TAG)])
+def test_codecs_round_trip(codec: str, tag: int) -> None:
+    compressor: Compressor = Compressor(codec)
+    compressed: bytes = compressor.compress(PAYLOAD)
+    assert compressed[0] == tag
+    assert len(compressed) < len(PAYLOAD)
+    assert decompress(compressed) == PAYLOAD
+
+
+def test_small_values_are_stored_raw() -> None:
+    compressor: Compressor = Compressor(min_size=1_024)
+    data: bytes = get_serializer("pickle").encode("short")
+    assert compressor.compress(data) == data
+    assert decompress(data) == data
+    assert compressor.stats.skipped == 1
+    assert compressor.stats.compressed == 0
+
+
+def test_incompressible_values_are_stored_raw() -> None:
+    compressor: Compressor = Compressor(min_size=0)
+    data: bytes = get_serializer("raw").encode(os.urandom(4_096))
+    assert compressor.compress(data) == data
+    assert compressor.stats.skipped == 1
+
+
+def test_stats_ratio() -> None:
+    stats: CompressionStats = CompressionStats()
+    assert stats.ratio == 1.0
+    compressor: Compressor = Compressor(stats=stats)
+    compressed: bytes = compressor.compress(PAYLOAD)
+    decompress(compressed, stats)
+    assert stats.raw_bytes == len(PAYLOAD)
+    assert stats.stored_bytes == len(compressed)
+    assert stats.ratio == len(PAYLOAD) / len(compressed)
+    assert stats.as_dict()["decompressed"] == 1
+
+
+def test_compressor_configuration() -> None:
+    assert get_compressor(None, "alias") is None
+    assert get_compressor("lzma", "alias").codec == "lzma"
+    compressor: Compressor = get_compressor({"codec": "zlib", "level": 1, "min_size": 10}, "alias")
+    assert (compressor.level, compressor.min_size) == (1, 10)
+    with pytest.raises(ConfigurationError):
+        get_compressor("snappy", "alias")
+    with pytest.raises(ConfigurationError):
+        get_compressor({"codec": "zlib", "window": 15}, "alias")
+
+
+def test_redis_alias_compresses_large_values(make_alias: Callable[..., str],
+                                             redis_options: Dict[str, Any]) -> None:
+    plain: str = make_alias("redis", **redis_options)
+    compressed: str = make_alias("redis", compression={"codec": "zlib", "min_size": 64}, **redis_options)
+    value: Dict[str, Any] = {"text": "compressible " * 200}
+    plain_cache: Any = FwkCacheCreate.create_sync(plain)
+    cache: Any = FwkCacheCreate.create_sync(compressed)
+    try:
+        assert cache.put("big", value)
+        assert cache.put("small", 1)
+        assert cache.get("big") == value
+        assert cache.get("small") == 1
+        stats: Dict[str, Any] = cache.compression_stats()
+        assert (stats["compressed"], stats["skipped"]) == (1, 1)
+        assert stats["ratio"] > 1
+        # values written without compression stay readable once it is enabled
+        assert plain_cache.put("old", value)
+        assert cache.get("old") == value
+        stored: bytes = cache._cache.get(cache._nskey("big"))
+        assert stored[0] == ZLIB_TAG
+        assert decode(decompress(stored)) == value
+    finally:
+        plain_cache.close()
+        cache.close()
@@ -0,0 +1,187 @@
+import asyncio
+import multiprocessing
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Set
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.disk_log import DiskLog
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import FwkCache
+from cache.fwk_diskcache import DiskCommonCache, SyncDiskCache
+
+
+@pytest.fixture
+def log_path(tmp_path: pathlib.Path) -> str:
+    return str(tmp_path / "log")
+
+
+@pytest.fixture
+def log(log_path: str) -> Iterator[DiskLog]:
+    disk_log: DiskLog = DiskLog(log_path, segment_size=1_024)
+    yield disk_log
+    disk_log.close()
+
+
+def test_put_get_delete(log: DiskLog) -> None:
+    assert log.put(b"key", b"value")
+    assert bytes(log.get(b"key")) == b"value"
+    assert log.put(b"key", b"other")
+    assert bytes(log.get(b"key")) == b"other"
+    assert log.delete(b"key")
+    assert not log.delete(b"key")
+    assert log.get(b"key") is None
+
+
+def test_entries_expire(log: DiskLog) -> None:
+    assert log.put(b"key", b"value", ttl=0.05)
+    time.sleep(0.1)
+    assert log.get(b"key") is None
+    assert log.count() == 0
+
+
+def test_the_index_is_rebuilt_on_open(log_path: str) -> None:
+    disk_log: DiskLog = DiskLog(log_path, segment_size=1_024)
+    for index in range(100):
+        disk_log.put(b"key%d" % index, b"value%d" % index)
+    disk_log.delete(b"key0")
+    disk_log.close()
+    segment: str = max(os.listdir(log_path))
+    with open(os.path.join(log_path, segment), "ab") as torn:
+        torn.write(b"\x01\x02\x03")
+    disk_log = DiskLog(log_path, segment_size=1_024)
+    try:
+        assert disk_log.get(b"key0") is None
+        assert bytes(disk_log.get(b"key99")) == b"value99"
+        assert disk_log.count(b"key") == 99
+        assert disk_log.put(b"after", b"tail")
+        assert bytes(disk_log.get(b"after")) == b"tail"
+    finally:
+        disk_log.close()
+
+
+def test_compaction_keeps_the_live_keys(log: DiskLog) -> None:
+    for round_ in range(20):
+        for index in range(10):
+            log.put(b"key%d" % index, b"value%d-%d" % (index, round_))
+    assert log.garbage_ratio() > 0.5
+    assert log.compact() > 0
+    assert log.garbage_ratio() < 0.5
+    assert all(bytes(log.get(b"key%d" % index)) == b"value%d-19" % index for index in range(10))
+
+
+def test_readers_race_the_compaction(log: DiskLog) -> None:
+    errors: List[BaseException] = []
+    stop: threading.Event = threading.Event()
+
+    def compact() -> None:
+        while not stop.is_set():
+            log.compact(1.0)
+
+    def read() -> None:
+        try:
+            while not stop.is_set():
+                for index in range(10):
+                    value: Any = log.get(b"key%d" % index)
+                    assert value is None or bytes(value).startswith(b"value%d-" % index)
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads: List[threading.Thread] = [threading.Thread(target=compact)] + \
+        [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for round_ in range(300):
+        for index in range(10):
+            log.put(b"key%d" % index, b"value%d-%d" % (index, round_))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    # a reader never maps a segment the compaction already removed
+    assert set(log._maps) <= set(log._sizes)
+    assert all(bytes(log.get(b"key%d" % index)) == b"value%d-299" % index for index in range(10))
+
+
+def test_a_directory_belongs_to_one_log(log: DiskLog, log_path: str) -> None:
+    with pytest.raises(ConfigurationError):
+        DiskLog(log_path)
+    with pytest.raises(ConfigurationError):
+        DiskLog(log_path + "-other", segment_size=8)
+
+
+@pytest.fixture
+def temp_dir(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return str(tmp_path)
+
+
+def test_workers_claim_their_own_default_path(temp_dir: str, make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("disk", compaction_interval=None)
+    other_worker: DiskLog = DiskLog(os.path.join(temp_dir, f"fwkcache-{alias}"))
+    try:
+        cache: Any = FwkCacheCreate.create_sync(alias)
+        assert cache.get_options()['path'] == os.path.join(temp_dir, f"fwkcache-{alias}-1")
+        assert cache.put("key", "value")
+        assert cache.get("key") == "value"
+    finally:
+        other_worker.close()
+
+
+def test_a_configured_path_is_not_shared(log_path: str, make_alias: Callable[..., str]) -> None:
+    holder: DiskLog = DiskLog(log_path)
+    try:
+        with pytest.raises(ConfigurationError):
+            FwkCacheCreate.create_sync(make_alias("disk", path=log_path, compaction_interval=None))
+    finally:
+        holder.close()
+
+
+def _serve(temp_dir: str, alias: str, barrier: Any, paths: Any) -> None:
+    """ a worker of the server, it keeps its log open until every worker has one """
+    tempfile.tempdir = temp_dir
+    FwkCache.load_cache({alias: {'backend': 'disk', 'compaction_interval': None}})
+    cache: SyncDiskCache = SyncDiskCache(alias)
+    cache.put("pid", os.getpid())
+    paths.put(cache.get_options()['path'])
+    barrier.wait()
+    DiskCommonCache._logs.pop(alias).close()
+
+
+def test_several_processes_start_with_the_default_path(temp_dir: str) -> None:
+    context: Any = multiprocessing.get_context("spawn")
+    barrier: Any = context.Barrier(3, timeout=30)
+    paths: Any = context.Queue()
+    workers: List[Any] = [context.Process(target=_serve, args=(temp_dir, "workers", barrier, paths))
+                          for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    claimed: Set[str] = {paths.get(timeout=30) for _ in workers}
+    for worker in workers:
+        worker.join(30)
+        assert worker.exitcode == 0
+    base: str = os.path.join(temp_dir, "fwkcache-workers")
+    assert claimed == {base, f"{base}-1", f"{base}-2"}
+
+
+def test_disk_alias(make_alias: Callable[..., str], tmp_path: pathlib.Path) -> None:
+    alias: str = make_alias("disk", namespace="files", path=str(tmp_path / "alias"), compaction_interval=None)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put_many({"a": b"x" * 10_000, "b": None})
+    assert [result.hit for result in cache.get_many(["a", "b", "c"])] == [True, True, False]
+    assert cache.size() == 2
+    assert cache.delete("a") == 1
+    assert cache.clear()
+    assert cache.size() == 0
+
+    async def scenario() -> Any:
+        async_cache: Any = FwkCacheCreate.create_async(alias)
+        assert await async_cache.put("async", [1, 2])
+        return await async_cache.get("async")
+
+    assert asyncio.run(scenario()) == [1, 2]
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List
+
+from cache.cache_creator import FwkCacheCreate
+from cache.decorators import cached
+from cache.fwk_rediscache import RedisCommonCache
+from cache.handles import AsyncHandle, SyncHandle
+
+
+def test_sync_handle_builds_one_client_for_every_thread() -> None:
+    built: List[object] = []
+
+    def factory() -> object:
+        built.append(object())
+        return built[-1]
+
+    handle: SyncHandle[object] = SyncHandle(factory)
+    clients: List[object] = []
+    threads: List[threading.Thread] = [threading.Thread(target=lambda: clients.append(handle.get()))
+                                       for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert all(client is built[0] for client in clients)
+
+
+def test_async_handle_builds_one_client_per_loop() -> None:
+    handle: AsyncHandle[object] = AsyncHandle(object)
+
+    async def same_loop() -> bool:
+        return handle.get() is handle.get()
+
+    async def client() -> object:
+        return handle.get()
+
+    assert asyncio.run(same_loop())
+    assert asyncio.run(client()) is not asyncio.run(client())
+
+
+def test_async_redis_pools_belong_to_their_loop(make_alias: Callable[..., str],
+                                               redis_options: Dict[str, Any]) -> None:
+    alias: str = make_alias("redis", **redis_options)
+
+    async def pool() -> Any:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        assert await cache.put("key", 1)
+        assert await cache.get("key") == 1
+        assert FwkCacheCreate.create_async(alias) is cache
+        return cache._cache.connection_pool
+
+    first: Any = asyncio.run(pool())
+    second: Any = asyncio.run(pool())
+    assert first is not second
+    sync_pool: Any = FwkCacheCreate.create_sync(alias)._cache.connection_pool
+    assert list(RedisCommonCache._connections_pool[alias].values()) == [sync_pool]
+
+
+def test_decorated_coroutine_runs_on_several_loops(make_alias: Callable[..., str],
+                                                   redis_options: Dict[str, Any]) -> None:
+    alias: str = make_alias("redis", ttl=60, **redis_options)
+    calls: List[int] = []
+
+    @cached(alias)
+    async def fetch(item: int) -> int:
+        calls.append(item)
+        return item * 2
+
+    async def twice(item: int) -> List[int]:
+        return [await fetch(item), await fetch(item)]
+
+    results: List[List[int]] = []
+    threads: List[threading.Thread] = [threading.Thread(target=lambda item=item: results.append(
+        asyncio.run(twice(item)))) for item in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [[0, 0], [2, 2], [4, 4], [6, 6]]
+    assert asyncio.run(twice(1)) == [2, 2]
+    assert sorted(calls) == [0, 1, 2, 3]
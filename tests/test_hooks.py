@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.fwk_cache import FwkCache
+from cache.hooks import ERROR, FAILED, HIT, MISS, OK, CacheHook, HookEvent, key_hash
+
+
+class Recorder(CacheHook):
+    """ keeps the completed events and the state before handed to after """
+
+    def __init__(self) -> None:
+        self.events: List[HookEvent] = []
+        self.states: List[Any] = []
+
+    def before(self, event: HookEvent) -> Any:
+        assert event.duration is None and event.outcome is None
+        return event.operation
+
+    def after(self, event: HookEvent, state: Any) -> None:
+        self.events.append(event)
+        self.states.append(state)
+
+    @property
+    def outcomes(self) -> List[Tuple[str, Optional[str]]]:
+        return [(event.operation, event.outcome) for event in self.events]
+
+
+class Broken(CacheHook):
+    def before(self, event: HookEvent) -> Any:
+        raise RuntimeError("before")
+
+    def after(self, event: HookEvent, state: Any) -> None:
+        raise RuntimeError("after")
+
+
+@pytest.fixture
+def add_hook() -> Iterator[Callable[..., None]]:
+    """ registers hooks for the test and removes them afterwards """
+    added: List[Tuple[CacheHook, Optional[str]]] = []
+
+    def add(hook: CacheHook, alias: Optional[str] = None) -> None:
+        FwkCache.add_hook(hook, alias)
+        added.append((hook, alias))
+
+    yield add
+    for hook, alias in added:
+        if hook in FwkCache._hooks.get(alias, []):
+            FwkCache.remove_hook(hook, alias)
+
+
+def test_events_of_the_sync_operations(make_alias: Callable[..., str], add_hook: Callable[..., None]) -> None:
+    alias: str = make_alias("memory", namespace="users")
+    recorder: Recorder = Recorder()
+    add_hook(recorder, alias)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put("key", [1, 2, 3])
+    assert cache.get("key") == [1, 2, 3]
+    assert cache.get("other", "default") == "default"
+    assert cache.exists("key")
+    assert cache.delete("key") == 1
+    assert cache.clear("archive")
+    assert recorder.outcomes == [("put", OK), ("get", HIT), ("get", MISS), ("exists", HIT), ("delete", HIT),
+                                 ("clear", OK)]
+    assert recorder.states == ["put", "get", "get", "exists", "delete", "clear"]
+    put, hit = recorder.events[:2]
+    assert (put.alias, put.namespace, put.backend) == (alias, "users", "memory")
+    assert put.key_hash == hit.key_hash == key_hash("users", "key")
+    assert put.size == hit.size > 0
+    assert recorder.events[2].size is None
+    assert all(event.duration >= 0 for event in recorder.events)
+    assert recorder.events[-1].namespace == "archive" and recorder.events[-1].key_hash is None
+
+
+def test_events_of_the_async_operations(make_alias: Callable[..., str],
+                                        add_hook: Callable[..., None]) -> None:
+    alias: str = make_alias("memory")
+    recorder: Recorder = Recorder()
+    add_hook(recorder)
+
+    async def scenario() -> None:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        assert await cache.put("key", 1)
+        assert await cache.get("key") == 1
+        assert await cache.get("other") is None
+        assert await cache.delete("other") == 0
+
+    asyncio.run(scenario())
+    assert [(event.operation, event.outcome) for event in recorder.events if event.alias == alias] == \
+        [("put", OK), ("get", HIT), ("get", MISS), ("delete", MISS)]
+
+
+def test_failed_and_raising_operations(make_alias: Callable[..., str], add_hook: Callable[..., None]) -> None:
+    alias: str = make_alias("shared", slots=64, slot_size=128)
+    recorder: Recorder = Recorder()
+    add_hook(recorder, alias)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert not cache.put("key", "x" * 1_000)
+    cache._table = None
+    with pytest.raises(AttributeError):
+        cache.get("key")
+    assert recorder.outcomes == [("put", FAILED), ("get", ERROR)]
+    assert isinstance(recorder.events[-1].error, AttributeError)
+
+
+def test_a_broken_hook_does_not_break_the_operation(make_alias: Callable[..., str],
+                                                    add_hook: Callable[..., None],
+                                                    caplog: pytest.LogCaptureFixture) -> None:
+    alias: str = make_alias("memory")
+    recorder: Recorder = Recorder()
+    add_hook(Broken(), alias)
+    add_hook(recorder, alias)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    with caplog.at_level(logging.ERROR, logger="cache.hooks"):
+        assert cache.put("key", 1)
+        assert cache.get("key") == 1
+    assert recorder.outcomes == [("put", OK), ("get", HIT)]
+    assert "failed before put" in caplog.text and "failed after get" in caplog.text
+
+
+def test_hooks_added_after_the_first_use_fire(make_alias: Callable[..., str],
+                                              add_hook: Callable[..., None]) -> None:
+    alias: str = make_alias("memory")
+    other: str = make_alias("memory")
+    first: Any = FwkCacheCreate.create_sync(alias)
+    untouched: Any = FwkCacheCreate.create_sync(other)
+    assert first.put("key", 1)
+    recorder: Recorder = Recorder()
+    add_hook(recorder, alias)
+    assert FwkCacheCreate.create_sync(other) is untouched
+    assert FwkCacheCreate.create_sync(alias).get("key") == 1
+    assert recorder.outcomes == [("get", HIT)]
+    FwkCache.remove_hook(recorder, alias)
+    assert FwkCacheCreate.create_sync(alias).get("key") == 1
+    assert len(recorder.events) == 1
+
+
+def test_global_hooks_added_after_the_first_use_fire(make_alias: Callable[..., str],
+                                                     add_hook: Callable[..., None]) -> None:
+    alias: str = make_alias("memory")
+    recorder: Recorder = Recorder()
+
+    async def get() -> Any:
+        return await FwkCacheCreate.create_async(alias).get("key")
+
+    async def scenario() -> List[Any]:
+        values: List[Any] = [await get()]
+        add_hook(recorder)
+        values.append(await get())
+        FwkCache.remove_hook(recorder)
+        values.append(await get())
+        return values
+
+    assert asyncio.run(scenario()) == [None, None, None]
+    assert [(event.alias, event.outcome) for event in recorder.events] == [(alias, MISS)]
+
+
+def test_the_key_hash_keeps_the_namespace_apart() -> None:
+    assert key_hash("users", "key") == zlib.crc32(b"users:key")
+    assert key_hash("ab", "c") != key_hash("a", "bc")
+    assert key_hash("", "key") == zlib.crc32(b"key")
+
+
+def test_hooks_of_a_tiered_alias(make_alias: Callable[..., str], add_hook: Callable[..., None],
+                                 redis_options: Dict[str, Any]) -> None:
+    local: str = make_alias("memory")
+    remote: str = make_alias("redis", namespace="users", **redis_options)
+    alias: str = make_alias("tiered", local=local, remote=remote)
+    recorder: Recorder = Recorder()
+    add_hook(recorder, alias)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put("key", 1)
+    assert cache.get("key") == 1
+    assert cache.get("other") is None
+    assert cache.delete("key") == 1
+
+    async def scenario() -> None:
+        async_cache: Any = FwkCacheCreate.create_async(alias)
+        assert await async_cache.put("key", 2)
+        assert await async_cache.exists("key")
+
+    asyncio.run(scenario())
+    assert recorder.outcomes == [("put", OK), ("get", HIT), ("get", MISS), ("delete", HIT), ("put", OK),
+                                 ("exists", HIT)]
+    assert {(event.alias, event.namespace, event.backend) for event in recorder.events} == \
+        {(alias, "users", "tiered")}
+    assert recorder.events[0].key_hash == key_hash("users", "key")
+
+
+def test_removing_an_unknown_hook() -> None:
+    with pytest.raises(ConfigurationError):
+        FwkCache.remove_hook(Recorder(), "not_registered")
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import pytest
+
+from cache.exceptions import ConfigurationError
+from cache.keys import DIGEST_SIZE, KeyBuilder, canonical_repr
+
+
+def lookup(query: Any, limit: int = 10, user: Optional[str] = None) -> None:
+    return None
+
+
+def variadic(query: Any, *args: Any, **options: Any) -> None:
+    return None
+
+
+def test_defaults_and_keywords_share_the_key() -> None:
+    builder: KeyBuilder = KeyBuilder(lookup)
+    key: str = builder.key((1,), {})
+    assert builder.key((1, 10), {}) == key
+    assert builder.key((), {"query": 1, "limit": 10}) == key
+    assert builder.key((1,), {"user": None}) == key
+    assert builder.key((1, 11), {}) != key
+
+
+def test_mapping_order_does_not_change_the_key() -> None:
+    builder: KeyBuilder = KeyBuilder(lookup)
+    first: Dict[str, Any] = {"a": 1, "b": {"x": [1, 2], "y": None}}
+    second: Dict[str, Any] = {"b": {"y": None, "x": [1, 2]}, "a": 1}
+    assert builder.key((first,), {}) == builder.key((second,), {})
+    assert builder.hashed_key((first,), {}) == builder.hashed_key((second,), {})
+    assert builder.key(({"a": 1},), {}) != builder.key(({"a": 2},), {})
+
+
+def test_set_order_does_not_change_the_key() -> None:
+    builder: KeyBuilder = KeyBuilder(lookup)
+    words: list = [f"word{index}" for index in range(50)]
+    assert builder.key((set(words),), {}) == builder.key((set(reversed(words)),), {})
+    assert builder.key((frozenset(words),), {}) == builder.key((frozenset(reversed(words)),), {})
+
+
+def test_containers_of_different_types_do_not_collide() -> None:
+    assert canonical_repr({1, 2}) != canonical_repr(frozenset({1, 2}))
+    assert canonical_repr({"a": 1}) != canonical_repr(OrderedDict(a=1))
+    assert canonical_repr({"a": 1}) != canonical_repr([("a", 1)])
+    assert canonical_repr((1,)) != canonical_repr([1])
+    assert canonical_repr(set()) != canonical_repr({})
+
+
+@pytest.mark.parametrize("value", [1, "text", None, 2.5, (1,), (), [1, (2, "x")], set(), frozenset()])
+def test_plain_values_keep_their_repr(value: Any) -> None:
+    assert canonical_repr(value) == repr(value)
+
+
+def test_extra_keywords_ignore_their_order() -> None:
+    builder: KeyBuilder = KeyBuilder(variadic)
+    assert builder.key((1,), {"a": 1, "b": 2}) == builder.key((1,), {"b": 2, "a": 1})
+    assert builder.key((1, 2), {}) != builder.key((1,), {})
+
+
+def test_include_and_exclude() -> None:
+    builder: KeyBuilder = KeyBuilder(lookup, exclude=["user"])
+    assert builder.selected == ("query", "limit")
+    assert builder.key((1,), {"user": "a"}) == builder.key((1,), {"user": "b"})
+    assert KeyBuilder(lookup, include=["query"]).selected == ("query",)
+    with pytest.raises(ConfigurationError):
+        KeyBuilder(lookup, exclude=["missing"])
+
+
+def test_hashed_keys_have_a_fixed_length() -> None:
+    builder: KeyBuilder = KeyBuilder(lookup)
+    assert len(builder.hashed_key(("x" * 10_000,), {})) == DIGEST_SIZE * 2
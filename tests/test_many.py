@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.cache_creator import build_async, build_sync
+from cache.fwk_cache import CacheResult
+
+
+@pytest.fixture(params=["memory", "redis"])
+def alias(request: pytest.FixtureRequest, make_alias: Callable[..., str]) -> str:
+    if request.param == "redis":
+        return make_alias("redis", namespace="many:", **request.getfixturevalue("redis_options"))
+    return make_alias("memory", namespace="many:")
+
+
+def test_sync_many_round_trip(alias: str) -> None:
+    fwk_cache: Any = build_sync(alias)
+    assert fwk_cache.put_many({"a": 1, "b": None, "c": [0]}) is True
+    results: List[CacheResult] = fwk_cache.get_many(["a", "b", "missing", "c"], "default")
+    assert results == [CacheResult(True, 1), CacheResult(True, None), CacheResult(False, "default"),
+                       CacheResult(True, [0])]
+    assert fwk_cache.delete_many(["a", "missing", "c"]) == 2
+    assert [result.hit for result in fwk_cache.get_many(["a", "b", "c"])] == [False, True, False]
+
+
+def test_sync_many_empty(alias: str) -> None:
+    fwk_cache: Any = build_sync(alias)
+    assert fwk_cache.get_many([]) == []
+    assert fwk_cache.put_many({}) is True
+    assert fwk_cache.delete_many([]) == 0
+
+
+def test_async_many_round_trip(alias: str) -> None:
+    async def scenario() -> None:
+        fwk_cache: Any = build_async(alias)
+        items: Dict[int, Any] = {key: {"id": key} for key in range(50)}
+        assert await fwk_cache.put_many(items) is True
+        results: List[CacheResult] = await fwk_cache.get_many(list(range(60)))
+        assert [result.value for result in results[:50]] == list(items.values())
+        assert not any(result.hit for result in results[50:])
+        assert await fwk_cache.delete_many(range(0, 60, 2)) == 25
+        assert await fwk_cache.get(1) == {"id": 1}
+        assert await fwk_cache.get(2, "gone") == "gone"
+        await fwk_cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_redis_put_reports_the_set_reply(make_alias: Callable[..., str],
+                                         redis_options: Dict[str, Any]) -> None:
+    alias: str = make_alias("redis", **redis_options)
+    sync_cache: Any = build_sync(alias)
+    assert sync_cache.put("a", 1) is True
+    # SET answers nil when it stores nothing
+    sync_cache._cache.set = lambda *args, **kwargs: None
+    assert sync_cache.put("a", 2) is False
+
+    async def scenario() -> List[bool]:
+        async_cache: Any = build_async(alias)
+        stored: List[bool] = [await async_cache.put("b", 1)]
+
+        async def not_stored(*args: Any, **kwargs: Any) -> None:
+            return None
+
+        async_cache._cache.set = not_stored
+        stored.append(await async_cache.put("b", 2))
+        await async_cache.close()
+        return stored
+
+    assert asyncio.run(scenario()) == [True, False]
@@ -0,0 +1,124 @@
+import asyncio
+import random
+from typing import Any, Callable, Dict
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.metrics import CacheMetrics, all_metrics, count_evictions, get_metrics, render_prometheus
+from cache.policies import TinyLFUCache
+
+
+def metrics_of(alias: str, namespace: str = "", backend: str = "memory") -> CacheMetrics:
+    return get_metrics(alias, namespace, backend)
+
+
+def test_sync_counters_and_latency(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="users")
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put("a", None)
+    # a stored falsy value is still a hit, the default only answers the misses
+    assert cache.get("a", "default") is None
+    assert cache.get("b", "default") == "default"
+    assert cache.put_many({"c": 1, "d": 2})
+    assert [result.hit for result in cache.get_many(["c", "e"])] == [True, False]
+    assert cache.delete_many(["c", "d", "e"]) == 2
+    assert cache.delete("a") == 1
+    values: Dict[str, Any] = metrics_of(alias, "users").as_dict()
+    assert {name: values[name] for name in ("hits", "misses", "sets", "deletes", "errors")} == \
+        {"hits": 2, "misses": 2, "sets": 3, "deletes": 3, "errors": 0}
+    assert values["latency"]["get"]["count"] == 2
+    assert values["latency"]["delete_many"]["count"] == 1
+    assert values["latency"]["clear"]["count"] == 0
+
+
+def test_async_counters(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory")
+
+    async def scenario() -> None:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        assert await cache.put("a", 1)
+        assert await cache.get("a") == 1
+        assert await cache.get("b") is None
+        assert await cache.exists("a")
+
+    asyncio.run(scenario())
+    metrics: CacheMetrics = metrics_of(alias)
+    assert (metrics.hits, metrics.misses, metrics.sets) == (1, 1, 1)
+    assert metrics.latency["exists"].count == 1
+
+
+def test_put_many_with_keyword_items(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory")
+    assert FwkCacheCreate.create_sync(alias).put_many(items={"a": 1, "b": 2})
+
+    async def scenario() -> bool:
+        return await FwkCacheCreate.create_async(alias).put_many(items={"c": 3})
+
+    assert asyncio.run(scenario())
+    assert metrics_of(alias).sets == 3
+
+
+def test_errors_are_counted_and_raised(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory"))
+    # a region that is gone fails every operation
+    cache._cache = None
+    with pytest.raises(TypeError):
+        cache.put("a", 1)
+    with pytest.raises(AttributeError):
+        cache.get_many(["a"])
+    assert metrics_of(cache._alias).errors == 2
+
+
+@pytest.mark.parametrize("options", [
+    {'strategy': "FIFO"}, {'strategy': "LFU"}, {'strategy': "MRU"}, {'strategy': "RR"},
+    {'strategy': "TTL", 'ttl': 60}, {'strategy': "TINYLFU"}, {'strategy': "ARC"}, {'strategy': "2Q"},
+    {'strategy': "TINYLFU", 'shards': 4},
+])
+def test_every_dropped_entry_is_an_eviction(options: Dict[str, Any], make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", max_size=20, **options)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    for key in range(300):
+        assert cache.put(key, key)
+        if key % 3 == 0:
+            cache.get(key - 10)
+    assert metrics_of(alias).evictions == 300 - len(list(cache._cache))
+
+
+def test_tinylfu_window_losers_are_evictions() -> None:
+    # with sized values the window overflows while the main area is full, the losers are dropped by
+    # the balance of the segments and not by cachetools making room
+    region: TinyLFUCache = TinyLFUCache(10_000, getsizeof=len)
+    metrics: CacheMetrics = CacheMetrics("tinylfu", "", "memory")
+    count_evictions(region, metrics)
+    generator: random.Random = random.Random(1)
+    stored: int = 0
+    for _ in range(50_000):
+        key: int = generator.randrange(5_000)
+        if region.get(key) is None:
+            stored += 1
+            region[key] = "x" * generator.randint(1, 60)
+    assert metrics.evictions == stored - len(region)
+
+
+def test_disabled_metrics(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", max_size=2, metrics=False)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    for key in range(5):
+        cache.put(key, key)
+    cache.get(0)
+    assert all(metrics.alias != alias for metrics in all_metrics())
+
+
+def test_prometheus_text(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace='quo"te')
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    cache.put("a", 1)
+    cache.get("a")
+    text: str = render_prometheus()
+    labels: str = f'alias="{alias}",namespace="quo\\"te",backend="memory"'
+    assert "# TYPE fwkcache_hits_total counter" in text
+    assert f"fwkcache_hits_total{{{labels}," in text
+    assert f'fwkcache_operation_seconds_count{{{labels},operation="get",' in text
+    assert f'fwkcache_operation_seconds_bucket{{{labels},operation="put",' in text
+    assert 'operation="clear"' not in text.split(alias)[-1]
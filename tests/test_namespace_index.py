@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Callable, List
+
+from cache.cache_creator import FwkCacheCreate
+from cache.fwk_memorycache import INDEX_PRUNE_FACTOR, INDEX_PRUNE_SLACK, MemoryCommonCache
+
+
+def test_size_and_iter_keys_follow_the_namespace(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory", namespace="users", strategy="FIFO"))
+    assert cache.put_many({"admin:1": 1, "admin:2": 2, "guest:1": 3})
+    assert cache.size() == 3
+    assert sorted(cache.iter_keys()) == ["admin:1", "admin:2", "guest:1"]
+    assert sorted(cache.iter_keys("admin:")) == ["admin:1", "admin:2"]
+    assert cache.delete("admin:1") == 1
+    assert sorted(cache.iter_keys("admin:")) == ["admin:2"]
+    assert cache.size("other") == 0
+
+
+def test_clear_only_touches_the_keys_of_the_namespace(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory", namespace="users", strategy="FIFO"))
+    assert cache.put("key", "value")
+    assert cache.clear("other")
+    assert cache.get("key") == "value"
+    assert cache.clear()
+    assert cache.get("key") is None
+    assert cache.size() == 0
+
+
+def test_evicted_keys_leave_the_index(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="users", strategy="FIFO", max_size=2)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    for key in range(5):
+        assert cache.put(key, key)
+    assert sorted(cache.iter_keys()) == ["3", "4"]
+    assert MemoryCommonCache._indexed[alias] == 2
+
+
+def test_index_stays_bounded_under_churn(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="users", strategy="FIFO", max_size=10)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    for key in range(10_000):
+        assert cache.put(key, key)
+    assert MemoryCommonCache._indexed[alias] <= INDEX_PRUNE_FACTOR * 10 + INDEX_PRUNE_SLACK + 1
+    assert cache.size() == 10
+
+
+def test_async_clients_share_the_index(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="users", strategy="FIFO")
+
+    async def scenario() -> List[str]:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        assert await cache.put("async", 1)
+        return sorted(FwkCacheCreate.create_sync(alias).iter_keys())
+
+    assert asyncio.run(scenario()) == ["async"]
+    sync_cache: Any = FwkCacheCreate.create_sync(alias)
+    assert sync_cache.clear()
+    assert sync_cache.size() == 0
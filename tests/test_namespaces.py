@@ -0,0 +1,74 @@
+import pathlib
+from typing import Any, Callable, Dict
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.fwk_cache import namespace_prefix, namespaced_key
+
+
+@pytest.fixture(params=["memory", "redis", "shared", "disk"])
+def namespaced_alias(request: pytest.FixtureRequest, make_alias: Callable[..., str],
+                     tmp_path: pathlib.Path) -> Callable[[str], str]:
+    backend: str = request.param
+
+    def make(namespace: str) -> str:
+        options: Dict[str, Any] = {}
+        if backend == "redis":
+            options = request.getfixturevalue("redis_options")
+        elif backend == "shared":
+            options = {'slots': 64, 'slot_size': 256}
+        elif backend == "disk":
+            options = {'path': str(tmp_path / namespace), 'compaction_interval': None}
+        return make_alias(backend, namespace=namespace, **options)
+
+    return make
+
+
+def test_namespaced_keys() -> None:
+    assert namespaced_key("main", "key") == "main:key"
+    assert namespaced_key("", "key") == "key"
+    assert namespace_prefix("main") == "main:"
+    assert namespace_prefix("") == ""
+
+
+def test_clear_keeps_the_namespaces_sharing_its_prefix(namespaced_alias: Callable[[str], str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(namespaced_alias("mainline"))
+    try:
+        assert cache.put("key", "value")
+        assert cache.clear("main")
+        assert cache.get("key") == "value"
+        assert cache.clear()
+        assert cache.get("key") is None
+    finally:
+        cache.close()
+
+
+def test_redis_clear_leaves_the_other_aliases_on_the_server(make_alias: Callable[..., str],
+                                                             redis_options: Dict[str, Any]) -> None:
+    main: Any = FwkCacheCreate.create_sync(make_alias("redis", namespace="main", **redis_options))
+    mainline: Any = FwkCacheCreate.create_sync(make_alias("redis", namespace="mainline", **redis_options))
+    try:
+        assert main.put("key", 1)
+        assert mainline.put("key", 2)
+        assert main.clear()
+        assert main.get("key") is None
+        assert mainline.get("key") == 2
+    finally:
+        main.close()
+        mainline.close()
+
+
+def test_redis_clear_escapes_glob_characters(make_alias: Callable[..., str],
+                                             redis_options: Dict[str, Any]) -> None:
+    pattern: Any = FwkCacheCreate.create_sync(make_alias("redis", namespace="m*", **redis_options))
+    other: Any = FwkCacheCreate.create_sync(make_alias("redis", namespace="main", **redis_options))
+    try:
+        assert pattern.put("key", 1)
+        assert other.put("key", 2)
+        assert pattern.clear()
+        assert pattern.get("key") is None
+        assert other.get("key") == 2
+    finally:
+        pattern.close()
+        other.close()
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.decorators import cached
+from cache.fwk_cache import namespace_prefix
+from cache.refresh import CachedEntry
+
+
+@pytest.fixture(params=["memory", "redis"])
+def alias(request: pytest.FixtureRequest, make_alias: Callable[..., str]) -> str:
+    if request.param == "redis":
+        return make_alias("redis", ttl=3600, **request.getfixturevalue("redis_options"))
+    return make_alias("memory", strategy="FIFO")
+
+
+@pytest.mark.parametrize("result", [0, "", [], False, None])
+def test_falsy_results_are_hits(alias: str, result: Any) -> None:
+    calls: List[int] = []
+
+    @cached(alias)
+    def fetch(item: int) -> Any:
+        calls.append(item)
+        return result
+
+    assert fetch(1) == result
+    assert fetch(1) == result
+    assert calls == [1]
+
+
+def test_get_tells_a_stored_default_from_a_miss(alias: str) -> None:
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    missing: Any = object()
+    assert cache.put("none", None)
+    assert cache.get("none", missing) is None
+    assert cache.get("absent", missing) is missing
+    assert [result.hit for result in cache.get_many(["none", "absent"])] == [True, False]
+
+
+def test_negative_results_expire_after_negative_ttl(alias: str) -> None:
+    calls: List[int] = []
+    found: Dict[int, Optional[str]] = {1: None}
+
+    @cached(alias, negative_ttl=60)
+    def fetch(item: int) -> Optional[str]:
+        calls.append(item)
+        return found[item]
+
+    assert fetch(1) is None
+    assert fetch(1) is None
+    assert calls == [1]
+
+    # the negative entry is an expiring CachedEntry, once past its deadline the next call recomputes
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    [key] = _stored_keys(cache)
+    stored: Any = cache.get(key)
+    assert isinstance(stored, CachedEntry) and stored.value is None
+    assert cache.put(key, CachedEntry(None, 0.0, time.time() - 1))
+    found[1] = "found"
+    assert fetch(1) == "found"
+    assert fetch(1) == "found"
+    assert calls == [1, 1]
+
+
+def test_negative_ttl_on_async_functions(alias: str) -> None:
+    calls: List[int] = []
+
+    @cached(alias, negative_ttl=60)
+    async def fetch(item: int) -> Optional[str]:
+        calls.append(item)
+        return None
+
+    async def scenario() -> List[Optional[str]]:
+        return [await fetch(1), await fetch(1)]
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert calls == [1]
+
+
+def _stored_keys(cache: Any) -> List[str]:
+    if hasattr(cache, "iter_keys"):
+        return list(cache.iter_keys())
+    return [key.decode().removeprefix(namespace_prefix(cache._namespace)) for key in cache._cache.keys("*")]
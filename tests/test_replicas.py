@@ -0,0 +1,123 @@
+import asyncio
+import socket
+import time
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.replicas import LEAST_OUTSTANDING, ReadRouter
+
+
+def test_round_robin_takes_the_replicas_in_turn() -> None:
+    router: ReadRouter[str] = ReadRouter(["r0", "r1", "r2"])
+    assert [router.pick(["key"]) for _ in range(6)] == [0, 1, 2, 0, 1, 2]
+    assert router.client(1) == "r1"
+
+
+def test_least_outstanding_avoids_the_busy_replica() -> None:
+    router: ReadRouter[str] = ReadRouter(["r0", "r1"], LEAST_OUTSTANDING)
+    router.begin(0)
+    assert router.pick(["key"]) == 1
+    router.begin(1)
+    router.begin(1)
+    assert router.pick(["key"]) == 0
+    router.end(1)
+    router.end(1)
+    assert router.pick(["key"]) == 1
+
+
+def test_written_keys_are_read_from_the_primary_for_the_window() -> None:
+    router: ReadRouter[str] = ReadRouter(["r0"], read_your_writes=0.05)
+    router.written(["a"])
+    assert router.pick(["a"]) is None
+    assert router.pick(["b", "a"]) is None
+    assert router.pick(["b"]) == 0
+    time.sleep(0.1)
+    assert router.pick(["a"]) == 0
+    router.written(["b"])
+    # the expired windows are dropped by the next write
+    assert list(router._pinned) == ["b"]
+
+
+def test_router_options() -> None:
+    with pytest.raises(ConfigurationError):
+        ReadRouter([])
+    with pytest.raises(ConfigurationError):
+        ReadRouter(["r0"], "random")
+    router: ReadRouter[str] = ReadRouter(["r0"])
+    router.written(["a"])
+    assert router.pick(["a"]) == 0
+
+
+def unused_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def replicated(make_alias: Callable[..., str], redis_options: Dict[str, Any],
+               redis_nodes: List[str]) -> Callable[..., str]:
+    """ the first server is the primary and the others its replicas, the fake servers do not
+        replicate so every replica is seeded through an alias of its own
+    """
+    for position, node in enumerate(redis_nodes[1:], 1):
+        host, _, port = node.rpartition(":")
+        seed: Any = FwkCacheCreate.create_sync(make_alias("redis", namespace="rep", host=host, port=port))
+        assert seed.put("key", f"replica{position}")
+
+    def make(**options: Any) -> str:
+        return make_alias("redis", namespace="rep", replicas=redis_nodes[1:], **{**redis_options, **options})
+
+    return make
+
+
+def test_sync_reads_go_to_the_replicas(replicated: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(replicated())
+    assert [cache.get("key") for _ in range(4)] == ["replica1", "replica2"] * 2
+    assert cache.put("key", "primary")
+    assert cache.exists("key")
+    assert [result.value for result in cache.get_many(["key"])] in (["replica1"], ["replica2"])
+
+
+def test_async_reads_go_to_the_replicas(replicated: Callable[..., str]) -> None:
+    async def scenario() -> List[Any]:
+        cache: Any = FwkCacheCreate.create_async(replicated())
+        assert await cache.put("key", "primary")
+        return [await cache.get("key") for _ in range(2)]
+
+    assert asyncio.run(scenario()) == ["replica1", "replica2"]
+
+
+def test_read_your_writes(replicated: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(replicated(read_your_writes=60))
+    assert cache.get("key") == "replica1"
+    assert cache.put("key", "primary")
+    assert [cache.get("key") for _ in range(3)] == ["primary"] * 3
+    assert [result.value for result in cache.get_many(["other", "key"])] == [None, "primary"]
+
+
+def test_an_unreachable_replica_falls_back_to_the_primary(make_alias: Callable[..., str],
+                                                          redis_options: Dict[str, Any]) -> None:
+    alias: str = make_alias("redis", replicas=[f"127.0.0.1:{unused_port()}"], **redis_options)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put("key", "primary")
+    assert cache.get("key") == "primary"
+
+    async def scenario() -> Any:
+        return await FwkCacheCreate.create_async(alias).get("key")
+
+    assert asyncio.run(scenario()) == "primary"
+
+
+def test_replica_options(make_alias: Callable[..., str], redis_options: Dict[str, Any],
+                         redis_nodes: List[str]) -> None:
+    with pytest.raises(ConfigurationError):
+        FwkCacheCreate.create_sync(make_alias("redis", nodes=redis_nodes[:2], replicas=redis_nodes[2:]))
+    with pytest.raises(ConfigurationError):
+        FwkCacheCreate.create_sync(make_alias("redis", replicas=redis_nodes[:1], **redis_options))
+    with pytest.raises(ConfigurationError):
+        FwkCacheCreate.create_sync(make_alias("redis", replicas=redis_nodes[1:], read_strategy="random",
+                                              **redis_options))
@@ -0,0 +1,83 @@
+import threading
+from typing import Any, Callable, List
+
+import pytest
+from cachetools import FIFOCache
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.segmented import SegmentedCache
+
+
+def test_mapping_operations() -> None:
+    region: SegmentedCache = SegmentedCache(4, lambda: FIFOCache(10))
+    for key in range(20):
+        region[key] = key * 2
+    assert len(region) == 20
+    assert sorted(region) == list(range(20))
+    assert region[3] == 6 and region.get(99, "missing") == "missing"
+    assert 3 in region and 99 not in region
+    assert region.pop(3) == 6 and region.pop(3, None) is None
+    with pytest.raises(KeyError):
+        region.pop(3)
+    del region[4]
+    with pytest.raises(KeyError):
+        region[4]
+    region.clear()
+    assert len(region) == 0
+
+
+def test_capacity_is_split_between_the_segments() -> None:
+    region: SegmentedCache = SegmentedCache(4, lambda: FIFOCache(5))
+    assert region.shards == 4 and region.maxsize == 20
+    for key in range(1_000):
+        region[key] = key
+    assert len(region) <= 20
+    assert region.currsize == len(region)
+
+
+def test_at_least_one_shard() -> None:
+    with pytest.raises(ConfigurationError):
+        SegmentedCache(0, lambda: FIFOCache(5))
+
+
+def test_concurrent_writers_and_iteration() -> None:
+    region: SegmentedCache = SegmentedCache(8, lambda: FIFOCache(100))
+    errors: List[BaseException] = []
+
+    def write(offset: int) -> None:
+        try:
+            for key in range(2_000):
+                region[offset + key] = key
+                region.get(offset + key // 2)
+        except BaseException as exc:
+            errors.append(exc)
+
+    def iterate() -> None:
+        try:
+            for _ in range(200):
+                list(region)
+        except BaseException as exc:
+            errors.append(exc)
+
+    threads: List[threading.Thread] = [threading.Thread(target=write, args=(offset * 10_000,))
+                                       for offset in range(4)] + [threading.Thread(target=iterate)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(region) <= 800
+
+
+def test_memory_alias_with_shards(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", strategy="FIFO", max_size=40, shards=4)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert isinstance(cache._cache, SegmentedCache)
+    assert cache._cache.maxsize == 40
+    assert cache.put_many({key: key for key in range(10)})
+    assert [result.value for result in cache.get_many(range(10))] == list(range(10))
+    assert cache.delete(0) == 1
+    assert cache.size() == 9
+    assert cache.clear()
+    assert cache.get(1) is None
@@ -0,0 +1,79 @@
+import pickle
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.decorators import cached
+from cache.exceptions import ConfigurationError
+from cache.refresh import CachedEntry
+from cache.serializers import SERIALIZERS, Serializer, decode, get_serializer
+
+NAMES: List[str] = [name for name in SERIALIZERS if name != "raw"]
+
+
+@pytest.mark.parametrize("name", NAMES)
+@pytest.mark.parametrize("value", [None, 1, 2.5, "text", [1, "two"], {"a": [1, 2], "b": None}])
+def test_plain_values_round_trip(name: str, value: Any) -> None:
+    assert decode(get_serializer(name).encode(value)) == value
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_cached_entry_round_trip(name: str) -> None:
+    entry: CachedEntry = CachedEntry({"user": [1, 2]}, 0.25, 1_700_000_000.5)
+    loaded: Any = decode(get_serializer(name).encode(entry))
+    assert isinstance(loaded, CachedEntry)
+    assert (loaded.value, loaded.delta, loaded.expiry) == ({"user": [1, 2]}, 0.25, 1_700_000_000.5)
+
+
+@pytest.mark.parametrize("name", NAMES)
+def test_cached_entry_without_expiry_round_trip(name: str) -> None:
+    loaded: Any = decode(get_serializer(name).encode(CachedEntry(None, 0.0, None)))
+    assert isinstance(loaded, CachedEntry)
+    assert (loaded.value, loaded.expiry) == (None, None)
+
+
+def test_raw_serializer_only_takes_bytes() -> None:
+    serializer: Serializer = get_serializer("raw")
+    assert decode(serializer.encode(b"payload")) == b"payload"
+    with pytest.raises(TypeError):
+        serializer.encode("text")
+
+
+def test_values_stored_before_the_tag_are_read_as_pickle() -> None:
+    assert decode(pickle.dumps({"legacy": True})) == {"legacy": True}
+
+
+def test_unknown_tag_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        decode(b"\x7fpayload")
+
+
+def test_serializer_options() -> None:
+    serializer: Serializer = get_serializer({"name": "pickle", "protocol": 4})
+    assert serializer.encode("x")[1:] == pickle.dumps("x", protocol=4)
+    with pytest.raises(ConfigurationError):
+        get_serializer({"name": "pickle", "protocol": 1})
+    with pytest.raises(ConfigurationError):
+        get_serializer({"name": "json", "indent": 2})
+    with pytest.raises(ConfigurationError):
+        get_serializer("yaml")
+
+
+@pytest.mark.parametrize("name", ["json", "ujson", "msgpack"])
+def test_decorator_entries_on_a_plain_type_serializer(name: str, make_alias: Callable[..., str],
+                                                      redis_options: Dict[str, Any]) -> None:
+    alias: str = make_alias("redis", ttl=3600, serializer=name, **redis_options)
+    calls: List[int] = []
+
+    @cached(alias, early_refresh=True)
+    def fetch(item: int) -> Dict[str, int]:
+        calls.append(item)
+        return {"item": item}
+
+    try:
+        assert fetch(1) == {"item": 1}
+        assert fetch(1) == {"item": 1}
+        assert calls == [1]
+    finally:
+        FwkCacheCreate.create_sync(alias).close()
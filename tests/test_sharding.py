@@ -0,0 +1,115 @@
+import asyncio
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+import pytest
+import redis
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.hashring import HashRing
+
+NODES: List[str] = ["a:1", "b:1", "c:1", "d:1"]
+KEYS: List[bytes] = [b"key%d" % index for index in range(20_000)]
+
+
+def owners(ring: HashRing) -> List[str]:
+    return [ring.node(key) for key in KEYS]
+
+
+def test_the_ring_does_not_depend_on_the_order_of_the_nodes() -> None:
+    assert owners(HashRing(NODES)) == owners(HashRing(reversed(NODES)))
+
+
+def test_the_keys_are_spread_between_the_nodes() -> None:
+    counts: Counter = Counter(owners(HashRing(NODES)))
+    assert set(counts) == set(NODES)
+    assert max(counts.values()) < 1.3 * len(KEYS) / len(NODES)
+
+
+def test_a_new_node_only_takes_its_share() -> None:
+    ring: HashRing = HashRing(NODES)
+    before: List[str] = owners(ring)
+    ring.add("e:1")
+    after: List[str] = owners(ring)
+    moved: List[int] = [position for position, owner in enumerate(after) if owner != before[position]]
+    assert all(after[position] == "e:1" for position in moved)
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+    ring.remove("e:1")
+    assert owners(ring) == before
+    assert ring.nodes == NODES
+
+
+def test_weights_scale_the_share() -> None:
+    counts: Counter = Counter(owners(HashRing(["a:1", "b:1"], weights={"a:1": 3})))
+    assert 2.4 < counts["a:1"] / counts["b:1"] < 3.6
+
+
+def test_a_ring_needs_nodes_and_points() -> None:
+    with pytest.raises(ConfigurationError):
+        HashRing([])
+    with pytest.raises(ConfigurationError):
+        HashRing(NODES, vnodes=0)
+
+
+@pytest.fixture
+def sharded(make_alias: Callable[..., str], redis_options: Dict[str, Any], redis_nodes: List[str]) -> str:
+    return make_alias("redis", namespace="shard", nodes=redis_nodes, timeout=5)
+
+
+def node_keys(redis_nodes: List[str]) -> Dict[str, List[bytes]]:
+    keys: Dict[str, List[bytes]] = {}
+    for node in redis_nodes:
+        host, _, port = node.rpartition(":")
+        with redis.Redis(host=host, port=int(port)) as client:
+            keys[f"{node}/0"] = sorted(client.keys("*"))
+    return keys
+
+
+def test_keys_are_stored_on_their_node(sharded: str, redis_nodes: List[str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(sharded)
+    assert cache.get_options()['nodes'] == [f"{node}/0" for node in redis_nodes]
+    for index in range(60):
+        assert cache.put(f"key{index}", index)
+    stored: Dict[str, List[bytes]] = node_keys(redis_nodes)
+    assert all(stored.values())
+    for node, keys in stored.items():
+        assert all(cache._ring.node(key) == node for key in keys)
+    assert [cache.get(f"key{index}") for index in range(60)] == list(range(60))
+
+
+def test_sync_batches_keep_the_order_of_the_keys(sharded: str, redis_nodes: List[str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(sharded)
+    assert cache.put_many({f"key{index}": index for index in range(50)})
+    results: List[Any] = cache.get_many([f"key{index}" for index in range(55)])
+    assert [result.value for result in results] == list(range(50)) + [None] * 5
+    assert [result.hit for result in results].count(True) == 50
+    assert cache.delete_many([f"key{index}" for index in range(0, 55, 2)]) == 25
+    assert cache.clear()
+    assert not any(node_keys(redis_nodes).values())
+
+
+def test_async_batches_keep_the_order_of_the_keys(sharded: str, redis_nodes: List[str]) -> None:
+    async def scenario() -> None:
+        cache: Any = FwkCacheCreate.create_async(sharded)
+        assert await cache.put_many({f"key{index}": index for index in range(50)})
+        results: List[Any] = await cache.get_many([f"key{index}" for index in range(55)])
+        assert [result.value for result in results] == list(range(50)) + [None] * 5
+        assert await cache.get("key7") == 7
+        assert await cache.delete_many([f"key{index}" for index in range(0, 55, 2)]) == 25
+        assert await cache.clear()
+
+    asyncio.run(scenario())
+    assert not any(node_keys(redis_nodes).values())
+
+
+def test_node_options(make_alias: Callable[..., str], redis_options: Dict[str, Any],
+                      redis_nodes: List[str]) -> None:
+    host, _, port = redis_nodes[1].rpartition(":")
+    alias: str = make_alias("redis", nodes=[redis_nodes[0], {'host': host, 'port': port, 'weight': 2}],
+                            vnodes=10)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert [node.weight for node in cache._nodes] == [1, 2]
+    assert cache.put("key", "value") and cache.get("key") == "value"
+    with pytest.raises(ConfigurationError):
+        FwkCacheCreate.create_sync(make_alias("redis", nodes=[redis_nodes[0], redis_nodes[0]]))
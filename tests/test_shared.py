@@ -0,0 +1,165 @@
+import asyncio
+import multiprocessing
+import pathlib
+import time
+from typing import Any, Callable, Iterator
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.shared_table import _SEQ, BUCKET_SLOTS, SLOT_HEADER_SIZE, SharedTable, key_hash
+
+
+@pytest.fixture
+def table_path(tmp_path: pathlib.Path) -> str:
+    return str(tmp_path / "segment")
+
+
+@pytest.fixture
+def table(table_path: str) -> Iterator[SharedTable]:
+    shared: SharedTable = SharedTable(table_path, 64, 128)
+    yield shared
+    shared.close()
+
+
+def test_put_get_delete(table: SharedTable) -> None:
+    assert table.put(b"key", b"value")
+    assert table.get(b"key") == b"value"
+    assert table.put(b"key", b"other")
+    assert table.get(b"key") == b"other"
+    assert table.delete(b"key")
+    assert not table.delete(b"key")
+    assert table.get(b"key") is None
+
+
+def test_entries_expire(table: SharedTable) -> None:
+    assert table.put(b"key", b"value", ttl=0.05)
+    assert table.get(b"key") == b"value"
+    time.sleep(0.1)
+    assert table.get(b"key") is None
+    assert table.count() == 0
+
+
+def test_values_larger_than_a_slot(table: SharedTable) -> None:
+    assert table.capacity == 128 - SLOT_HEADER_SIZE
+    assert table.put(b"key", b"small")
+    assert not table.put(b"key", b"x" * table.capacity)
+    # the previous value would be stale
+    assert table.get(b"key") is None
+
+
+def test_full_buckets_evict(table: SharedTable) -> None:
+    for index in range(1_000):
+        assert table.put(b"key%d" % index, b"value")
+    assert table.count() <= table.slots
+    assert table.get(b"key999") == b"value"
+
+
+def test_clear_and_count_by_prefix(table: SharedTable) -> None:
+    for index in range(10):
+        assert table.put(b"a:%d" % index, b"1")
+        assert table.put(b"b:%d" % index, b"2")
+    assert table.count(b"a:") == 10
+    assert table.clear(b"a:") == 10
+    assert table.count(b"a:") == 0
+    assert table.count() == 10
+
+
+def test_workers_share_the_segment(table: SharedTable, table_path: str) -> None:
+    other: SharedTable = SharedTable(table_path, 64, 128)
+    try:
+        assert table.put(b"key", b"value")
+        assert other.get(b"key") == b"value"
+        assert other.delete(b"key")
+        assert table.get(b"key") is None
+    finally:
+        other.close()
+
+
+def test_another_layout_is_rejected(table: SharedTable, table_path: str) -> None:
+    with pytest.raises(ConfigurationError):
+        SharedTable(table_path, 128, 128)
+    with pytest.raises(ConfigurationError):
+        SharedTable(table_path + "-other", 0, 128)
+    with pytest.raises(ConfigurationError):
+        SharedTable(table_path + "-other", 64, SLOT_HEADER_SIZE)
+
+
+def slot_of(table: SharedTable, key: bytes) -> int:
+    hashed: int = key_hash(key)
+    offset: Any = table._find(table._bucket(hashed), hashed, key)
+    assert offset is not None
+    return offset
+
+
+def test_a_dead_writer_does_not_invert_the_parity(table: SharedTable) -> None:
+    assert table.put(b"key", b"value")
+    offset: int = slot_of(table, b"key")
+    # the writer died after making the sequence odd
+    _SEQ.pack_into(table._map, offset, _SEQ.unpack_from(table._map, offset)[0] + 1)
+    assert table.put(b"key", b"other")
+    assert _SEQ.unpack_from(table._map, offset)[0] % 2 == 0
+    assert table._read(offset, key_hash(b"key"), b"key", time.time()) == b"other"
+
+
+def test_the_locked_read_drops_a_torn_slot(table: SharedTable) -> None:
+    assert table.put(b"key", b"value")
+    offset: int = slot_of(table, b"key")
+    # the writer died in the middle of the copy of the value
+    _SEQ.pack_into(table._map, offset, _SEQ.unpack_from(table._map, offset)[0] + 1)
+    start: int = offset + SLOT_HEADER_SIZE + len(b"key")
+    table._map[start:start + 3] = b"xxx"
+    assert table.get(b"key") is None
+    assert _SEQ.unpack_from(table._map, offset)[0] % 2 == 0
+    assert table.count() == 0
+    assert table.put(b"key", b"value")
+    assert table.get(b"key") == b"value"
+
+
+def _write_from_child(path: str, count: int) -> None:
+    table: SharedTable = SharedTable(path, 64 * BUCKET_SLOTS, 128)
+    for index in range(count):
+        table.put(b"child%d" % index, b"%d" % index)
+    table.close()
+
+
+def test_another_process_writes_are_visible(table_path: str) -> None:
+    table: SharedTable = SharedTable(table_path, 64 * BUCKET_SLOTS, 128)
+    try:
+        context: Any = multiprocessing.get_context("fork")
+        children: list = [context.Process(target=_write_from_child, args=(table_path, 100)) for _ in range(2)]
+        for child in children:
+            child.start()
+        for index in range(100):
+            table.put(b"parent%d" % index, b"%d" % index)
+        for child in children:
+            child.join()
+            assert child.exitcode == 0
+        assert table.get(b"child50") == b"50"
+        assert table.get(b"parent50") == b"50"
+    finally:
+        table.close()
+
+
+def test_shared_alias(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("shared", namespace="users", ttl=60, slots=64, slot_size=512)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    assert cache.put("key", {"name": "value"})
+    assert cache.get("key") == {"name": "value"}
+    assert cache.exists("key")
+    assert cache.put_many({"a": 1, "b": None})
+    assert [result.hit for result in cache.get_many(["a", "b", "c"])] == [True, True, False]
+    assert cache.size() == 3
+    assert not cache.put("large", "x" * 1_000)
+    assert cache.delete_many(["a", "b", "c"]) == 2
+    assert cache.clear()
+    assert cache.size() == 0
+
+    async def scenario() -> Any:
+        async_cache: Any = FwkCacheCreate.create_async(alias)
+        assert await async_cache.put("async", 1)
+        return await async_cache.get("async")
+
+    assert asyncio.run(scenario()) == 1
+    assert cache.get("async") == 1
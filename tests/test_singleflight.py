@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional
+
+import pytest
+
+from cache import refresh
+from cache.decorators import cached
+from cache.exceptions import ConfigurationError
+from cache.refresh import REFRESH_WORKERS, revalidate_sync
+from cache.singleflight import AsyncSingleFlight, SyncSingleFlight
+
+
+def test_async_concurrent_callers_share_one_call() -> None:
+    calls: List[int] = []
+
+    async def compute() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario() -> None:
+        flight: AsyncSingleFlight = AsyncSingleFlight()
+        results: List[str] = await asyncio.gather(*(flight.run("key", compute) for _ in range(50)))
+        assert results == ["value"] * 50
+        assert len(calls) == 1
+        assert len(flight) == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_follower_takes_over_a_failed_leader() -> None:
+    attempts: List[int] = []
+
+    async def compute() -> str:
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise ValueError("first attempt")
+        return "value"
+
+    async def scenario() -> None:
+        flight: AsyncSingleFlight = AsyncSingleFlight()
+        results: List[Any] = await asyncio.gather(*(flight.run("key", compute) for _ in range(5)),
+                                                  return_exceptions=True)
+        assert isinstance(results[0], ValueError)
+        assert results[1:] == ["value"] * 4
+        assert len(attempts) == 2
+
+    asyncio.run(scenario())
+
+
+def test_async_cancelled_leader_does_not_cancel_the_followers() -> None:
+    async def compute() -> str:
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def scenario() -> None:
+        flight: AsyncSingleFlight = AsyncSingleFlight()
+        leader: asyncio.Task = asyncio.create_task(flight.run("key", compute))
+        await asyncio.sleep(0)
+        follower: asyncio.Task = asyncio.create_task(flight.run("key", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(scenario())
+
+
+def test_sync_threads_share_one_call() -> None:
+    calls: List[int] = []
+    flight: SyncSingleFlight = SyncSingleFlight()
+    barrier: threading.Barrier = threading.Barrier(10)
+    results: List[str] = []
+
+    def compute() -> str:
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    def worker() -> None:
+        barrier.wait()
+        results.append(flight.run("key", compute))
+
+    threads: List[threading.Thread] = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 10
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+def test_cached_coalesces_concurrent_misses(make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", namespace="flight:")
+    calls: List[int] = []
+
+    @cached(alias)
+    async def slow_square(number: int) -> int:
+        calls.append(number)
+        await asyncio.sleep(0.01)
+        return number * number
+
+    async def scenario() -> None:
+        assert await asyncio.gather(*(slow_square(3) for _ in range(20))) == [9] * 20
+        assert await slow_square(3) == 9
+
+    asyncio.run(scenario())
+    assert calls == [3]
+
+
+def test_a_busy_pool_queues_one_refresh_per_key() -> None:
+    calls: List[int] = []
+    flight: SyncSingleFlight = SyncSingleFlight()
+    gate: threading.Event = threading.Event()
+    blockers: List[Future] = [refresh._refresh_executor.submit(gate.wait, 5)
+                              for _ in range(REFRESH_WORKERS)]
+
+    def compute() -> str:
+        calls.append(1)
+        return "value"
+
+    try:
+        futures: List[Optional[Future]] = [revalidate_sync(flight, "key", compute) for _ in range(10)]
+    finally:
+        gate.set()
+    assert futures[0] is not None and futures[1:] == [None] * 9
+    assert futures[0].result(timeout=5) == "value"
+    assert all(blocker.result(timeout=5) for blocker in blockers)
+    deadline: float = time.monotonic() + 5
+    while (flight, "key") in refresh._pending_refreshes:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert len(calls) == 1
+    # once done the key can be refreshed again
+    assert revalidate_sync(flight, "key", compute).result(timeout=5) == "value"
+
+
+@pytest.mark.parametrize("strategy", ["TTL", "TLRU"])
+def test_stale_ttl_needs_a_region_without_expiry(strategy: str, make_alias: Callable[..., str]) -> None:
+    expiring: str = make_alias("memory", strategy=strategy, ttl=30)
+    fifo: str = make_alias("memory", strategy="FIFO", ttl=30)
+
+    def square(number: int) -> int:
+        return number * number
+
+    with pytest.raises(ConfigurationError):
+        cached(expiring, stale_ttl=60)(square)(3)
+    assert cached(expiring)(square)(3) == 9
+    assert cached(fifo, stale_ttl=60)(square)(3) == 9
@@ -0,0 +1,99 @@
+import pickle
+import sys
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.fwk_memorycache import MemoryCommonCache
+from cache.sizing import deep_getsizeof, get_sizer, serialized_size
+
+
+class Slotted:
+    __slots__ = ("payload", "empty")
+
+    def __init__(self, payload: Any) -> None:
+        self.payload: Any = payload
+
+
+class Plain:
+
+    def __init__(self, payload: Any) -> None:
+        self.payload: Any = payload
+
+
+def test_atomic_values_are_their_getsizeof() -> None:
+    for value in ("text", b"bytes", 10 ** 30, 1.5, None):
+        assert deep_getsizeof(value) == sys.getsizeof(value)
+
+
+def test_containers_count_what_they_reference() -> None:
+    payload: str = "x" * 1_000
+    assert deep_getsizeof([payload]) == sys.getsizeof([payload]) + sys.getsizeof(payload)
+    assert deep_getsizeof({"key": [payload]}) > deep_getsizeof([payload])
+    assert deep_getsizeof(Slotted(payload)) >= sys.getsizeof(payload)
+    assert deep_getsizeof(Plain(payload)) >= sys.getsizeof(payload)
+
+
+def test_shared_objects_and_cycles_are_counted_once() -> None:
+    payload: str = "x" * 1_000
+    assert deep_getsizeof([payload, payload]) == sys.getsizeof([payload, payload]) + sys.getsizeof(payload)
+    cycle: List[Any] = []
+    cycle.append(cycle)
+    assert deep_getsizeof(cycle) == sys.getsizeof(cycle)
+
+
+def test_classes_are_not_followed() -> None:
+    assert deep_getsizeof([Plain]) == sys.getsizeof([Plain]) + sys.getsizeof(Plain)
+
+
+def test_modules_and_functions_are_not_followed() -> None:
+    def local() -> None:
+        return None
+
+    for value in (pickle, local, Plain(list(range(100))).__init__, len, [].append):
+        assert deep_getsizeof([value]) == sys.getsizeof([value]) + sys.getsizeof(value)
+
+
+def test_serialized_size() -> None:
+    value: Dict[str, Any] = {"items": list(range(100))}
+    assert serialized_size(value) == len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    # what pickle refuses is measured in memory
+    assert serialized_size(lambda: None) > 0
+
+
+def test_sizers_by_name() -> None:
+    assert get_sizer() is deep_getsizeof
+    assert get_sizer("serialized") is serialized_size
+    with pytest.raises(ConfigurationError):
+        get_sizer("shallow")
+
+
+@pytest.mark.parametrize("strategy", ["FIFO", "LFU", "TTL", "TINYLFU", "ARC", "2Q"])
+@pytest.mark.parametrize("shards", [1, 4])
+def test_byte_budget_bounds_the_region(strategy: str, shards: int, make_alias: Callable[..., str]) -> None:
+    alias: str = make_alias("memory", strategy=strategy, ttl=60, max_bytes=20_000, shards=shards)
+    cache: Any = FwkCacheCreate.create_sync(alias)
+    for key in range(200):
+        assert cache.put(key, "v" * 500)
+    assert 0 < cache.bytes_used() <= 20_000
+    assert cache.size() < 200
+    assert MemoryCommonCache.bytes_usage()[alias] == cache.bytes_used()
+
+
+def test_a_value_over_the_budget_is_not_stored(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory", strategy="FIFO", max_bytes=2_000))
+    assert cache.put("key", "small")
+    assert not cache.put("key", "x" * 10_000)
+    # the previous value would be stale, it is dropped too
+    assert cache.get("key") is None
+    assert cache.size() == 0
+
+
+def test_serialized_sizer_and_regions_without_budget(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory", strategy="FIFO", max_bytes=10_000,
+                                                       sizer="serialized"))
+    assert cache.put("key", "x" * 1_000)
+    assert cache.bytes_used() == serialized_size("x" * 1_000)
+    assert FwkCacheCreate.create_sync(make_alias("memory", strategy="FIFO")).bytes_used() is None
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache import fwk_tieredcache
+from cache.fwk_cache import CacheResult
+from cache.fwk_tieredcache import AsyncTieredCache, SyncTieredCache
+
+
+def other_worker(keys: Any) -> Dict[str, Any]:
+    """ invalidation as published by the tiered client of another process """
+    return {"type": "message", "data": json.dumps(["another-worker", keys])}
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline: float = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def subscribed(fwk_cache: SyncTieredCache) -> SyncTieredCache:
+    """ the listener flushes the local tier when it subscribes, the tests start after that """
+    assert wait_until(lambda: fwk_cache._guard._flushed > 0)
+    return fwk_cache
+
+
+@pytest.fixture
+def tiered(make_alias: Callable[..., str], redis_options: Dict[str, Any]) -> str:
+    local: str = make_alias("memory", namespace="near:", ttl=60)
+    remote: str = make_alias("redis", namespace="far:", **redis_options)
+    return make_alias("tiered", local=local, remote=remote)
+
+
+def test_sync_reads_through_and_fills_the_local_tier(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        _: bool = fwk_cache._remote.put("k", "remote")
+        assert fwk_cache._local.get("k") is None
+        assert fwk_cache.get("k") == "remote"
+        assert fwk_cache._local.get("k") == "remote"
+        assert fwk_cache.get_many(["k", "missing"], 0) == [CacheResult(True, "remote"), CacheResult(False, 0)]
+    finally:
+        fwk_cache.close()
+
+
+def test_invalidation_received_during_a_read_is_not_overwritten(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        _: bool = fwk_cache._remote.put("k", "old")
+        read: Callable[..., List[CacheResult]] = fwk_cache._remote.get_many
+
+        def racing_read(keys: List[Any], default: Any = None) -> List[CacheResult]:
+            results: List[CacheResult] = read(keys, default)
+            # another worker writes the key after the value was read and before the fill
+            fwk_cache._invalidate(other_worker(["k"]))
+            return results
+
+        fwk_cache._remote.get_many = racing_read
+        assert fwk_cache.get("k") == "old"
+        assert fwk_cache._local.get_many(["k"])[0].hit is False
+        fwk_cache._remote.get_many = read
+        assert fwk_cache.get("k") == "old"
+        assert fwk_cache._local.get("k") == "old"
+    finally:
+        fwk_cache.close()
+
+
+def test_flush_received_during_a_read_drops_the_fill(tiered: str) -> None:
+    async def scenario() -> None:
+        fwk_cache: AsyncTieredCache = AsyncTieredCache(tiered)
+        _: bool = await fwk_cache._remote.put_many({"a": 1, "b": 2})
+        read: Callable[..., Any] = fwk_cache._remote.get_many
+
+        async def racing_read(keys: List[Any], default: Any = None) -> List[CacheResult]:
+            results: List[CacheResult] = await read(keys, default)
+            await fwk_cache._invalidate(other_worker(None))
+            return results
+
+        fwk_cache._remote.get_many = racing_read
+        assert [result.value for result in await fwk_cache.get_many(["a", "b"])] == [1, 2]
+        assert not any(result.hit for result in await fwk_cache._local.get_many(["a", "b"]))
+        await fwk_cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_own_invalidations_are_ignored_and_others_applied(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        _: bool = fwk_cache.put("k", 1)
+        fwk_cache._invalidate({"type": "message", "data": fwk_tieredcache.TieredCommonCache._message(["k"])})
+        assert fwk_cache._local.get("k") == 1
+        fwk_cache._invalidate(other_worker(["k"]))
+        assert fwk_cache._local.get_many(["k"])[0].hit is False
+    finally:
+        fwk_cache.close()
+
+
+def test_invalidations_reuse_the_local_client(tiered: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        def no_new_client(alias: str) -> None:
+            raise AssertionError("the local tier client is built once")
+
+        monkeypatch.setattr(fwk_tieredcache, "SyncMemoryCache", no_new_client)
+        _: bool = fwk_cache._local.put("k", 1)
+        fwk_cache._invalidate(other_worker(["k"]))
+        assert fwk_cache._local.get("k") is None
+    finally:
+        fwk_cache.close()
+
+
+def test_local_tier_is_flushed_when_the_listener_subscribes(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        # the listener of the first client subscribes in its thread, a resubscription after a
+        # reconnect delivers the same confirmation
+        _: bool = fwk_cache._local.put("stale", 1)
+        fwk_cache._invalidate({"type": "subscribe", "channel": fwk_cache._channel, "data": 1})
+        assert fwk_cache._local.get_many(["stale"])[0].hit is False
+    finally:
+        fwk_cache.close()
+
+
+def test_invalidations_published_by_another_worker_reach_the_listener(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    try:
+        _: bool = fwk_cache.put("k", 1)
+        assert wait_until(lambda: fwk_cache._local.get("k") == 1)
+        fwk_cache._remote._cache.publish(fwk_cache._channel, other_worker(["k"])["data"])
+        assert wait_until(lambda: not fwk_cache._local.get_many(["k"])[0].hit)
+    finally:
+        fwk_cache.close()
+
+
+def test_close_stops_the_listeners(tiered: str) -> None:
+    fwk_cache: SyncTieredCache = subscribed(SyncTieredCache(tiered))
+    thread: Any = fwk_tieredcache.TieredCommonCache._listeners[(tiered, False)][0]
+    assert thread.is_alive()
+    fwk_cache.close()
+    assert not thread.is_alive()
+
+    async def scenario() -> None:
+        async_cache: AsyncTieredCache = AsyncTieredCache(tiered)
+        _: bool = await async_cache.put("k", 1)
+        listener: asyncio.Task = fwk_tieredcache.TieredCommonCache._listeners[(tiered, True)]
+        await async_cache.close()
+        assert listener.done()
+
+    asyncio.run(scenario())
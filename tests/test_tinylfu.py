@@ -0,0 +1,117 @@
+import random
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.policies import COUNTER_MAX, FrequencySketch, TinyLFUCache
+
+
+def check_sizes(region: TinyLFUCache) -> None:
+    """ the bookkeeping of the segments matches what cachetools holds """
+    assert set(region._window) | set(region._probation) | set(region._protected) == set(region.keys())
+    assert region._window_size == sum(region._window.values())
+    assert region._main_size == sum(region._probation.values()) + sum(region._protected.values())
+    assert region._protected_size == sum(region._protected.values())
+    assert region._window_size + region._main_size == region.currsize <= region.maxsize
+
+
+def test_sketch_counts_and_saturates() -> None:
+    sketch: FrequencySketch = FrequencySketch(1_024)
+    for _ in range(5):
+        sketch.increment("hot")
+    assert sketch.frequency("hot") >= 5
+    assert sketch.frequency("cold") <= 1
+    for _ in range(COUNTER_MAX * 2):
+        sketch.increment("hot")
+    assert sketch.frequency("hot") == COUNTER_MAX
+
+
+def test_sketch_ages_its_counters() -> None:
+    sketch: FrequencySketch = FrequencySketch(16)
+    for _ in range(8):
+        sketch.increment("key")
+    before: int = sketch.frequency("key")
+    for other in range(1_000):
+        sketch.increment(other)
+    assert sketch.frequency("key") < before
+
+
+def test_capacity_and_bookkeeping_under_random_load() -> None:
+    region: TinyLFUCache = TinyLFUCache(100)
+    generator: random.Random = random.Random(7)
+    for _ in range(20_000):
+        key: int = int(generator.paretovariate(1.2)) % 1_000
+        if region.get(key) is None:
+            region[key] = key
+        if generator.random() < 0.01 and key in region:
+            del region[key]
+    assert len(region) <= 100
+    check_sizes(region)
+
+
+def test_frequent_keys_survive_a_scan() -> None:
+    region: TinyLFUCache = TinyLFUCache(100)
+    hot: List[int] = list(range(50))
+    for _ in range(10):
+        for key in hot:
+            if region.get(key) is None:
+                region[key] = key
+    for key in range(1_000, 5_000):
+        if region.get(key) is None:
+            region[key] = key
+    assert sum(key in region for key in hot) >= 45
+    check_sizes(region)
+
+
+def test_sized_values_and_growing_keys() -> None:
+    region: TinyLFUCache = TinyLFUCache(1_000, getsizeof=len)
+    region["a"] = "x" * 100
+    region["a"] = "y" * 900
+    assert region["a"] == "y" * 900
+    for key in range(50):
+        region[key] = "z" * 50
+    check_sizes(region)
+
+
+def test_popitem_empties_the_region() -> None:
+    region: TinyLFUCache = TinyLFUCache(10)
+    for key in range(10):
+        region[key] = key
+    while region:
+        region.popitem()
+    assert region.currsize == 0
+    check_sizes(region)
+
+
+def segments(region: TinyLFUCache) -> Tuple[List[Any], List[Any], List[Any]]:
+    return list(region._window), list(region._probation), list(region._protected)
+
+
+def test_evictions_and_deletes_are_not_accesses() -> None:
+    region: TinyLFUCache = TinyLFUCache(10)
+    for key in range(10):
+        region[key] = key
+    for key in range(5):
+        assert region[key] == key
+    frequencies: Dict[int, int] = {key: region._sketch.frequency(key) for key in range(10)}
+    window, probation, protected = segments(region)
+    victim: Any = probation[0]
+
+    assert region.pop(victim) == victim
+    assert segments(region) == (window, probation[1:], protected)
+    key, value = region.popitem()
+    assert key == value
+    assert {key: region._sketch.frequency(key) for key in range(10)} == frequencies
+    assert region.pop("missing", None) is None
+    with pytest.raises(KeyError):
+        region.pop("missing")
+    check_sizes(region)
+
+
+def test_memory_alias_with_tinylfu(make_alias: Callable[..., str]) -> None:
+    cache: Any = FwkCacheCreate.create_sync(make_alias("memory", strategy="TINYLFU", max_size=20))
+    for key in range(100):
+        assert cache.put(key, key)
+    assert isinstance(cache._cache, TinyLFUCache)
+    assert cache.size() <= 20
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from cache.cache_creator import FwkCacheCreate
+from cache.exceptions import ConfigurationError
+from cache.tracking import MISSING, InvalidationTracker, get_tracker
+
+
+def subscribed(max_size: int = 10) -> InvalidationTracker:
+    """ a tracker as it is once its listener is subscribed, without the listener """
+    tracker: InvalidationTracker = InvalidationTracker(None, ["ns:"], max_size)
+    tracker._disabled = True
+    tracker._ready = True
+    return tracker
+
+
+def test_replies_are_kept_until_invalidated() -> None:
+    tracker: InvalidationTracker = subscribed()
+    assert tracker.lookup("ns:a") is MISSING
+    tracker.store("ns:a", tracker.begin("ns:a"), b"value")
+    tracker.store("ns:b", tracker.begin("ns:b"), None)
+    assert tracker.lookup("ns:a") == b"value"
+    # a key missing on the server is cached too
+    assert tracker.lookup("ns:b") is None
+    tracker.invalidate([b"ns:a"])
+    assert tracker.lookup("ns:a") is MISSING
+    tracker.invalidate(None)
+    assert tracker.lookup("ns:b") is MISSING
+
+
+def test_a_read_invalidated_in_flight_is_not_stored() -> None:
+    tracker: InvalidationTracker = subscribed()
+    token: Any = tracker.begin("ns:a")
+    tracker.invalidate("ns:a")
+    tracker.store("ns:a", token, b"stale")
+    assert tracker.lookup("ns:a") is MISSING
+    token = tracker.begin("ns:a")
+    tracker.invalidate(None)
+    tracker.store("ns:a", token, b"stale")
+    assert tracker.lookup("ns:a") is MISSING
+
+
+def test_nothing_is_stored_before_the_subscription() -> None:
+    tracker: InvalidationTracker = subscribed()
+    tracker._ready = False
+    token: Any = tracker.begin("ns:a")
+    assert token is None
+    tracker.store("ns:a", token, b"value")
+    tracker._ready = True
+    assert tracker.lookup("ns:a") is MISSING
+
+
+def test_the_oldest_copy_makes_room() -> None:
+    tracker: InvalidationTracker = subscribed(max_size=2)
+    for key in ["ns:a", "ns:b", "ns:c"]:
+        tracker.store(key, tracker.begin(key), key.encode("utf-8"))
+    assert tracker.lookup("ns:a") is MISSING
+    assert [tracker.lookup(key) for key in ["ns:b", "ns:c"]] == [b"ns:b", b"ns:c"]
+
+
+def test_tracking_options() -> None:
+    assert get_tracker(None, None, "ns") is None
+    assert get_tracker(True, None, "ns")._prefixes == ["ns:"]
+    assert get_tracker(True, None, "")._prefixes == []
+    tracker: Any = get_tracker({'prefixes': ["a:", "b:"], 'max_size': 5}, None, "ns")
+    assert tracker._prefixes == ["a:", "b:"] and tracker._max_size == 5
+    with pytest.raises(ConfigurationError):
+        get_tracker({'size': 5}, None, "ns")
+    with pytest.raises(ConfigurationError):
+        get_tracker({'max_size': 0}, None, "ns")
+
+
+def test_a_server_without_tracking_is_always_read(make_alias: Callable[..., str],
+                                                  redis_options: Dict[str, Any],
+                                                  caplog: pytest.LogCaptureFixture) -> None:
+    alias: str = make_alias("redis", namespace="tracked", client_tracking=True, **redis_options)
+    writer: Any = FwkCacheCreate.create_sync(alias)
+
+    async def scenario() -> List[Any]:
+        cache: Any = FwkCacheCreate.create_async(alias)
+        values: List[Any] = [await cache.get("key")]
+        await cache._tracker._listener
+        assert cache._tracker._disabled and not cache._tracker.ready
+        writer.put("key", "written")
+        values.append(await cache.get("key"))
+        values.append([result.value for result in await cache.get_many(["key", "other"])])
+        await cache.close()
+        return values
+
+    with caplog.at_level(logging.WARNING, logger="cache.tracking"):
+        assert asyncio.run(scenario()) == [None, "written", ["written", None]]
+    assert "client tracking is not available" in caplog.text
+
+
+def test_tracking_needs_a_single_node(make_alias: Callable[..., str], redis_options: Dict[str, Any],
+                                      redis_nodes: List[str]) -> None:
+    async def build(alias: str) -> Any:
+        return FwkCacheCreate.create_async(alias)
+
+    with pytest.raises(ConfigurationError):
+        asyncio.run(build(make_alias("redis", client_tracking=True, nodes=redis_nodes)))
+    with pytest.raises(ConfigurationError):
+        asyncio.run(build(make_alias("redis", client_tracking=True, replicas=redis_nodes[1:],
+                                     **redis_options)))
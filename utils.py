@@ -7,8 +7,9 @@ import uuid
 from datetime import timedelta
 from typing import List, Dict, Any, cast
 
-from cache.decorators import cached, TestCache
-from cache.test_cache import SerializableData
+from cache.cache_creator import FwkCacheCreate
+from cache.decorators import cached
+from cache.fwk_cache import SerializableData, AbstractAsyncFwkCache, AbstractSyncFwkCache
 from models.user import User
 
 
@@ -63,7 +64,7 @@ def create_user(username: str) -> User:
 
 
 async def async_call_helper(username) -> User:
-    cache: TestCache = TestCacheCreate.create("memory")
+    cache: AbstractAsyncFwkCache = FwkCacheCreate.create_async("memory")
     value: User
     value = cast(User, await cache.get(username))
     if not value:
@@ -77,7 +78,7 @@ async def async_call_helper(username) -> User:
 
 
 def sync_call_helper(username) -> User:
-    cache: TestCache = TestCacheCreate.create("memory")
+    cache: AbstractSyncFwkCache = FwkCacheCreate.create_sync("memory")
     value: User
     value = cast(User, cache.get(username))
     if not value: